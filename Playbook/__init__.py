@@ -9,8 +9,15 @@ bl_info = {
 }
 
 import bpy
+import time
 
+import_start = time.perf_counter()
 
+# Module each package in requirements.txt is imported as, when it differs
+package_modules = {"python-dotenv": "dotenv", "python-socketio": "socketio"}
+
+
+# Only installs when a package is missing, so usual startups don't run pip
 def ensure_packages():
     if bpy.app.version < (4, 2, 0):
         import site
@@ -32,8 +39,13 @@ def ensure_packages():
                 packages = [
                     package
                     for package in f.read().splitlines()
-                    if not importlib.util.find_spec(package)
+                    if package
+                    and not importlib.util.find_spec(
+                        package_modules.get(package, package)
+                    )
                 ]
+
+            if packages:
                 subprocess.run([python_executable, "-m", "ensurepip", "--upgrade"])
                 subprocess.run(
                     [python_executable, "-m", "pip", "install", *packages, "--user"],
@@ -43,10 +55,6 @@ def ensure_packages():
         except Exception as e:
             print(f"Error reading requirements.txt: {e}")
 
-    import dotenv
-
-    print(dotenv.__file__)
-
 
 def reset_addon_values():
     from .render_status import RenderStatus
@@ -55,10 +63,10 @@ def reset_addon_values():
 
 
 ensure_packages()
+package_check_time = time.perf_counter() - import_start
 reset_addon_values()
 
 import os
-import toml
 from bpy.types import AddonPreferences
 from bpy.props import StringProperty
 from bpy.app.handlers import persistent
@@ -67,26 +75,26 @@ from . import properties
 from . import operators
 from . import preferences
 from . import render_image
+from . import render_batch
 from .version_control import PlaybookVersionControl
-from .utilities.secret_manager import BlenderSecretsManager
-from .utilities.network_utilities import get_user_info
+from .utilities.config import Config
+from .startup import (
+    startup_timings,
+    time_phase,
+    report_startup_timings,
+    start_network_initialization,
+    request_user_info,
+)
+
+import_time = time.perf_counter() - import_start - package_check_time
 
 
 class Preferences(AddonPreferences):
     bl_idname = __package__
 
     def on_api_key_updated(self, context):
-        if not self.api_key:
-            return
-
-        if len(self.api_key) != 36:
-            return
-
-        user_info = get_user_info(self.api_key)
-
-        if user_info is not None:
-            context.scene.user_properties.user_email = user_info["email"]
-            context.scene.user_properties.user_credits = user_info["credits"]
+        Config.set_preferences(self)
+        request_user_info(self.api_key)
 
     api_key: StringProperty(
         name="API Key",
@@ -109,47 +117,54 @@ class Preferences(AddonPreferences):
 
         layout.operator("op.documentation")
         layout.operator("op.reset_addon_settings")
+        layout.operator("op.refresh_secrets")
         layout.prop(self, "api_key")
 
 
 @persistent
 def read_preferences_on_load(dummy):
-    context = bpy.context
     addon_prefs = bpy.context.preferences.addons[__package__].preferences
+    Config.set_preferences(addon_prefs)
 
-    if not addon_prefs.api_key:
-        return
+    request_user_info(addon_prefs.api_key)
 
-    if len(addon_prefs.api_key) != 36:
-        return
 
-    user_info = get_user_info(addon_prefs.api_key)
+def register():
+    startup_timings.clear()
+    startup_timings["package check"] = package_check_time
+    startup_timings["imports"] = import_time
 
-    if user_info is not None:
-        context.scene.user_properties.user_email = user_info["email"]
-        context.scene.user_properties.user_credits = user_info["credits"]
+    time_phase("ui", ui.register)
+    time_phase("properties", properties.register)
+    time_phase("operators", operators.register)
+    time_phase("preferences", preferences.register)
+    time_phase("render image", render_image.register)
+    time_phase("render batch", render_batch.register)
+    time_phase("addon preferences", bpy.utils.register_class, Preferences)
 
+    current_version = time_phase("version", read_addon_version)
 
-def register():
-    ui.register()
-    properties.register()
-    operators.register()
-    preferences.register()
-    render_image.register()
+    if read_preferences_on_load not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(read_preferences_on_load)
 
-    bpy.utils.register_class(Preferences)
+    report_startup_timings()
 
-    BlenderSecretsManager.load_to_env()
+    # Secrets, the version check and the user info are fetched in the
+    # background
+    addon_prefs = bpy.context.preferences.addons[__package__].preferences
+    Config.set_preferences(addon_prefs)
+    start_network_initialization(addon_prefs.api_key, current_version)
+
+
+#
+def read_addon_version() -> tuple:
+    import toml
 
     toml_path = os.path.join(os.path.dirname(__file__), "blender_manifest.toml")
     with open(toml_path, "r") as blender_info:
         version = toml.load(blender_info)["version"]
-        PlaybookVersionControl.check_if_version_up_to_date(
-            tuple(map(int, version.split(".")))
-        )
 
-    if read_preferences_on_load not in bpy.app.handlers.load_post:
-        bpy.app.handlers.load_post.append(read_preferences_on_load)
+    return tuple(map(int, version.split(".")))
 
 
 def unregister():
@@ -162,6 +177,7 @@ def unregister():
         operators.unregister()
         preferences.unregister()
         render_image.unregister()
+        render_batch.unregister()
 
         bpy.utils.unregister_class(Preferences)
 
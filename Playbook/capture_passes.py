@@ -1,97 +1,341 @@
 import os
 import bpy
-import requests
-from dotenv import load_dotenv
+import calendar
+import hashlib
+import json
+import threading
+import time
+from urllib.parse import urlsplit, parse_qsl
 from .render_passes.render_passes import render_passes
-from .utilities.utilities import get_api_key
+from .render_passes.pass_images import pass_images, pass_image_listeners
+from .render_passes.pass_cache import pass_names
+from .utilities.utilities import (
+    get_api_key,
+    get_env,
+    force_ui_redraw,
+    get_user_folder,
+)
+from .utilities.worker_pool import WorkerPool
+from .utilities.network_utilities import send_with_access_token
+from .utilities.http_client import (
+    HttpClient,
+    CONNECT_TIMEOUT,
+    TRANSFER_READ_TIMEOUT,
+    ProgressBody,
+    retry_transfer,
+)
+
+PROGRESS_REDRAW_INTERVAL = 0.2
+
+# Upload URLs are requested again this many seconds before they expire
+UPLOAD_URL_EXPIRY_MARGIN = 60
+
+
+#
+def get_upload_manifest_path() -> str:
+    return os.path.join(get_user_folder("CONFIG"), "upload_manifest.json")
+
+
+# Presigned upload URLs, reused until they expire. Used from the worker threads
+class UploadUrls:
+    urls: dict = None
+    user_alias = ""
+    expires_at = 0
+    lock = threading.Lock()
+
+    #
+    @classmethod
+    def get(cls, url, user_alias) -> dict:
+        with cls.lock:
+            if (
+                cls.urls
+                and cls.user_alias == user_alias
+                and time.time() < cls.expires_at - UPLOAD_URL_EXPIRY_MARGIN
+            ):
+                return cls.urls
+
+            cls.urls = get_upload_urls(url, user_alias)
+            cls.user_alias = user_alias
+            cls.expires_at = (
+                min(get_url_expiry(signed_url) for signed_url in cls.urls.values())
+                if cls.urls
+                else 0
+            )
+
+            return cls.urls
+
+    #
+    @classmethod
+    def invalidate(cls):
+        with cls.lock:
+            cls.urls = None
+
+
+# Bytes sent or received so far for each transfer in progress. Updated from the
+# worker threads and shown in the render panel
+class TransferProgress:
+    transfers: dict[str, tuple[int, int]] = {}
+    lock = threading.Lock()
+
+    #
+    @classmethod
+    def update(cls, name: str, transferred: int, size: int):
+        with cls.lock:
+            cls.transfers[name] = (transferred, size)
+
+    #
+    @classmethod
+    def finish(cls, name: str):
+        with cls.lock:
+            cls.transfers.pop(name, None)
+
+    # Called on the main thread when transfers are started
+    @classmethod
+    def show(cls):
+        if not bpy.app.timers.is_registered(redraw_transfer_progress):
+            bpy.app.timers.register(
+                redraw_transfer_progress, first_interval=PROGRESS_REDRAW_INTERVAL
+            )
+
+    #
+    @classmethod
+    def get_progress_labels(cls) -> list[str]:
+        with cls.lock:
+            transfers = list(cls.transfers.items())
+
+        return [
+            f"{name}: {min(100, transferred * 100 // size)}%" if size else name
+            for name, (transferred, size) in transfers
+        ]
+
+
+# Redraw the panels until every transfer is done
+def redraw_transfer_progress():
+    force_ui_redraw()
+
+    with TransferProgress.lock:
+        is_transferring = bool(TransferProgress.transfers)
+
+    return PROGRESS_REDRAW_INTERVAL if is_transferring else None
+
+
+# Hash of the last image uploaded to each destination and the time the URL it
+# was uploaded with expires at. Kept in a file so unchanged passes are not
+# uploaded again after a restart. The server isn't asked whether it still has
+# the image, so an upload is only trusted while its URL is valid
+class UploadManifest:
+    uploads: dict[str, list] = None
+    lock = threading.Lock()
+
+    #
+    @classmethod
+    def is_uploaded(cls, destination: str, digest: str) -> bool:
+        with cls.lock:
+            upload = cls.get_uploads().get(destination)
+
+        return upload is not None and upload[0] == digest and time.time() < upload[1]
+
+    #
+    @classmethod
+    def mark_uploaded(cls, destination: str, digest: str, expires_at: float):
+        with cls.lock:
+            uploads = cls.get_uploads()
+            uploads[destination] = [digest, expires_at]
+
+            # Expired uploads won't be trusted again
+            now = time.time()
+            cls.uploads = {
+                uploaded_to: upload
+                for uploaded_to, upload in uploads.items()
+                if now < upload[1]
+            }
+
+            try:
+                with open(get_upload_manifest_path(), "w") as file:
+                    json.dump(cls.uploads, file)
+            except OSError as e:
+                print(f"Failed to save the upload manifest: {e}")
+
+    # Called with the lock held
+    @classmethod
+    def get_uploads(cls) -> dict[str, str]:
+        if cls.uploads is None:
+            try:
+                with open(get_upload_manifest_path(), "r") as file:
+                    cls.uploads = json.load(file)
+            except (OSError, ValueError):
+                cls.uploads = {}
+
+        return cls.uploads
 
 
 def capture_passes():
+    url = get_env("BASE_ACCOUNTS_URL")
+
+    # Requested while the passes render, unless the last ones are still valid
+    upload_urls = WorkerPool.submit(UploadUrls.get, url, get_api_key())
+    uploads = {}
+
+    # Each pass is uploaded as soon as it is encoded and the URLs are known,
+    # while the next pass renders
+    def upload_when_ready(pass_name, pass_image):
+        uploads[pass_name] = WorkerPool.submit_when_done(
+            [upload_urls, pass_image], upload_pass, pass_name
+        )
+
+    pass_image_listeners.append(upload_when_ready)
+    try:
+        passes_rendered = render_passes()
+    finally:
+        pass_image_listeners.remove(upload_when_ready)
 
     # Render passes failed
-    if not render_passes():
+    if not passes_rendered:
         return
 
-    env_path = os.path.join(os.path.dirname(__file__), ".env")
-    load_dotenv(dotenv_path=env_path)
-    url = os.getenv("BASE_ACCOUNTS_URL")
+    # Passes that were still up to date
+    for pass_name in pass_names:
+        if pass_name not in uploads:
+            upload_when_ready(pass_name, pass_images[pass_name])
 
-    upload_urls = get_upload_urls(url)
+    TransferProgress.show()
 
-    if upload_urls:
-        dir = os.path.dirname(__file__)
-        beauty_path = os.path.join(dir, "renders", "beauty.png")
-        beauty_url = upload_urls["beauty"]
-        upload_file(beauty_url, beauty_path)
 
-        normal_path = os.path.join(dir, "renders", "normal.png")
-        normal_url = upload_urls["normal"]
-        upload_file(normal_url, normal_path)
+# Runs on a worker thread. Passes that are the same as the last upload to
+# their destination are skipped
+def upload_pass(pass_name: str, urls: dict, data: bytes):
+    import requests
 
-        mask_path = os.path.join(dir, "renders", "mask.png")
-        mask_url = upload_urls["mask"]
-        upload_file(mask_url, mask_path)
+    if not urls:
+        return
 
-        depth_path = os.path.join(dir, "renders", "depth.png")
-        depth_url = upload_urls["depth"]
-        upload_file(depth_url, depth_path)
+    digest = hashlib.sha256(data).hexdigest()
+    destination = get_url_destination(urls[pass_name])
 
-        outline_path = os.path.join(dir, "renders", "outline.png")
-        outline_url = upload_urls["outline"]
-        upload_file(outline_url, outline_path)
+    if UploadManifest.is_uploaded(destination, digest):
+        print(f"Skipped uploading the unchanged {pass_name} pass")
+        return
 
-    return
+    transfer_name = f"Uploading {pass_name}"
+    TransferProgress.update(transfer_name, 0, len(data))
 
+    try:
+        retry_transfer(
+            upload_file,
+            urls[pass_name],
+            data,
+            lambda sent, size: TransferProgress.update(transfer_name, sent, size),
+        )
+        UploadManifest.mark_uploaded(
+            destination, digest, get_url_expiry(urls[pass_name])
+        )
 
-#
-def get_upload_urls(url):
-    alias_url = os.getenv("ALIAS_URL")
-    user_alias = get_api_key()
-    jwt_request = requests.get(alias_url + user_alias)
-    if jwt_request is not None:
-        user_token = jwt_request.json()["access_token"]
-
-    response = requests.get(
-        url=f"{url}/upload-assets/get-upload-urls",
-        headers={"Authorization": f"Bearer {user_token}"},
-    )
-    return response.json() if response.status_code == 200 else None
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to upload the {pass_name} pass: {e}")
 
+        # The URLs may have expired early
+        UploadUrls.invalidate()
 
-#
-def get_download_urls(url, headers):
-    response = requests.get(
-        url=f"{url}/upload-assets/get-download-urls", headers=headers
-    )
-    return response.json() if response.status_code == 200 else None
+    finally:
+        TransferProgress.finish(transfer_name)
 
 
-#
-def upload_file(signed_url, file_path):
-    with open(file_path, "rb") as file:
-        response = requests.put(
-            signed_url, data=file, headers={"Content-Type": "image/png"}
+# The signed URL without its signature
+def get_url_destination(signed_url: str) -> str:
+    parts = urlsplit(signed_url)
+
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+# Time the signed URL expires at. Supports S3 and GCS signatures. Returns 0
+# when the expiry is unknown, so the URL is not reused
+def get_url_expiry(signed_url: str) -> float:
+    query = {key.lower(): value for key, value in parse_qsl(urlsplit(signed_url).query)}
+
+    try:
+        for prefix in ["x-amz", "x-goog"]:
+            if f"{prefix}-date" in query and f"{prefix}-expires" in query:
+                signed_at = time.strptime(query[f"{prefix}-date"], "%Y%m%dT%H%M%SZ")
+
+                return calendar.timegm(signed_at) + int(query[f"{prefix}-expires"])
+
+        if "expires" in query:
+            return int(query["expires"])
+
+    except ValueError:
+        pass
+
+    return 0
+
+
+# Returns None when the URLs couldn't be fetched, so they are requested again
+# on the next capture
+def get_upload_urls(url, user_alias):
+    import requests
+
+    try:
+        response = send_with_access_token(
+            user_alias,
+            lambda user_token: HttpClient.get(
+                url=f"{url}/upload-assets/get-upload-urls",
+                headers={"Authorization": f"Bearer {user_token}"},
+            ),
         )
+
+        if response is None or response.status_code != 200:
+            print("Failed to get the upload URLs")
+            return None
+
+        return response.json()
+
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        print(f"Failed to get the upload URLs: {e}")
+        return None
+
+
+# Raises an exception if the upload failed. The progress callback gets the
+# bytes sent and the size of the data
+def upload_file(signed_url, data: bytes, on_progress=None):
+    response = HttpClient.put(
+        signed_url,
+        data=ProgressBody(data, on_progress) if on_progress else data,
+        headers={"Content-Type": "image/png"},
+        timeout=(CONNECT_TIMEOUT, TRANSFER_READ_TIMEOUT),
+    )
     print(f"Upload status: {response.status_code}")
 
+    response.raise_for_status()
 
-#
-def download_file(signed_url, save_path):
-    response = requests.get(signed_url)
-    if response.status_code == 200:
-        with open(save_path, "wb") as file:
-            file.write(response.content)
+
+# Runs on a worker thread. Failed downloads are retried on their own
+def download_file(signed_url, save_path, name: str = "") -> bool:
+    import requests
+
+    transfer_name = f"Downloading {name or os.path.basename(save_path)}"
+
+    try:
+        retry_transfer(
+            HttpClient.download,
+            signed_url,
+            save_path,
+            lambda written, size: TransferProgress.update(transfer_name, written, size),
+        )
         print(f"Downloaded to {save_path}")
-    else:
-        print(f"Download failed: {response.status_code}")
+        return True
+
+    except (requests.exceptions.RequestException, OSError) as e:
+        print(f"Download failed: {e}")
+        return False
+
+    finally:
+        TransferProgress.finish(transfer_name)
 
 
 # Returns True if an error occurs while attempting to render the image.
 def error_exists_in_capture_passes(scene) -> bool:
     # [workflow, condition for error message]
     workflow_checks = {
-        "APIKEY": bpy.context.preferences.addons.get("Playbook").preferences.api_key
-        == "",
+        "APIKEY": get_api_key() == "",
     }
 
     # [workflow, error message]
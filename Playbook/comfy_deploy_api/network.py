@@ -1,39 +1,41 @@
-import bpy
 import json
 import logging
-import os
 import traceback
-import requests
-import numpy as np
-from comfydeploy import ComfyDeploy
-from dotenv import load_dotenv
+import uuid
+from typing import TYPE_CHECKING
 from ..properties import (
     get_user_credits,
     set_user_credits,
     prompt_placeholders,
     model_render_stats,
 )
-from ..render_status import RenderStatus
+from ..render_status import failed_run_statuses
 from ..utilities.utilities import get_scale_resolution_width, get_api_key
 from ..workspace import open_render_window
-from ..utilities.network_utilities import get_user_info
-from ..utilities.secret_manager import BlenderSecretsManager
+from ..result_cache import get_result_key
+from ..utilities.network_utilities import get_user_info, send_with_access_token
+from ..utilities.config import Config
+from ..utilities.worker_pool import WorkerPool
+from .render_events import RenderEventChannel
+from .render_poller import RenderPoller
+from ..utilities.http_client import (
+    HttpClient,
+    CONNECT_TIMEOUT,
+    TRANSFER_READ_TIMEOUT,
+)
+
+if TYPE_CHECKING:
+    import requests
 
 workflow_dict = {"RETEXTURE": 0, "STYLETRANSFER": 1}
 base_model_dict = {"STABLE": 0, "FLUX": 1}
 style_dict = {"PHOTOREAL": 0, "3DCARTOON": 1, "ANIME": 2}
 
-result_counter = 0
-status_counter = 0
-
-RENDER_RESULT_CHECK_INTERVAL = 10
-RENDER_STATUS_CHECK_INTERVAL = 5
-RENDER_RESULT_ATTEMPT_LIMIT = 15
-RENDER_STATUS_ATTEMPT_LIMIT = 30
-
 
 #
 def machine_id_status(machine_id: str):
+    from comfydeploy import ComfyDeploy
+
     client = ComfyDeploy(bearer_auth="")
 
     client.machines.get_v1_machines_machine_id_(machine_id=machine_id)
@@ -99,8 +101,72 @@ class StyleTransferRenderSettings:
         self.style_transfer_strength = style_transfer_strength
 
 
-def np_clamp(n: int, smallest: float, largest: float) -> int:
-    return np.interp(n, [0, 100], [smallest, largest])
+# Multipart form body that streams the image bytes as file parts instead of
+# copying every image into a single buffer
+class MultipartBody:
+    def __init__(self, fields: dict, files: dict[str, bytes]):
+        self.boundary = uuid.uuid4().hex
+        self.parts: list = []
+
+        for name, value in fields.items():
+            self.parts.append(
+                self.create_part_header(name) + str(value).encode("utf-8") + b"\r\n"
+            )
+
+        for name, data in files.items():
+            self.parts.append(self.create_part_header(name, f"{name}.png", "image/png"))
+            self.parts.append(memoryview(data))
+            self.parts.append(b"\r\n")
+
+        self.parts.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+        self.length = sum(len(part) for part in self.parts)
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def create_part_header(
+        self, name: str, filename: str = "", content_type: str = ""
+    ) -> bytes:
+        disposition = f'form-data; name="{name}"'
+        if filename:
+            disposition += f'; filename="{filename}"'
+
+        header = f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n"
+        if content_type:
+            header += f"Content-Type: {content_type}\r\n"
+
+        return (header + "\r\n").encode("utf-8")
+
+    # A known length lets requests send a Content-Length instead of chunks
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self):
+        return iter(self.parts)
+
+
+# Size of the images when they were sent as base64 form fields, with the
+# style transfer images sent twice
+def get_base64_upload_size(files: dict[str, bytes], duplicated: bool) -> int:
+    size = sum(4 * ((len(data) + 2) // 3) for data in files.values())
+
+    return 2 * size if duplicated else size
+
+
+# Update the credits once the render is paid for. Runs on the main thread
+def on_user_info_received(future):
+    user_info = future.result()
+
+    if user_info is not None:
+        set_user_credits(user_info["credits"])
+
+
+# Map n from 0-100 onto smallest-largest. n outside 0-100 is clamped
+def np_clamp(n: int, smallest: float, largest: float) -> float:
+    n = min(max(n, 0), 100)
+
+    return smallest + (largest - smallest) * n / 100
 
 
 class ComfyDeployClient:
@@ -114,36 +180,39 @@ class ComfyDeployClient:
         self.user_alias: str = ""
         self.user_token: str = ""
         self.run_id: str = ""
+        self.base_model: str = ""
+        self.workflow_request: tuple = ()
 
-        # Determine the path to the .env file
-        env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
-
-        # Load the .env file
-        load_dotenv(dotenv_path=env_path)
+        # Called on the main thread with each status and the result of the run
+        self.on_status_changed = None
+        self.on_result = None
 
-        # Load env from secret manager
-        BlenderSecretsManager.load_to_env()
-        self.url = os.getenv("BASE_URL")
+        # The secrets are loaded into the config in the background
+        self.url = Config.get("BASE_URL")
 
     def send_authorized_request(
-        self, endpoint: str, data: any, files: any
-    ) -> requests.Response:
-        alias_url = os.getenv("ALIAS_URL")
-        self.user_alias = get_api_key()
-        jwt_request = requests.get(alias_url + self.user_alias)
+        self, endpoint: str, data: dict, files: dict[str, bytes]
+    ) -> "requests.Response":
+        import requests
+
+        body = MultipartBody(data, files)
+        print(f"Sending {len(body)} bytes to {endpoint}")
+
+        def send_request(user_token: str) -> "requests.Response":
+            self.user_token = user_token
+
+            return HttpClient.post(
+                self.url + endpoint,
+                data=body,
+                headers={
+                    "Authorization": f"Bearer {user_token}",
+                    "Content-Type": body.content_type,
+                },
+                timeout=(CONNECT_TIMEOUT, TRANSFER_READ_TIMEOUT),
+            )
 
         try:
-            if jwt_request is not None:
-                user_token = jwt_request.json()["access_token"]
-                self.user_token = user_token
-                render_result = requests.post(
-                    self.url + endpoint,
-                    data=data,
-                    files=files,
-                    headers={"Authorization": f"Bearer {user_token}"},
-                )
-
-                return render_result
+            return send_with_access_token(self.user_alias, send_request)
         except requests.exceptions.RequestException as e:
             logging.error(f"Alias request failed {e}")
         except KeyError:
@@ -184,23 +253,17 @@ class ComfyDeployClient:
         return 0
 
     # Noting - in web repo, retexture and style transfer settings are combined into single RenderSettings. Should match
-    async def run_workflow(
+    # Builds the request for the workflow on the main thread. Returns an error
+    # when the workflow can't be run
+    def prepare_workflow(
         self,
         global_settings: GlobalRenderSettings,
         retexture_settings: RetextureRenderSettings,
         style_transfer_settings: StyleTransferRenderSettings,
     ) -> str:
-        if not self.mask or not self.depth or not self.outline:
-            return "RENDER"
-
         try:
-            global result_counter, status_counter
-            result_counter = 0
-            status_counter = 0
-
-            pending_credits = calculate_pending_credits(global_settings.base_model)
-            if pending_credits == "CREDITS":
-                return "CREDITS"
+            self.user_alias = get_api_key()
+            self.base_model = global_settings.base_model
 
             # These are determined by UI selection:
             logging.info(f"Current workflow selection: {global_settings.workflow}")
@@ -292,14 +355,15 @@ class ComfyDeployClient:
                         ),
                         "preserves_textures_mask": retexture_settings.preserve_texture_mask,
                     }
-                    files = {
-                        "beauty": self.beauty.decode("utf-8"),
-                        "mask": self.mask.decode("utf-8"),
-                        "depth": self.depth.decode("utf-8"),
-                        "outline": self.outline.decode("utf-8"),
-                    }
-                    render_result = self.send_authorized_request(
-                        "/generative-retexture", render_input, files
+                    self.workflow_request = (
+                        "/generative-retexture",
+                        render_input,
+                        {
+                            "beauty": "beauty",
+                            "mask": "mask",
+                            "depth": "depth",
+                            "outline": "outline",
+                        },
                     )
 
                 # Style Transfer
@@ -317,33 +381,45 @@ class ComfyDeployClient:
                         "structure_strength_depth": clamped_style_transfer_depth,
                         "structure_strength_outline": clamped_style_transfer_outline,
                         "scene_prompt": style_transfer_settings.prompt,
-                        "beauty": self.beauty,
-                        "depth": self.depth,
-                        "outline": self.outline,
-                        "style_transfer_image": self.style_transfer,
-                    }
-                    files = {
-                        "beauty": self.beauty.decode("utf-8"),
-                        "depth": self.depth.decode("utf-8"),
-                        "outline": self.outline.decode("utf-8"),
-                        "style_transfer_image": self.style_transfer.decode("utf-8"),
                     }
-
-                    render_result = self.send_authorized_request(
-                        "/style-transfer", render_input, files
+                    self.workflow_request = (
+                        "/style-transfer",
+                        render_input,
+                        {
+                            "beauty": "beauty",
+                            "depth": "depth",
+                            "outline": "outline",
+                            "style_transfer_image": "style_transfer",
+                        },
                     )
 
                 # Workflow does not exist
                 case _:
                     logging.error("Workflow input not valid")
+                    return "RENDER"
 
-            self.run_id = render_result.json()["run_id"]
-            print(f"Current run id is {self.run_id}")
+        except Exception as e:
+            print(f"Error occurred while running workflow: {e}")
+            traceback.print_exc()
+            return "RENDER"
+
+    # Sends the prepared request. Runs on a worker thread once the images are
+    # saved, so it must not touch Blender data
+    def send_workflow(self):
+        endpoint, render_input, _ = self.workflow_request
+
+        files = self.get_workflow_files()
+        if not all(files.values()):
+            return "RENDER"
 
-            bpy.app.timers.register(
-                self.call_for_render_result, first_interval=RENDER_RESULT_CHECK_INTERVAL
+        try:
+            print(
+                f"Uploading {sum(len(data) for data in files.values())} image bytes, "
+                f"{get_base64_upload_size(files, endpoint == '/style-transfer')} "
+                "bytes as base64 form fields"
             )
-            bpy.app.timers.register(self.call_for_render_status, first_interval=0)
+
+            render_result = self.send_authorized_request(endpoint, render_input, files)
 
             return render_result.json()
 
@@ -352,6 +428,88 @@ class ComfyDeployClient:
             traceback.print_exc()
             return "RENDER"
 
+    # Images sent with the prepared request for each form field
+    def get_workflow_files(self) -> dict[str, bytes]:
+        file_images = self.workflow_request[2]
+
+        return {field: getattr(self, image) for field, image in file_images.items()}
+
+    # Identifies the result of the prepared request with the saved images.
+    # Results are not shared between accounts
+    def get_workflow_key(self) -> str:
+        endpoint, render_input, _ = self.workflow_request
+
+        return get_result_key(
+            self.user_alias, endpoint, render_input, self.get_workflow_files()
+        )
+
+    # Spend the credits of the run before it's sent. Returns "CREDITS" when
+    # there are not enough. Runs on the main thread
+    def reserve_credits(self) -> str:
+        return calculate_pending_credits(self.base_model)
+
+    # Start following the run once the workflow was sent. Progress is pushed
+    # over the render event socket when it connects. Runs on the main thread
+    def start_render_polling(self, response: dict):
+        self.run_id = response["run_id"]
+        print(f"Current run id is {self.run_id}")
+
+        WorkerPool.submit(
+            RenderEventChannel.connect, callback=self.on_render_events_connected
+        )
+
+    #
+    def on_render_events_connected(self, future):
+        if future.result():
+            RenderEventChannel.subscribe(
+                self.run_id, self.on_render_event, self.start_fallback_polling
+            )
+        else:
+            self.start_fallback_polling()
+
+    # Poll for the status and result when the socket can't be used
+    def start_fallback_polling(self):
+        RenderPoller.add_run(self.run_id, self.on_render_event)
+
+    # Status or result pushed for the run
+    def on_render_event(self, event: str, data: dict):
+        if event == "status":
+            # A failed run won't send a result
+            if data["status"] in failed_run_statuses:
+                RenderEventChannel.unsubscribe(self.run_id)
+
+            self.handle_render_status(data["status"])
+        elif event == "result":
+            RenderEventChannel.unsubscribe(self.run_id)
+            self.handle_render_result(data["url"])
+
+    # Returns True once the run succeeded. The status belongs to the job of
+    # this client, other jobs may still be running
+    def handle_render_status(self, status: str) -> bool:
+        print(f"Run {self.run_id} is {status}")
+
+        if self.on_status_changed:
+            self.on_status_changed(status)
+
+        if status == "success":
+            WorkerPool.submit(
+                get_user_info, get_api_key(), callback=on_user_info_received
+            )
+
+            return True
+
+        return False
+
+    #
+    def handle_render_result(self, rendered_image: str):
+        print(f"Image found!: {rendered_image}")
+
+        # The handler decides what happens with the result
+        if self.on_result:
+            self.on_result(rendered_image)
+        else:
+            open_render_window(rendered_image)
+
     #
     def save_image(self, image: bytes, pass_type: str):
         match pass_type:
@@ -367,87 +525,3 @@ class ComfyDeployClient:
                 self.normal = image
             case "style_transfer":
                 self.style_transfer = image
-
-    #
-    def get_render_result(self):
-        try:
-            if self.run_id is not None:
-                run_uri = (
-                    "https://dev-api.playbookengine.com"
-                    + "/render-result?run_id="
-                    + self.run_id
-                )
-                print(f"Current run is {run_uri}")
-                rendered_img = requests.get(run_uri)
-                return rendered_img
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Result request failed {e}")
-        except KeyError:
-            logging.error("run_id not found in response")
-        except json.decoder.JSONDecodeError as e:
-            logging.error(f"Invalid JSON response {e}")
-
-    #
-    def call_for_render_result(self):
-        print("starting to get render result")
-        global result_counter
-        result_counter += 1
-        result = self.get_render_result()
-
-        if result:
-            rendered_image = result.text
-
-            open_render_window(rendered_image)
-
-            print(f"Image found!: {rendered_image}")
-            return None
-
-        if result_counter == RENDER_RESULT_ATTEMPT_LIMIT:
-            return None
-
-        return RENDER_RESULT_CHECK_INTERVAL
-
-    #
-    def get_render_status(self):
-        try:
-            if self.run_id is not None:
-                run_uri = (
-                    "https://dev-api.playbookengine.com"
-                    + "/render-status?run_id="
-                    + self.run_id
-                )
-                render_result = requests.get(run_uri)
-                return render_result
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Result request failed {e}")
-        except KeyError:
-            logging.error("run_id not found in response")
-        except json.decoder.JSONDecodeError as e:
-            logging.error(f"Invalid JSON response {e}")
-
-    #
-    def call_for_render_status(self):
-        if not RenderStatus.is_rendering:
-            None
-
-        global status_counter
-        status_counter += 1
-        status = self.get_render_status()
-
-        if status:
-            RenderStatus.set_render_status(status.content.decode("utf-8"))
-
-            if status.content.decode("utf-8") == "success":
-                user_info = get_user_info(get_api_key())
-                set_user_credits(user_info["credits"])
-                RenderStatus.set_render_status("Ready")
-
-                return None
-
-        else:
-            RenderStatus.set_render_status("Not started")
-
-        if status_counter == RENDER_STATUS_ATTEMPT_LIMIT:
-            return None
-
-        return RENDER_STATUS_CHECK_INTERVAL
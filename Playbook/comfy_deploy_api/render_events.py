@@ -0,0 +1,204 @@
+import bpy
+import queue
+import threading
+import time
+from ..utilities.config import Config
+
+# Server pushing the status and result of runs
+DEFAULT_RENDER_EVENTS_URL = "https://dev-api.playbookengine.com"
+
+SOCKET_CONNECT_TIMEOUT = 5
+
+# Runs fall back to polling when the socket can't reconnect within this time
+SOCKET_RECONNECT_LIMIT = 15
+
+# Runs fall back to polling when the server doesn't acknowledge their
+# subscription within this time
+SUBSCRIBE_ACK_LIMIT = 3
+
+# Subscribed runs fall back to polling when no event arrives for them within
+# this time
+EVENT_SILENCE_LIMIT = 30
+
+EVENT_CHECK_INTERVAL = 0.1
+
+
+# A run followed over the socket
+class Subscription:
+    def __init__(self, on_event, on_fallback):
+        self.on_event = on_event
+        self.on_fallback = on_fallback
+        self.last_event_at = time.time()
+        self.is_acknowledged = False
+
+    # The run has to be polled instead
+    def is_silent(self) -> bool:
+        limit = EVENT_SILENCE_LIMIT if self.is_acknowledged else SUBSCRIBE_ACK_LIMIT
+
+        return time.time() - self.last_event_at > limit
+
+
+# Push channel for render progress. The server acknowledges 'subscribe' and
+# emits 'render-status' with {run_id, status} and 'render-result' with
+# {run_id, url} to the clients subscribed to the run. Socket.IO calls the
+# handlers on its own threads, so events are queued and handled on the main
+# thread by a timer
+class RenderEventChannel:
+    client = None
+    lock = threading.Lock()
+    events: queue.SimpleQueue = queue.SimpleQueue()
+
+    # Subscription of each run, by run_id
+    subscriptions: dict[str, Subscription] = {}
+
+    # Time the socket lost its connection, 0 while connected
+    disconnected_at = 0.0
+
+    # Connect the socket if it isn't connected. Returns False when the socket
+    # can't be used, so the caller can poll instead. A client that lost its
+    # connection keeps reconnecting on its own and is reused. Blocks while
+    # connecting, so it is run on a worker thread
+    @classmethod
+    def connect(cls) -> bool:
+        with cls.lock:
+            if cls.client is not None:
+                return True
+
+            try:
+                import socketio
+            except ImportError:
+                print("python-socketio is not installed, polling for results")
+                return False
+
+            client = socketio.Client(reconnection=True, reconnection_delay=1)
+            client.on("connect", cls.on_connect)
+            client.on("disconnect", cls.on_disconnect)
+            client.on("render-status", cls.on_render_status)
+            client.on("render-result", cls.on_render_result)
+
+            try:
+                client.connect(
+                    Config.get("RENDER_EVENTS_URL", DEFAULT_RENDER_EVENTS_URL),
+                    wait_timeout=SOCKET_CONNECT_TIMEOUT,
+                )
+            except Exception as e:
+                print(f"Render event socket failed to connect: {e}")
+                return False
+
+            cls.client = client
+            cls.disconnected_at = 0.0
+
+            return True
+
+    # Called on the main thread. The event handler is called with the event
+    # name and data, the fallback when the socket stops working
+    @classmethod
+    def subscribe(cls, run_id: str, on_event, on_fallback):
+        cls.subscriptions[run_id] = Subscription(on_event, on_fallback)
+        cls.emit_subscription(run_id)
+
+        if not bpy.app.timers.is_registered(process_render_events):
+            bpy.app.timers.register(process_render_events, first_interval=0)
+
+    #
+    @classmethod
+    def unsubscribe(cls, run_id: str):
+        if cls.subscriptions.pop(run_id, None) is None or cls.client is None:
+            return
+
+        try:
+            cls.client.emit("unsubscribe", {"run_id": run_id})
+        except Exception as e:
+            print(f"Failed to unsubscribe from run {run_id}: {e}")
+
+    #
+    @classmethod
+    def emit_subscription(cls, run_id: str):
+        try:
+            cls.client.emit(
+                "subscribe",
+                {"run_id": run_id},
+                callback=lambda *args: cls.events.put(
+                    ("subscribed", {"run_id": run_id})
+                ),
+            )
+        except Exception as e:
+            print(f"Failed to subscribe to run {run_id}: {e}")
+
+    # Subscriptions are lost on reconnect
+    @classmethod
+    def on_connect(cls):
+        cls.disconnected_at = 0.0
+
+        for run_id in list(cls.subscriptions):
+            cls.emit_subscription(run_id)
+
+    @classmethod
+    def on_disconnect(cls, *args):
+        cls.disconnected_at = time.time()
+
+    @classmethod
+    def on_render_status(cls, data):
+        cls.events.put(("status", data))
+
+    @classmethod
+    def on_render_result(cls, data):
+        cls.events.put(("result", data))
+
+    #
+    @classmethod
+    def disconnect(cls):
+        with cls.lock:
+            if cls.client is not None:
+                cls.client.disconnect()
+                cls.client = None
+
+        cls.subscriptions.clear()
+
+
+# Hand the queued events to the subscribed runs
+def process_render_events():
+    channel = RenderEventChannel
+
+    while True:
+        try:
+            event, data = channel.events.get_nowait()
+        except queue.Empty:
+            break
+
+        subscription = channel.subscriptions.get(data.get("run_id"))
+        if not subscription:
+            continue
+
+        subscription.last_event_at = time.time()
+        subscription.is_acknowledged = True
+
+        if event != "subscribed":
+            subscription.on_event(event, data)
+
+    # The socket did not come back, poll for the remaining runs
+    if (
+        channel.disconnected_at
+        and time.time() - channel.disconnected_at > SOCKET_RECONNECT_LIMIT
+    ):
+        subscriptions = list(channel.subscriptions.values())
+        channel.disconnect()
+
+        for subscription in subscriptions:
+            subscription.on_fallback()
+
+    # The server is not sending events for these runs, poll for them instead
+    for run_id, subscription in list(channel.subscriptions.items()):
+        if subscription.is_silent():
+            print(f"No render events for run {run_id}, polling instead")
+            channel.unsubscribe(run_id)
+            subscription.on_fallback()
+
+    return EVENT_CHECK_INTERVAL if channel.subscriptions else None
+
+
+def unregister():
+    if bpy.app.timers.is_registered(process_render_events):
+        bpy.app.timers.unregister(process_render_events)
+
+    RenderEventChannel.disconnect()
@@ -0,0 +1,217 @@
+import bpy
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ..render_status import failed_run_statuses
+from ..utilities.http_client import HttpClient
+
+RENDER_API_URL = "https://dev-api.playbookengine.com"
+
+# Seconds between checks of a run for each status. Runs that are running are
+# checked often, queued runs rarely
+status_poll_intervals = {
+    "not-started": 10,
+    "queued": 10,
+    "started": 2,
+    "running": 2,
+    "success": 0,
+}
+DEFAULT_POLL_INTERVAL = 5
+
+# Failed checks back off up to this interval
+MAX_POLL_INTERVAL = 30
+
+# Runs are dropped when they take longer than this many seconds
+RUN_POLL_LIMIT = 30 * 60
+
+# Status checks run on their own threads, so long uploads and downloads on
+# the worker pool don't hold them up
+POLL_WORKER_COUNT = 2
+
+SCHEDULER_TICK = 0.25
+UPDATE_CHECK_INTERVAL = 0.1
+
+
+# State of a run that is being polled. Only used by the poll threads
+class PolledRun:
+    def __init__(self, run_id: str, on_event):
+        self.run_id = run_id
+        self.on_event = on_event
+        self.status = ""
+        self.interval = 0
+        self.next_poll = time.time()
+        self.started_at = time.time()
+        self.is_polling = False
+
+
+# Polls every in-flight run from one background scheduler. Each tick makes at
+# most one request per due run: the status until the run succeeded, then the
+# result. Changes are handed to the main thread through a single timer
+class RenderPoller:
+    runs: dict[str, PolledRun] = {}
+    lock = threading.Lock()
+    updates: queue.SimpleQueue = queue.SimpleQueue()
+    scheduler: threading.Thread = None
+    executor: ThreadPoolExecutor = None
+    stop_event = threading.Event()
+
+    # Called on the main thread. The event handler is called on the main
+    # thread with 'status' or 'result' and the event data
+    @classmethod
+    def add_run(cls, run_id: str, on_event):
+        with cls.lock:
+            cls.runs[run_id] = PolledRun(run_id, on_event)
+
+        if cls.executor is None:
+            cls.executor = ThreadPoolExecutor(
+                max_workers=POLL_WORKER_COUNT, thread_name_prefix="PlaybookPoll"
+            )
+
+        if cls.scheduler is None or not cls.scheduler.is_alive():
+            cls.stop_event.clear()
+            cls.scheduler = threading.Thread(
+                target=run_scheduler, name="PlaybookPoller", daemon=True
+            )
+            cls.scheduler.start()
+
+        if not bpy.app.timers.is_registered(deliver_render_updates):
+            bpy.app.timers.register(deliver_render_updates, first_interval=0)
+
+    #
+    @classmethod
+    def remove_run(cls, run_id: str):
+        with cls.lock:
+            cls.runs.pop(run_id, None)
+
+    #
+    @classmethod
+    def stop(cls):
+        cls.stop_event.set()
+
+        with cls.lock:
+            cls.runs.clear()
+
+        if cls.executor is not None:
+            cls.executor.shutdown(wait=False, cancel_futures=True)
+            cls.executor = None
+
+
+# Hand the due runs to the poll threads until every run is finished
+def run_scheduler():
+    poller = RenderPoller
+
+    while not poller.stop_event.is_set():
+        now = time.time()
+
+        with poller.lock:
+            if not poller.runs:
+                poller.scheduler = None
+                return
+
+            due_runs = [
+                run
+                for run in poller.runs.values()
+                if not run.is_polling and run.next_poll <= now
+            ]
+
+            for run in due_runs:
+                run.is_polling = True
+
+        for run in due_runs:
+            poller.executor.submit(poll_run, run)
+
+        poller.stop_event.wait(SCHEDULER_TICK)
+
+
+# Runs on a poll thread
+def poll_run(run: PolledRun):
+    import requests
+
+    try:
+        if time.time() - run.started_at > RUN_POLL_LIMIT:
+            print(f"Stopped checking on run {run.run_id}")
+            RenderPoller.remove_run(run.run_id)
+            RenderPoller.updates.put(
+                (run, "status", {"run_id": run.run_id, "status": "timeout"})
+            )
+            return
+
+        if run.status == "success":
+            poll_run_result(run)
+        else:
+            poll_run_status(run)
+
+    except requests.exceptions.RequestException as e:
+        print(f"Checking on run {run.run_id} failed: {e}")
+        back_off(run)
+
+    finally:
+        run.next_poll = time.time() + run.interval
+        run.is_polling = False
+
+
+#
+def poll_run_status(run: PolledRun):
+    response = HttpClient.get(f"{RENDER_API_URL}/render-status?run_id={run.run_id}")
+    status = response.content.decode("utf-8") if response.ok else "not-started"
+
+    if status != run.status:
+        run.status = status
+        RenderPoller.updates.put(
+            (run, "status", {"run_id": run.run_id, "status": status})
+        )
+
+    # The run won't change anymore
+    if status in failed_run_statuses:
+        RenderPoller.remove_run(run.run_id)
+
+    run.interval = status_poll_intervals.get(status, DEFAULT_POLL_INTERVAL)
+
+
+#
+def poll_run_result(run: PolledRun):
+    response = HttpClient.get(f"{RENDER_API_URL}/render-result?run_id={run.run_id}")
+
+    if not response.ok:
+        back_off(run)
+        return
+
+    RenderPoller.remove_run(run.run_id)
+    RenderPoller.updates.put(
+        (run, "result", {"run_id": run.run_id, "url": response.text})
+    )
+
+
+#
+def back_off(run: PolledRun):
+    run.interval = min(MAX_POLL_INTERVAL, max(1, run.interval * 2))
+
+
+# Hand the changes of the polled runs to their handlers on the main thread
+def deliver_render_updates():
+    while True:
+        try:
+            run, event, data = RenderPoller.updates.get_nowait()
+        except queue.Empty:
+            break
+
+        try:
+            run.on_event(event, data)
+        except Exception as e:
+            print(f"Error occurred while handling run {run.run_id}: {e}")
+
+    with RenderPoller.lock:
+        is_polling = bool(RenderPoller.runs)
+
+    if is_polling or not RenderPoller.updates.empty():
+        return UPDATE_CHECK_INTERVAL
+
+    return None
+
+
+def unregister():
+    if bpy.app.timers.is_registered(deliver_render_updates):
+        bpy.app.timers.unregister(deliver_render_updates)
+
+    RenderPoller.stop()
@@ -1,7 +1,9 @@
 class ObjectProperties:
     visible_shadow: bool
     pass_index: int
+    color: tuple
 
-    def __init__(self, visible_shadow, pass_index):
+    def __init__(self, visible_shadow, pass_index, color):
         self.visible_shadow = visible_shadow
         self.pass_index = pass_index
+        self.color = color
@@ -1,4 +1,6 @@
-from .objects import visible_objects, hidden_objects
+import bpy
+from bpy.app.handlers import persistent
+from .objects import visible_objects, hidden_objects, mask_objects
 
 allowed_obj_types = ["MESH", "FONT", "META", "SURFACE"]
 
@@ -27,3 +29,122 @@ def reset_visible_objects():
 
     for obj in hidden_objects:
         obj.hide_render = False
+
+
+# Same objects as set_visible_objects, without hiding any from the render
+def is_visible_object(obj) -> bool:
+    return not obj.hide_render and obj.type in allowed_obj_types and not obj.hide_get()
+
+
+# Names of the visible objects in the scene, so the UI doesn't go through
+# every object on each redraw. Object updates are applied one by one. Scene
+# and collection updates, which add, remove or hide objects, rebuild the
+# index the next time it is used
+class VisibleObjectIndex:
+    names: dict[int, str] = {}
+    scene_pointer = 0
+    is_stale = True
+
+    # Changes whenever the visible objects change
+    version = 0
+
+    @classmethod
+    def get_names(cls, scene):
+        if cls.is_stale or cls.scene_pointer != scene.as_pointer():
+            cls.rebuild(scene)
+
+        return cls.names.values()
+
+    @classmethod
+    def rebuild(cls, scene):
+        names = {
+            obj.as_pointer(): obj.name
+            for obj in scene.objects
+            if is_visible_object(obj)
+        }
+
+        if names != cls.names:
+            cls.names = names
+            cls.version += 1
+
+        cls.scene_pointer = scene.as_pointer()
+        cls.is_stale = False
+
+    @classmethod
+    def update_object(cls, obj):
+        if cls.is_stale:
+            return
+
+        pointer = obj.as_pointer()
+        name = obj.name if is_visible_object(obj) else None
+
+        if cls.names.get(pointer) == name:
+            return
+
+        if name is None:
+            cls.names.pop(pointer)
+        else:
+            cls.names[pointer] = name
+
+        cls.version += 1
+
+    @classmethod
+    def invalidate(cls):
+        cls.is_stale = True
+
+
+# Items of the object dropdown. Rebuilt only when the visible objects or the
+# objects in masks changed. Blender also needs the item strings to stay
+# referenced while the dropdown is shown
+class ObjectDropdownItems:
+    items: list[tuple] = []
+    key: tuple = None
+
+    @classmethod
+    def get(cls, scene) -> list[tuple]:
+        names = VisibleObjectIndex.get_names(scene)
+        masked_objects = tuple(tuple(obj_list) for obj_list in mask_objects.values())
+        key = (VisibleObjectIndex.version, masked_objects)
+
+        if key != cls.key:
+            cls.items = create_object_dropdown_items(names, masked_objects)
+            cls.key = key
+
+        return cls.items
+
+
+# Objects not part of a mask, with the None, Background and Add All options
+def create_object_dropdown_items(names, masked_objects) -> list[tuple]:
+    masked_names = {name for obj_list in masked_objects for name in obj_list}
+
+    items = [("NONE", "Select an object from the scene", "")]
+    object_items = [(name, name, "") for name in names if name not in masked_names]
+
+    # Background not part of any mask
+    if "Background" not in masked_names:
+        items.append(("BACKGROUND", "Background", ""))
+
+    # At least one object can be added
+    if object_items:
+        items.append(("ADDALL", "Add All", ""))
+
+    return items + object_items
+
+
+# Keep the index up to date with the changes in the scene
+@persistent
+def update_visible_object_index_handler(scene, depsgraph):
+    for update in depsgraph.updates:
+        id_data = update.id
+
+        if isinstance(id_data, bpy.types.Object):
+            VisibleObjectIndex.update_object(id_data.original)
+
+        elif isinstance(id_data, (bpy.types.Scene, bpy.types.Collection)):
+            VisibleObjectIndex.invalidate()
+
+
+# A different file was opened
+@persistent
+def reset_visible_object_index_handler(dummy):
+    VisibleObjectIndex.invalidate()
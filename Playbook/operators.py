@@ -1,7 +1,13 @@
 import bpy
 import webbrowser
 from .objects.objects import mask_objects
+from .objects.visible_objects import (
+    update_visible_object_index_handler,
+    reset_visible_object_index_handler,
+)
 from .capture_passes import capture_passes
+from .render_queue import RenderQueue
+from .ui.panels.queue_panels import draw_queue_layout
 from bpy.props import StringProperty
 from bpy.types import Operator
 from bpy.utils import register_class, unregister_class
@@ -62,7 +68,24 @@ class QueueOperator(Operator):
     bl_label = "Open Queue"
     bl_description = "Open queue"
 
+    def invoke(self, context, event):
+        return context.window_manager.invoke_popup(self, width=350)
+
+    def draw(self, context):
+        draw_queue_layout(context.scene, self.layout.box())
+
+    def execute(self, context):
+        return {"FINISHED"}
+
+
+# Remove the finished and failed renders from the queue
+class ClearFinishedRendersOperator(Operator):
+    bl_idname = "op.clear_finished_renders"
+    bl_label = "Clear Finished"
+    bl_description = "Remove the finished renders from the queue"
+
     def execute(self, context):
+        RenderQueue.clear_finished_jobs()
         return {"FINISHED"}
 
 
@@ -148,6 +171,7 @@ classes = [
     RandomizePromptOperator,
     RandomizeMaskPromptOperator,
     QueueOperator,
+    ClearFinishedRendersOperator,
     CapturePassesOperator,
     PlaybookWebsiteOperator,
     PlaybookDiscordOperator,
@@ -245,6 +269,8 @@ def register():
 
     bpy.app.handlers.depsgraph_update_post.append(update_object_dropdown_handler)
     bpy.app.handlers.depsgraph_update_post.append(check_for_deleted_objects_handler)
+    bpy.app.handlers.depsgraph_update_post.append(update_visible_object_index_handler)
+    bpy.app.handlers.load_post.append(reset_visible_object_index_handler)
     bpy.app.timers.register(update_object_dropdown, first_interval=1)
     bpy.app.timers.register(on_register, first_interval=0.1)
 
@@ -256,3 +282,5 @@ def unregister():
 
     bpy.app.handlers.depsgraph_update_post.remove(update_object_dropdown_handler)
     bpy.app.handlers.depsgraph_update_post.remove(check_for_deleted_objects_handler)
+    bpy.app.handlers.depsgraph_update_post.remove(update_visible_object_index_handler)
+    bpy.app.handlers.load_post.remove(reset_visible_object_index_handler)
@@ -4,6 +4,8 @@ from bpy.props import StringProperty
 from bpy.utils import register_class, unregister_class
 from .properties import prompt_placeholders
 from .version_control import PlaybookVersionControl
+from .utilities.secret_manager import BlenderSecretsManager
+from .startup import start_configuration_loading
 
 
 class DocumentationOperator(Operator):
@@ -59,7 +61,26 @@ class ResetAddonOperator(Operator):
         return {"FINISHED"}
 
 
-classes = [DocumentationOperator, UpdateAddonOperator, ResetAddonOperator]
+# Drop the cached configuration and fetch it again in the background
+class RefreshSecretsOperator(Operator):
+    bl_idname = "op.refresh_secrets"
+    bl_label = "Refresh Configuration"
+    bl_description = (
+        "Fetch the Playbook configuration again instead of using the cached one"
+    )
+
+    def execute(self, context):
+        BlenderSecretsManager.invalidate()
+        start_configuration_loading()
+        return {"FINISHED"}
+
+
+classes = [
+    DocumentationOperator,
+    UpdateAddonOperator,
+    ResetAddonOperator,
+    RefreshSecretsOperator,
+]
 
 
 def register():
@@ -11,8 +11,7 @@ from bpy.props import (
 )
 from bpy.types import Scene, PropertyGroup, Image
 from bpy.utils import register_class, unregister_class
-from .objects.visible_objects import set_visible_objects
-from .objects.objects import visible_objects, mask_objects
+from .objects.visible_objects import ObjectDropdownItems
 from .ui.lists import MaskObjectListItem
 from .ui.icons import get_style_icon
 
@@ -81,6 +80,38 @@ angle_options = [
 # Available upscale options
 upscale_options = [("1", "1x", ""), ("2", "2x", ""), ("4", "4x", "")]
 
+# How the render passes are captured
+capture_modes = [
+    (
+        "SINGLE",
+        "Single Render",
+        "Render the scene once and build every pass from the same render",
+    ),
+    ("SEPARATE", "Separate Renders", "Render every pass on its own"),
+]
+
+# Resolution of the mask and outline passes compared to the other passes
+structure_downscales = [
+    ("1", "Full", "Render the mask and outline at the same resolution"),
+    ("2", "Half", "Render the mask and outline at half the resolution"),
+    ("4", "Quarter", "Render the mask and outline at a quarter of the resolution"),
+]
+
+# Render engines the mask pass can be rendered with
+mask_backends = [
+    (
+        "WORKBENCH",
+        "Workbench",
+        "Flat object colors. Falls back to Cycles for a preserved texture mask",
+    ),
+    ("CYCLES", "Cycles", "Cycles object index pass"),
+]
+
+outline_bit_depths = [
+    ("8", "8-bit", "Write the outline as an 8-bit grayscale image"),
+    ("1", "1-bit", "Write the outline as a 1-bit black and white image"),
+]
+
 model_render_stats = {
     "STABLE": {"Height": 768, "Time": "15s - 30s", "Cost": 10},
     "FLUX": {"Height": 768, "Time": "45s - 1m", "Cost": 30},
@@ -202,28 +233,7 @@ class MaskProperties(PropertyGroup):
 
     # Return a list of the available objects in the scene
     def update_object_dropdown(self, context):
-        set_visible_objects(context)
-        items = [(obj.name, obj.name, "") for obj in visible_objects]
-
-        # None option
-        items.insert(0, ("NONE", "Select an object from the scene", ""))
-
-        # Objects currently in masks
-        object_names = [tup for obj_list in mask_objects.values() for tup in obj_list]
-
-        items = [item for item in items if item[0] not in object_names]
-
-        # More than one option available
-        if len(items) > 1:
-            # Add all option
-            items.insert(1, ("ADDALL", "Add All", ""))
-
-        # Background not part of any mask
-        if "Background" not in object_names:
-            # Background option
-            items.insert(1, ("BACKGROUND", "Background", ""))
-
-        return items
+        return ObjectDropdownItems.get(context.scene)
 
     def get_prompt_styles(self, context):
         enum_items = []
@@ -335,6 +345,77 @@ class UpscaleProperties(PropertyGroup):
     upscale_prompt: StringProperty(name="", default="Describe the prompt...")
 
 
+# Settings of how the render passes are captured
+class CaptureProperties(PropertyGroup):
+    capture_mode: EnumProperty(name="", items=capture_modes, default="SINGLE")
+    render_at_model_resolution: BoolProperty(
+        name="Render at Model Resolution",
+        description="Render the passes at the resolution the base model generates at",
+        default=True,
+    )
+    structure_downscale: EnumProperty(name="Mask & Outline", items=structure_downscales)
+    mask_backend: EnumProperty(name="Mask Engine", items=mask_backends)
+    outline_threshold: FloatProperty(name="Threshold", default=0.999, min=0)
+    outline_depth_weight: FloatProperty(name="Depth Weight", default=1, min=0)
+    outline_normal_weight: FloatProperty(name="Normal Weight", default=1, min=0)
+    outline_position_weight: FloatProperty(name="Position Weight", default=1, min=0)
+    outline_bit_depth: EnumProperty(name="", items=outline_bit_depths)
+    write_pass_files: BoolProperty(
+        name="Write Pass Files",
+        description="Also save the passes to the renders folder for debugging",
+        default=False,
+    )
+
+
+# Prompt, style and strength of one render in a batch
+class BatchVariantProperties(PropertyGroup):
+    def get_prompt_styles(self, context):
+        model = context.scene.global_properties.global_model
+
+        return [
+            (id, name, desc)
+            for id, name, desc, icon in prompt_styles
+            if id in styles_in_model[model]
+        ]
+
+    prompt: StringProperty(name="", default=prompt_placeholders["Retexture"])
+    style: EnumProperty(name="", items=get_prompt_styles)
+    strength: FloatProperty(name="", default=50, min=0, max=100)
+
+
+# Settings of the local render queue
+class QueueProperties(PropertyGroup):
+    max_concurrent_jobs: IntProperty(
+        name="Concurrent Renders",
+        description="Number of queued renders that upload and run at the same time",
+        default=2,
+        min=1,
+        max=8,
+    )
+    new_seed: BoolProperty(
+        name="New Seed",
+        description="Render again even when an identical render is in the result cache",
+        default=False,
+    )
+    batch_variants: CollectionProperty(type=BatchVariantProperties)
+    batch_variant_index: IntProperty(name="", default=0)
+    sweep_strength_min: FloatProperty(name="From", default=25, min=0, max=100)
+    sweep_strength_max: FloatProperty(name="To", default=75, min=0, max=100)
+    sweep_strength_steps: IntProperty(name="Steps", default=3, min=1, max=8)
+    sweep_styles: EnumProperty(
+        name="Styles",
+        items=[(id, name, desc) for id, name, desc, icon in prompt_styles],
+        options={"ENUM_FLAG"},
+        default={"PHOTOREAL"},
+    )
+    sweep_models: EnumProperty(
+        name="Models",
+        items=list(base_models.values()),
+        options={"ENUM_FLAG"},
+        default={"STABLE"},
+    )
+
+
 # Flags to keep track if the properties were modified
 class FlagProperties(PropertyGroup):
     retexture_flag: BoolProperty(name="", default=False)
@@ -354,6 +435,16 @@ def get_user_credits() -> int:
     return -2
 
 
+# Show the email and credits of the user. Nothing changes without user info
+def set_user_info(user_info: dict) -> None:
+    if user_info is None:
+        return
+
+    user_props = bpy.context.scene.user_properties
+    user_props.user_email = user_info["email"]
+    user_props.user_credits = user_info["credits"]
+
+
 #
 def set_user_credits(credits: int) -> None:
     user_props = bpy.context.scene.user_properties
@@ -394,6 +485,9 @@ classes = [
     StyleProperties,
     RelightProperties,
     UpscaleProperties,
+    CaptureProperties,
+    BatchVariantProperties,
+    QueueProperties,
     FlagProperties,
 ]
 
@@ -408,6 +502,8 @@ def register():
     Scene.style_properties = PointerProperty(type=StyleProperties)
     Scene.relight_properties = PointerProperty(type=RelightProperties)
     Scene.upscale_properties = PointerProperty(type=UpscaleProperties)
+    Scene.capture_properties = PointerProperty(type=CaptureProperties)
+    Scene.queue_properties = PointerProperty(type=QueueProperties)
     Scene.flag_properties = PointerProperty(type=FlagProperties)
     Scene.error_message = StringProperty(default="")
     Scene.show_retexture_panel = BoolProperty(default=True)
@@ -433,6 +529,8 @@ def unregister():
     del Scene.style_properties
     del Scene.relight_properties
     del Scene.upscale_properties
+    del Scene.capture_properties
+    del Scene.queue_properties
     del Scene.flag_properties
     del Scene.error_message
     del Scene.show_retexture_panel
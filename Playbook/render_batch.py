@@ -0,0 +1,283 @@
+import bpy
+import os
+import tempfile
+import numpy as np
+from bpy.types import Operator
+from bpy.utils import register_class, unregister_class
+from .render_passes.render_passes import render_passes, error_exists_in_render_passes
+from .render_passes.pass_images import pass_images
+from .comfy_deploy_api.network import ComfyDeployClient
+from .render_image import (
+    get_global_settings,
+    get_retexture_settings,
+    get_style_transfer_settings,
+    error_exists_in_render_image,
+)
+from .render_queue import RenderQueue, RenderJob, get_workflow_message
+from .render_status import RenderStatus
+from .startup import error_exists_in_configuration
+from .properties import models_in_workflow, styles_in_model
+from .utilities.image_utilities import (
+    read_image_pixels,
+    create_contact_sheet,
+    write_png,
+)
+from .utilities.utilities import get_filepath, create_render_filename
+from .utilities.worker_pool import WorkerPool
+from .workspace import show_render_file
+
+
+# Renders that share one capture. The passes are rendered and encoded once and
+# sent with each run, since the workflow endpoints take the images inline.
+# Each result is downloaded as soon as its run finishes and the results are
+# shown together once every run is done
+class RenderBatch:
+    def __init__(self, jobs: list[RenderJob], columns: int = 0):
+        self.jobs = jobs
+        self.columns = columns
+        self.results: dict[int, bytes] = {}
+        self.pending_jobs = len(jobs)
+
+        for job in jobs:
+            job.opens_render_window = False
+            job.on_finished = self.on_job_finished
+
+    # Jobs download their result on a worker as soon as their run finishes
+    def on_job_finished(self, job: RenderJob):
+        if job.status == "Done":
+            self.results[job.job_id] = job.result_image
+            job.result_image = b""
+
+        self.pending_jobs -= 1
+
+        if self.pending_jobs == 0 and self.results:
+            self.show_contact_sheet()
+
+    # Decoding has to happen on the main thread, writing the sheet doesn't.
+    # Failed renders keep their cell so the grid stays in order
+    def show_contact_sheet(self):
+        images = [
+            (
+                read_result_pixels(self.results[job.job_id])
+                if job.job_id in self.results
+                else None
+            )
+            for job in self.jobs
+        ]
+
+        sheet = create_contact_sheet(
+            images, self.columns, labels=[job.label for job in self.jobs]
+        )
+
+        sheet_filename = create_render_filename()
+        WorkerPool.submit(
+            write_png,
+            get_filepath(sheet_filename),
+            sheet,
+            callback=lambda future: show_render_file(sheet_filename),
+        )
+
+
+# Blender only decodes images from files. The result goes through a temporary
+# file that is removed once its pixels are read
+def read_result_pixels(result_image: bytes) -> np.ndarray:
+    file_descriptor, filepath = tempfile.mkstemp(suffix=".png")
+
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(result_image)
+
+        return read_image_pixels(filepath)
+    finally:
+        os.remove(filepath)
+
+
+#
+class RenderBatchOperator(Operator):
+    bl_idname = "op.render_batch"
+    bl_label = "Render Batch"
+    bl_description = "Render every variant from one capture of the passes"
+
+    @classmethod
+    def poll(cls, context):
+        return (
+            not RenderStatus.is_rendering
+            and len(context.scene.queue_properties.batch_variants) > 0
+        )
+
+    def execute(self, context):
+        render_batch(
+            [
+                (variant.prompt, variant.style, variant.strength)
+                for variant in context.scene.queue_properties.batch_variants
+            ]
+        )
+        return {"FINISHED"}
+
+
+#
+class RenderSweepOperator(Operator):
+    bl_idname = "op.render_sweep"
+    bl_label = "Render Sweep"
+    bl_description = (
+        "Render every combination of strength, style and model from one capture "
+        "of the passes"
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return not RenderStatus.is_rendering and bool(get_sweep_columns(context.scene))
+
+    def execute(self, context):
+        scene = context.scene
+        columns = get_sweep_columns(scene)
+
+        # One row for each strength and one column for each model and style
+        variants = [
+            (scene.retexture_properties.retexture_prompt, style, strength, model)
+            for strength in get_sweep_strengths(scene)
+            for model, style in columns
+        ]
+
+        render_batch(variants, len(columns))
+        return {"FINISHED"}
+
+
+# Variants are (prompt, style, strength, base model) with an empty base model
+# for the one selected in the scene
+def render_batch(variants: list[tuple], columns: int = 0):
+    scene = bpy.context.scene
+    scene.error_message = ""
+
+    RenderStatus.is_rendering = True
+
+    try:
+        if error_exists_in_render_passes():
+            return
+
+        if error_exists_in_render_image(scene):
+            return
+
+        if error_exists_in_configuration(scene):
+            return
+
+        # The passes are rendered and encoded once for every variant
+        if not render_passes():
+            return
+
+        batch_pass_images = dict(pass_images)
+
+        jobs = []
+        for variant in variants:
+            comfy = ComfyDeployClient()
+            workflow_message = prepare_variant_workflow(comfy, *variant)
+
+            if workflow_message:
+                scene.error_message = workflow_message
+                return
+
+            jobs.append(
+                RenderJob(
+                    comfy,
+                    batch_pass_images,
+                    scene.style_properties.style_image,
+                    get_variant_label(*variant),
+                    not scene.queue_properties.new_seed,
+                )
+            )
+
+        RenderBatch(jobs, columns)
+
+        for job in jobs:
+            RenderQueue.add_job(job)
+
+    except Exception as e:
+        print(f"Error occurred: {e}")
+        scene.error_message = "An error has occurred."
+
+    finally:
+        RenderStatus.is_rendering = False
+
+
+# The variant replaces the prompt, style, strength and model of the scene
+# settings
+def prepare_variant_workflow(
+    comfy_deploy: ComfyDeployClient,
+    prompt: str,
+    style: str,
+    strength: float,
+    base_model: str = "",
+) -> str:
+    global_settings = get_global_settings()
+    global_settings.style = style
+    global_settings.base_model = base_model or global_settings.base_model
+
+    retexture_settings = get_retexture_settings()
+    retexture_settings.prompt = prompt
+    retexture_settings.structure_strength = strength
+
+    style_settings = get_style_transfer_settings()
+    style_settings.style_transfer_strength = strength
+
+    response = comfy_deploy.prepare_workflow(
+        global_settings, retexture_settings, style_settings
+    )
+
+    return get_workflow_message(response)
+
+
+# Selected (model, style) pairs the workflow can render
+def get_sweep_columns(scene) -> list[tuple[str, str]]:
+    queue_props = scene.queue_properties
+    workflow = scene.global_properties.global_workflow
+
+    return [
+        (model, style)
+        for model in models_in_workflow[workflow]
+        if model in queue_props.sweep_models
+        for style in styles_in_model[model]
+        if style in queue_props.sweep_styles
+    ]
+
+
+#
+def get_sweep_strengths(scene) -> list[float]:
+    queue_props = scene.queue_properties
+    smallest = queue_props.sweep_strength_min
+    largest = queue_props.sweep_strength_max
+    steps = queue_props.sweep_strength_steps
+
+    if steps == 1:
+        return [round(smallest)]
+
+    return [
+        round(smallest + (largest - smallest) * step / (steps - 1))
+        for step in range(steps)
+    ]
+
+
+#
+def get_variant_label(
+    prompt: str, style: str, strength: float, base_model: str = ""
+) -> str:
+    if base_model:
+        return f"{base_model} {style} {strength:.0f}"
+
+    return f"{prompt} ({style}, {strength:.0f})"
+
+
+classes = [RenderBatchOperator, RenderSweepOperator]
+
+
+#
+def register():
+    global classes
+    for cls in classes:
+        register_class(cls)
+
+
+#
+def unregister():
+    global classes
+    for cls in classes:
+        unregister_class(cls)
@@ -1,10 +1,10 @@
-import asyncio
 import bpy
 import os
-import base64
 from bpy.types import Operator
 from bpy.utils import register_class, unregister_class
 from .render_passes.render_passes import render_passes, error_exists_in_render_passes
+from .render_passes import pass_cache
+from .render_passes.pass_images import pass_images
 from .objects.object_utilities import mask_hex_colors
 from .comfy_deploy_api.network import (
     GlobalRenderSettings,
@@ -15,10 +15,10 @@ from .comfy_deploy_api.network import (
 )
 from .render_status import RenderStatus
 from .utilities.utilities import get_api_key
-
-# VARIABLES
-api_url = os.getenv("API_URL")
-
+from .startup import error_exists_in_configuration
+from .render_queue import RenderQueue, RenderJob, get_workflow_message
+from .utilities import worker_pool, http_client
+from .comfy_deploy_api import render_events, render_poller
 
 # -------------------------------------------
 # RENDER TO API
@@ -36,26 +36,41 @@ class RenderImage:
 
         try:
             if error_exists_in_render_passes():
-                RenderStatus.is_rendering = False
                 return
 
             if error_exists_in_render_image(scene):
-                RenderStatus.is_rendering = False
                 return
 
-            render_passes()
+            if error_exists_in_configuration(scene):
+                return
+
+            if not render_passes():
+                return
 
             comfy = ComfyDeployClient()
-            set_comfy_images(comfy)
-            workflow_message = asyncio.run(run_comfy_workflow(comfy))
+            workflow_message = prepare_comfy_workflow(comfy)
 
             if workflow_message:
                 scene.error_message = workflow_message
-                RenderStatus.is_rendering = False
+                return
+
+            # The job keeps the passes of this capture, so the scene can be
+            # changed and rendered again while it uploads and runs
+            RenderQueue.add_job(
+                RenderJob(
+                    comfy,
+                    dict(pass_images),
+                    scene.style_properties.style_image,
+                    get_job_label(scene),
+                    not scene.queue_properties.new_seed,
+                )
+            )
 
         except Exception as e:
             print(f"Error occurred: {e}")
             scene.error_message = "An error has occurred."
+
+        finally:
             RenderStatus.is_rendering = False
 
 
@@ -116,58 +131,24 @@ def get_style_transfer_settings() -> StyleTransferRenderSettings:
 
 
 #
-def set_comfy_images(comfy_deploy: ComfyDeployClient):
-    dir = os.path.dirname(__file__)
-
-    beauty_path = os.path.join(dir, "renders", "beauty.png")
-    normal_path = os.path.join(dir, "renders", "normal.png")
-    mask_path = os.path.join(dir, "renders", "mask.png")
-    depth_path = os.path.join(dir, "renders", "depth.png")
-    outline_path = os.path.join(dir, "renders", "outline.png")
-
-    # Open the PNG files in binary mode
-    with open(beauty_path, "rb") as beauty_file:
-        beauty_blob = base64.b64encode(beauty_file.read())
-    with open(normal_path, "rb") as normal_file:
-        normal_blob = base64.b64encode(normal_file.read())
-    with open(mask_path, "rb") as mask_file:
-        mask_blob = base64.b64encode(mask_file.read())
-    with open(depth_path, "rb") as depth_file:
-        depth_blob = base64.b64encode(depth_file.read())
-    with open(outline_path, "rb") as outline_file:
-        outline_blob = base64.b64encode(outline_file.read())
-
-    comfy_deploy.save_image(beauty_blob, "beauty")
-    comfy_deploy.save_image(normal_blob, "normal")
-    comfy_deploy.save_image(mask_blob, "mask")
-    comfy_deploy.save_image(depth_blob, "depth")
-    comfy_deploy.save_image(outline_blob, "outline")
-
-    style_path = bpy.context.scene.style_properties.style_image
-    # Ensure the image is saved in a file or it's packed into the blend file
-    if style_path:
-        with open(style_path, "rb") as style_file:
-            style_blob = base64.b64encode(style_file.read())
-
-        comfy_deploy.save_image(style_blob, "style_transfer")
-
-
-#
-async def run_comfy_workflow(comfy_deploy: ComfyDeployClient):
+def prepare_comfy_workflow(comfy_deploy: ComfyDeployClient) -> str:
     global_settings = get_global_settings()
     retexture_settings = get_retexture_settings()
     style_settings = get_style_transfer_settings()
 
-    response = await comfy_deploy.run_workflow(
+    response = comfy_deploy.prepare_workflow(
         global_settings, retexture_settings, style_settings
     )
 
-    if response == "CREDITS":
-        return "You don't have enough credits."
-    elif response == "RENDER":
-        return "Something went wrong."
+    return get_workflow_message(response)
+
 
-    print(f"Response: {response}")
+# Short description of the render for the queue
+def get_job_label(scene) -> str:
+    if scene.global_properties.global_workflow == "STYLETRANSFER":
+        return os.path.basename(scene.style_properties.style_image)
+
+    return scene.retexture_properties.retexture_prompt
 
 
 # Returns True if an error occurs while attempting to render the image.
@@ -209,9 +190,17 @@ def register():
     for cls in classes:
         register_class(cls)
 
+    pass_cache.register()
+
 
 #
 def unregister():
     global classes
     for cls in classes:
         unregister_class(cls)
+
+    pass_cache.unregister()
+    render_events.unregister()
+    render_poller.unregister()
+    worker_pool.unregister()
+    http_client.unregister()
@@ -1,5 +1,5 @@
 import bpy
-from ..utilities.utilities import get_parent_filepath
+from .pass_images import create_viewer_node, store_viewer_pass
 
 original_settings = {}
 
@@ -15,7 +15,7 @@ def save_beauty_settings():
 #
 def set_beauty_settings():
     scene = bpy.context.scene
-    scene.use_nodes = False
+    scene.use_nodes = True
 
 
 #
@@ -27,18 +27,32 @@ def reset_beauty_settings():
 #
 def render_beauty_to_file():
     scene = bpy.context.scene
-    render = scene.render
 
-    output_path = get_parent_filepath("beauty.png", "renders")
-    render.filepath = output_path
+    create_beauty_compositing()
 
     if scene.camera:
-        bpy.ops.render.render(write_still=True)
+        bpy.ops.render.render(write_still=False)
+        store_viewer_pass("beauty")
 
     else:
         print("No active camera found in the scene")
 
 
+# Pass the render layers through unchanged and into the viewer image
+def create_beauty_compositing():
+    node_tree = bpy.context.scene.node_tree
+    nodes = node_tree.nodes
+    links = node_tree.links
+
+    nodes.clear()
+
+    render_layers_node = nodes.new(type="CompositorNodeRLayers")
+    output_node = nodes.new(type="CompositorNodeComposite")
+
+    links.new(render_layers_node.outputs["Image"], output_node.inputs["Image"])
+    create_viewer_node(nodes, links, render_layers_node.outputs["Image"])
+
+
 #
 def render_beauty_pass():
     save_beauty_settings()
@@ -1,8 +1,13 @@
 import bpy
-from ..utilities.utilities import get_parent_filepath
+from .pass_buffers import load_pass_buffers
+from .outline_pass import outline_buffer_names, create_outline_buffer_nodes
+from .pass_images import create_viewer_node, store_viewer_pass, data_view_settings
 
 original_settings = {}
 
+# The depth image is shown one stop brighter than the other data passes
+depth_view_settings = {**data_view_settings, "exposure": 1}
+
 
 #
 def save_depth_settings():
@@ -15,41 +20,35 @@ def save_depth_settings():
     original_settings.update(
         {
             "z_pass": bpy.context.view_layer.use_pass_z,
-            "exposure": scene.view_settings.exposure,
-            "gamma": scene.view_settings.gamma,
+            "normal_pass": bpy.context.view_layer.use_pass_normal,
+            "position_pass": bpy.context.view_layer.use_pass_position,
         }
     )
 
 
 #
 def set_depth_settings():
-    scene = bpy.context.scene
-
+    # The normal and position passes are kept for the outline pass
     bpy.context.view_layer.use_pass_z = True
-    scene.view_settings.exposure = 1
-    scene.view_settings.gamma = 1
+    bpy.context.view_layer.use_pass_normal = True
+    bpy.context.view_layer.use_pass_position = True
 
 
 #
 def reset_depth_settings():
-    scene = bpy.context.scene
-
     bpy.context.view_layer.use_pass_z = original_settings["z_pass"]
-    scene.view_settings.exposure = original_settings["exposure"]
-    scene.view_settings.gamma = original_settings["gamma"]
+    bpy.context.view_layer.use_pass_normal = original_settings["normal_pass"]
+    bpy.context.view_layer.use_pass_position = original_settings["position_pass"]
 
 
 #
 def render_depth_to_file():
-    scene = bpy.context.scene
-    render = scene.render
-
-    output_path = get_parent_filepath("depth.png", "renders")
-    render.filepath = output_path
-
     create_depth_compositing()
 
-    bpy.ops.render.render(write_still=True)
+    bpy.ops.render.render(write_still=False)
+    store_viewer_pass("depth", depth_view_settings)
+
+    load_pass_buffers(outline_buffer_names)
 
 
 #
@@ -65,8 +64,19 @@ def create_depth_compositing():
 
     nodes.clear()
 
-    # Create nodes
     render_layers_node = nodes.new(type="CompositorNodeRLayers")
+    output_node = nodes.new(type="CompositorNodeComposite")
+
+    depth_socket = create_depth_nodes(nodes, links, render_layers_node)
+    links.new(depth_socket, output_node.inputs["Image"])
+    create_viewer_node(nodes, links, depth_socket)
+
+    create_outline_buffer_nodes(nodes, links, render_layers_node)
+
+
+# Create the depth nodes and return the socket holding the depth image
+def create_depth_nodes(nodes, links, render_layers_node):
+    # Create nodes
     normalize_node = nodes.new(type="CompositorNodeNormalize")
     invert_node = nodes.new(type="CompositorNodeInvert")
 
@@ -76,13 +86,12 @@ def create_depth_compositing():
     curve.points.new(0.956, 0.144)
     rgb_curve_node.mapping.update()
 
-    output_node = nodes.new(type="CompositorNodeComposite")
-
     # Connect nodes
     links.new(render_layers_node.outputs["Depth"], normalize_node.inputs["Value"])
     links.new(normalize_node.outputs["Value"], invert_node.inputs["Fac"])
     links.new(invert_node.outputs[0], rgb_curve_node.inputs["Image"])
-    links.new(rgb_curve_node.outputs["Image"], output_node.inputs["Image"])
+
+    return rgb_curve_node.outputs["Image"]
 
 
 #
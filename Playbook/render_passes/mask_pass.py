@@ -1,15 +1,38 @@
 import bpy
+import numpy as np
+from .pass_buffers import (
+    pass_buffers,
+    create_buffer_output_node,
+    load_pass_buffers,
+    load_viewer_buffer,
+)
 from ..objects.objects import visible_objects, mask_objects
 from ..objects.object_properties import ObjectProperties
 from ..objects.object_utilities import mask_rgb_colors
-from ..utilities.utilities import get_parent_filepath
+from .pass_images import store_pass_pixels, create_viewer_node
+from .render_resolution import (
+    get_render_size,
+    get_structure_downscale,
+    get_structure_step,
+)
+from ..utilities.image_utilities import (
+    linear_to_srgb,
+    downsample_nearest,
+    upsample_nearest,
+)
 
 original_settings = {}
 
 original_object_properties: dict[ObjectProperties] = {}
 
+# Object index of objects that are not part of any mask
+CATCHALL_INDEX = 8
 
-# Save the current color management settings
+# Object index Cycles writes for pixels that are not covered by an indexed object
+BACKGROUND_INDEX = 0
+
+
+# Save the current render settings
 def save_mask_settings():
     scene = bpy.context.scene
 
@@ -17,70 +40,57 @@ def save_mask_settings():
     original_settings.update(
         {
             "render_engine": scene.render.engine,
+            "samples": scene.cycles.samples,
             "object_index": bpy.context.window.view_layer.use_pass_object_index,
-            "display_device": scene.display_settings.display_device,
-            "view_transform": scene.view_settings.view_transform,
-            "look": scene.view_settings.look,
-            "exposure": scene.view_settings.exposure,
-            "gamma": scene.view_settings.gamma,
-            "sequencer": scene.sequencer_colorspace_settings.name,
-            "user_curves": scene.view_settings.use_curve_mapping,
             "film_transparent": scene.render.film_transparent,
-            "color_mode": scene.render.image_settings.color_mode,
-            "color_depth": scene.render.image_settings.color_depth,
+            "resolution_percentage": scene.render.resolution_percentage,
         }
     )
 
 
-# Prepare the color management settings for render
+# Prepare the render settings for the object index render. Colors are
+# applied afterwards so color management does not affect the mask
 def set_mask_settings():
     scene = bpy.context.scene
     scene.render.engine = "CYCLES"
     scene.cycles.samples = 1
     bpy.context.window.view_layer.use_pass_object_index = True
-    scene.display_settings.display_device = "sRGB"
-    scene.view_settings.view_transform = "Standard"
-    scene.view_settings.look = "None"
-    scene.view_settings.exposure = 0
-    scene.view_settings.gamma = 1
-    scene.sequencer_colorspace_settings.name = "sRGB"
-    scene.view_settings.use_curve_mapping = False
     scene.render.film_transparent = True
-    scene.render.image_settings.color_mode = "RGBA"
-    scene.render.image_settings.color_depth = "16"
+    scene.render.resolution_percentage = max(
+        1, scene.render.resolution_percentage // get_structure_downscale()
+    )
 
 
-# Reset the color management settings to their previous values
+# Reset the render settings to their previous values
 def reset_mask_settings():
     scene = bpy.context.scene
     scene.render.engine = original_settings["render_engine"]
+    scene.cycles.samples = original_settings["samples"]
     bpy.context.window.view_layer.use_pass_object_index = original_settings[
         "object_index"
     ]
-    scene.display_settings.display_device = original_settings["display_device"]
-    scene.view_settings.view_transform = original_settings["view_transform"]
-    scene.view_settings.look = original_settings["look"]
-    scene.view_settings.exposure = original_settings["exposure"]
-    scene.view_settings.gamma = original_settings["gamma"]
-    scene.sequencer_colorspace_settings.name = original_settings["sequencer"]
-    scene.view_settings.use_curve_mapping = original_settings["user_curves"]
     scene.render.film_transparent = original_settings["film_transparent"]
-    scene.render.image_settings.color_mode = original_settings["color_mode"]
-    scene.render.image_settings.color_depth = original_settings["color_depth"]
+    scene.render.resolution_percentage = original_settings["resolution_percentage"]
 
 
-#
-def render_mask_to_file():
+# The object index is read from the viewer image. The image buffer is only
+# written when the texture of a mask is preserved
+def render_mask_to_file(size: tuple[int, int]):
     scene = bpy.context.scene
-    render = scene.render
-
-    output_path = get_parent_filepath("mask.png", "renders")
-    render.filepath = output_path
 
     create_mask_compositing()
 
     if scene.camera:
-        bpy.ops.render.render(write_still=True)
+        bpy.ops.render.render(write_still=False)
+
+        load_viewer_buffer("index")
+        if is_preserving_texture():
+            load_pass_buffers(["image"])
+
+        index = pass_buffers["index"][..., 0]
+        write_mask_image(
+            index, get_index_coverage(index), pass_buffers.get("image"), size
+        )
     else:
         print("No active camera found in the scene")
 
@@ -98,124 +108,97 @@ def create_mask_compositing():
 
     nodes.clear()
 
-    preserve_mask = scene.retexture_properties.preserve_texture_mask_index
-
     # Create nodes
     render_layers_node = nodes.new(type="CompositorNodeRLayers")
-
-    # Preserve mask nodes
-    preserve_node = (
-        create_preserve_mask_nodes(nodes, links, render_layers_node, int(preserve_mask))
-        if preserve_mask > 0
-        else None
-    )
-
-    mask_nodes = create_idmask_nodes(nodes, links, render_layers_node)
-
-    mix_node = nodes.new(type="CompositorNodeMixRGB")
-    mix_node.blend_type = "ADD"
-    mix_node.inputs[2].default_value = (0, 0, 0, 0)
-
-    # Background nodes
-    background_mask_name = "CATCHALL"
-    for mask, objs in mask_objects.items():
-        if "Background" in objs:
-            background_mask_name = mask
-    background_node = create_background_nodes(
-        nodes, links, render_layers_node, background_mask_name
-    )
-
     output_node = nodes.new("CompositorNodeComposite")
 
     # Create links
-    # Mask links
-    links.new(mask_nodes[0].outputs["Image"], mix_node.inputs[1])
+    links.new(render_layers_node.outputs["Image"], output_node.inputs["Image"])
+    create_viewer_node(nodes, links, render_layers_node.outputs["IndexOB"])
 
-    for mask_node in mask_nodes[1:]:
-        new_mix_node = nodes.new("CompositorNodeMixRGB")
-        new_mix_node.blend_type = "ADD"
-
-        links.new(mix_node.outputs["Image"], new_mix_node.inputs[1])
-        links.new(mask_node.outputs["Image"], new_mix_node.inputs[2])
+    if is_preserving_texture():
+        create_buffer_output_node(
+            nodes, links, render_layers_node.outputs["Image"], "image"
+        )
 
-        mix_node = new_mix_node
 
-    # Background links
-    links.new(mix_node.outputs["Image"], background_node.inputs[2])
+#
+def is_preserving_texture() -> bool:
+    return bool(bpy.context.scene.retexture_properties.preserve_texture_mask_index)
 
-    # Preserve mask links
-    if preserve_node is not None:
-        links.new(background_node.outputs["Image"], preserve_node.inputs[1])
-        links.new(render_layers_node.outputs["Image"], preserve_node.inputs[2])
-        links.new(preserve_node.outputs["Image"], output_node.inputs["Image"])
 
-    else:
-        links.new(background_node.outputs["Image"], output_node.inputs["Image"])
+# 1 where an indexed object was rendered and 0 on the background
+def get_index_coverage(index: np.ndarray) -> np.ndarray:
+    return (np.rint(index) != BACKGROUND_INDEX).astype(np.float32)
 
 
-#
-def create_idmask_nodes(nodes, links, render_layers_node):
-    mask_nodes = []
+# Lookup table from object index to mask color
+def create_mask_palette() -> np.ndarray:
+    palette = np.zeros((CATCHALL_INDEX + 1, 4), dtype=np.float32)
+    palette[:, 3] = 1
 
-    # Catch-all node
-    catchall_idmask_node = nodes.new(type="CompositorNodeIDMask")
-    catchall_idmask_node.index = 8
+    for mask in mask_objects.keys():
+        palette[int(mask[-1])] = mask_rgb_colors[mask]
 
-    catchall_mix_node = nodes.new(type="CompositorNodeMixRGB")
-    catchall_mix_node.blend_type = "MULTIPLY"
-    catchall_mix_node.inputs[2].default_value = mask_rgb_colors["CATCHALL"]
+    palette[CATCHALL_INDEX] = mask_rgb_colors["CATCHALL"]
 
-    links.new(
-        render_layers_node.outputs["IndexOB"], catchall_idmask_node.inputs["ID value"]
-    )
-    links.new(catchall_idmask_node.outputs["Alpha"], catchall_mix_node.inputs[1])
+    return palette
 
-    mask_nodes.append(catchall_mix_node)
 
+#
+def get_background_mask_name() -> str:
+    background_mask_name = "CATCHALL"
     for mask, objs in mask_objects.items():
+        if "Background" in objs:
+            background_mask_name = mask
 
-        # No objects in this mask. Ignore
-        if not objs:
-            continue
-
-        idmask_node = nodes.new(type="CompositorNodeIDMask")
-        idmask_node.index = int(mask[-1])
-
-        mask_node = nodes.new(type="CompositorNodeMixRGB")
-        mask_node.blend_type = "MULTIPLY"
-        mask_node.inputs[2].default_value = mask_rgb_colors[mask]
-
-        links.new(render_layers_node.outputs["IndexOB"], idmask_node.inputs["ID value"])
-        links.new(idmask_node.outputs["Alpha"], mask_node.inputs[1])
+    return background_mask_name
 
-        mask_nodes.append(mask_node)
 
-    return mask_nodes
+# Color the object index buffer with the mask palette, lay it over the
+# background color and keep the texture of the preserved mask. The cost only
+# depends on the number of pixels
+def colorize_mask(
+    index: np.ndarray, alpha: np.ndarray, image: np.ndarray, preserve_mask: int
+) -> np.ndarray:
+    palette = create_mask_palette()
+    indices = np.clip(np.rint(index), 0, len(palette) - 1).astype(np.intp)
 
+    background = np.asarray(
+        mask_rgb_colors[get_background_mask_name()], dtype=np.float32
+    )
+    coverage = alpha[..., np.newaxis]
+    mask = background + (palette[indices] - background) * coverage
 
-#
-def create_preserve_mask_nodes(nodes, links, render_layers_node, mask_index: int):
-    preserve_idmask_node = nodes.new(type="CompositorNodeIDMask")
-    preserve_idmask_node.index = mask_index
+    if preserve_mask > 0:
+        preserve = (indices == preserve_mask)[..., np.newaxis] * image[..., 3:4]
+        mask = mask + (image - mask) * preserve
 
-    alpha_over_node = nodes.new(type="CompositorNodeAlphaOver")
+    mask[..., 3] = 1
 
-    links.new(
-        render_layers_node.outputs["IndexOB"], preserve_idmask_node.inputs["ID value"]
-    )
-    links.new(preserve_idmask_node.outputs["Alpha"], alpha_over_node.inputs["Fac"])
+    return mask
 
-    return alpha_over_node
 
+# Color the buffers at the structure resolution and scale the mask up to
+# the (height, width) of the other passes. The image is only needed when the
+# texture of a mask is preserved
+def write_mask_image(
+    index: np.ndarray, alpha: np.ndarray, image: np.ndarray, size: tuple[int, int]
+):
+    scene = bpy.context.scene
+    preserve_mask = int(scene.retexture_properties.preserve_texture_mask_index)
 
-#
-def create_background_nodes(nodes, links, render_layers_node, mask_name: str):
-    alpha_over_node = nodes.new(type="CompositorNodeAlphaOver")
-    alpha_over_node.inputs[1].default_value = mask_rgb_colors[mask_name]
+    step = get_structure_step(index.shape[0], size[0])
+    index, alpha, image = [
+        downsample_nearest(buffer, step) if buffer is not None else None
+        for buffer in [index, alpha, image]
+    ]
 
-    links.new(render_layers_node.outputs["Alpha"], alpha_over_node.inputs["Fac"])
+    mask = colorize_mask(index, alpha, image, preserve_mask)
+    mask[..., :3] = linear_to_srgb(mask[..., :3])
+    mask = upsample_nearest(mask, *size)
 
-    return alpha_over_node
+    store_pass_pixels("mask", mask, bit_depth=16)
 
 
 #
@@ -224,9 +207,13 @@ def save_object_properties():
 
     for obj in visible_objects:
         original_object_properties[obj.name] = ObjectProperties(
-            obj.visible_shadow, obj.pass_index
+            obj.visible_shadow, obj.pass_index, tuple(obj.color)
         )
 
+
+# Shadows are not wanted in the mask render
+def disable_object_shadows():
+    for obj in visible_objects:
         obj.visible_shadow = False
 
 
@@ -238,7 +225,7 @@ def set_object_indeces():
         for mask_obj in mask_objs:
             print(f"Mask: {mask}, Object: {mask_obj}")
 
-            # Background color is set in compositing
+            # Background color is set when the mask is colored
             if mask_obj == "Background":
                 continue
 
@@ -250,7 +237,7 @@ def set_object_indeces():
 
     # All remaining visible objects are set in the catch-all mask
     for obj in visible_objects_dict.values():
-        obj.pass_index = 8  # Catch-all index
+        obj.pass_index = CATCHALL_INDEX
 
 
 #
@@ -258,17 +245,24 @@ def reset_object_properties():
     for obj in visible_objects:
         obj.visible_shadow = original_object_properties[obj.name].visible_shadow
         obj.pass_index = original_object_properties[obj.name].pass_index
+        obj.color = original_object_properties[obj.name].color
 
 
 #
 def render_mask_pass():
+    # The mask may be rendered smaller than the other passes
+    size = get_render_size()
+
     save_mask_settings()
     save_object_properties()
 
-    set_mask_settings()
-    set_object_indeces()
-
-    render_mask_to_file()
+    # The scene is restored even when the render fails
+    try:
+        disable_object_shadows()
+        set_mask_settings()
+        set_object_indeces()
 
-    reset_mask_settings()
-    reset_object_properties()
+        render_mask_to_file(size)
+    finally:
+        reset_mask_settings()
+        reset_object_properties()
@@ -0,0 +1,297 @@
+import bpy
+import glob
+import os
+from .mask_pass import (
+    BACKGROUND_INDEX,
+    save_object_properties,
+    set_object_indeces,
+    reset_object_properties,
+    write_mask_image,
+    is_preserving_texture,
+    get_index_coverage,
+)
+from .pass_buffers import (
+    pass_buffers,
+    create_buffer_output_node,
+    load_pass_buffers,
+    load_viewer_buffer,
+)
+from .depth_pass import create_depth_nodes, depth_view_settings
+from .outline_pass import (
+    outline_buffer_names,
+    create_outline_buffer_nodes,
+    write_outline_image,
+)
+from .normal_pass import NormalPass
+from .render_resolution import get_render_size
+from .pass_images import (
+    store_pass_file,
+    create_viewer_node,
+    store_viewer_pass,
+    data_view_settings,
+)
+from ..utilities.utilities import get_parent_filepath
+
+original_settings = {}
+
+
+#
+def save_multi_pass_settings():
+    scene = bpy.context.scene
+    view_layer = bpy.context.view_layer
+
+    if not scene.world:
+        scene.world = bpy.data.worlds["World"]
+
+    original_settings.clear()
+    original_settings.update(
+        {
+            "render_engine": scene.render.engine,
+            "use_nodes": scene.use_nodes,
+            "combined_pass": view_layer.use_pass_combined,
+            "z_pass": view_layer.use_pass_z,
+            "normal_pass": view_layer.use_pass_normal,
+            "position_pass": view_layer.use_pass_position,
+            "object_index": view_layer.use_pass_object_index,
+        }
+    )
+
+
+# Every pass is built from the Cycles render layers
+def set_multi_pass_settings():
+    scene = bpy.context.scene
+    view_layer = bpy.context.view_layer
+
+    scene.render.engine = "CYCLES"
+    scene.use_nodes = True
+
+    view_layer.use_pass_combined = True
+    view_layer.use_pass_z = True
+    view_layer.use_pass_normal = True
+    view_layer.use_pass_position = True
+    view_layer.use_pass_object_index = True
+
+
+#
+def reset_multi_pass_settings():
+    scene = bpy.context.scene
+    view_layer = bpy.context.view_layer
+
+    scene.render.engine = original_settings["render_engine"]
+    scene.use_nodes = original_settings["use_nodes"]
+
+    view_layer.use_pass_combined = original_settings["combined_pass"]
+    view_layer.use_pass_z = original_settings["z_pass"]
+    view_layer.use_pass_normal = original_settings["normal_pass"]
+    view_layer.use_pass_position = original_settings["position_pass"]
+    view_layer.use_pass_object_index = original_settings["object_index"]
+
+
+# Build one compositor tree that writes every pass from the same render
+def create_multi_pass_compositing(include_beauty: bool):
+    scene = bpy.context.scene
+    node_tree = scene.node_tree
+    nodes = node_tree.nodes
+    links = node_tree.links
+
+    nodes.clear()
+
+    render_layers_node = nodes.new(type="CompositorNodeRLayers")
+    render_layers_node.scene = scene
+
+    # The composite output keeps the beauty image in the Render Result
+    composite_node = nodes.new(type="CompositorNodeComposite")
+    links.new(render_layers_node.outputs["Image"], composite_node.inputs["Image"])
+
+    coverage_socket = create_coverage_nodes(nodes, links, render_layers_node)
+
+    # Beauty. Read from the viewer image after the render. Without the beauty
+    # pass the viewer holds the object index instead
+    if include_beauty:
+        create_viewer_node(nodes, links, render_layers_node.outputs["Image"])
+    else:
+        create_viewer_node(nodes, links, render_layers_node.outputs["IndexOB"])
+
+    # Normal
+    camera_normal_socket = create_camera_normal_nodes(nodes, links, render_layers_node)
+    normal_socket = NormalPass().create_normal_nodes(
+        nodes, links, camera_normal_socket, coverage_socket
+    )
+    create_file_output_node(
+        nodes, links, normal_socket, "normal", view_settings=data_view_settings
+    )
+
+    # Mask buffers the viewer can't hold. The mask is colored after the render
+    if include_beauty:
+        create_buffer_output_node(
+            nodes, links, render_layers_node.outputs["IndexOB"], "index"
+        )
+    elif is_preserving_texture():
+        create_buffer_output_node(
+            nodes, links, render_layers_node.outputs["Image"], "image"
+        )
+
+    # Depth
+    depth_socket = create_depth_nodes(nodes, links, render_layers_node)
+    create_file_output_node(
+        nodes,
+        links,
+        depth_socket,
+        "depth",
+        view_settings=depth_view_settings,
+    )
+
+    # Outline buffers. The outline is built after the render
+    create_outline_buffer_nodes(nodes, links, render_layers_node)
+
+
+# Returns a socket that is 1 where an indexed object is rendered and 0 on
+# the background. Replaces the alpha of a transparent film render so the
+# beauty pass can keep the world background
+def create_coverage_nodes(nodes, links, render_layers_node):
+    background_idmask_node = nodes.new(type="CompositorNodeIDMask")
+    background_idmask_node.index = BACKGROUND_INDEX
+
+    invert_node = nodes.new(type="CompositorNodeMath")
+    invert_node.operation = "SUBTRACT"
+    invert_node.inputs[0].default_value = 1
+
+    links.new(
+        render_layers_node.outputs["IndexOB"],
+        background_idmask_node.inputs["ID value"],
+    )
+    links.new(background_idmask_node.outputs["Alpha"], invert_node.inputs[1])
+
+    return invert_node.outputs["Value"]
+
+
+# Convert the world space normal pass to camera space and map it to the same
+# colors as the 'check_normal+y' matcap used by the Workbench normal pass
+def create_camera_normal_nodes(nodes, links, render_layers_node):
+    camera_rotation = bpy.context.scene.camera.matrix_world.to_quaternion().to_matrix()
+
+    combine_node = nodes.new(type="CompositorNodeCombineColor")
+    combine_node.mode = "RGB"
+
+    # Camera right, up and backward axes in world space
+    for axis, channel in enumerate(["Red", "Green", "Blue"]):
+        direction = camera_rotation.col[axis]
+
+        # The dot output of the normal node is negated
+        dot_node = nodes.new(type="CompositorNodeNormal")
+        dot_node.outputs["Normal"].default_value = (
+            -direction[0],
+            -direction[1],
+            -direction[2],
+        )
+
+        # Map [-1, 1] to [0, 1]
+        remap_node = nodes.new(type="CompositorNodeMath")
+        remap_node.operation = "MULTIPLY_ADD"
+        remap_node.inputs[1].default_value = 0.5
+        remap_node.inputs[2].default_value = 0.5
+
+        links.new(render_layers_node.outputs["Normal"], dot_node.inputs["Normal"])
+        links.new(dot_node.outputs["Dot"], remap_node.inputs[0])
+        links.new(remap_node.outputs["Value"], combine_node.inputs[channel])
+
+    return combine_node.outputs["Image"]
+
+
+# Write the given socket to 'renders/{pass_name}_####.png'. Color management
+# follows the scene unless view settings for the sRGB display are given
+def create_file_output_node(
+    nodes,
+    links,
+    socket,
+    pass_name: str,
+    view_settings: dict = None,
+):
+    output_node = nodes.new(type="CompositorNodeOutputFile")
+    output_node.base_path = os.path.dirname(get_parent_filepath(pass_name, "renders"))
+    output_node.file_slots[0].path = f"{pass_name}_"
+
+    image_format = output_node.format
+    image_format.file_format = "PNG"
+    image_format.color_mode = "RGBA"
+    image_format.color_depth = "8"
+
+    if view_settings:
+        image_format.color_management = "OVERRIDE"
+        image_format.display_settings.display_device = "sRGB"
+
+        for key, value in view_settings.items():
+            setattr(image_format.view_settings, key, value)
+
+    links.new(socket, output_node.inputs[0])
+
+    return output_node
+
+
+# File output nodes can only write to disk. Move the outputs into the pass
+# images. Their names end with the frame number
+def store_output_files(pass_names: list[str]):
+    for pass_name in pass_names:
+        frame_paths = glob.glob(
+            get_parent_filepath(f"{pass_name}_[0-9]*.png", "renders")
+        )
+
+        if not frame_paths:
+            print(f"No {pass_name} output was written")
+            continue
+
+        store_pass_file(pass_name, frame_paths[0])
+
+
+# Render once and write every pass from the same render result. The beauty
+# pass is left out when it has to be rendered by another engine
+def render_multi_pass(include_beauty: bool = True):
+    scene = bpy.context.scene
+
+    if not scene.camera:
+        print("No active camera found in the scene")
+        return
+
+    save_multi_pass_settings()
+    save_object_properties()
+
+    # The scene is restored even when the render fails
+    try:
+        set_multi_pass_settings()
+        set_object_indeces()
+
+        create_multi_pass_compositing(include_beauty)
+        bpy.ops.render.render(write_still=False)
+    finally:
+        reset_multi_pass_settings()
+        reset_object_properties()
+
+    if include_beauty:
+        store_viewer_pass("beauty")
+
+    store_output_files(["normal", "depth"])
+
+    load_mask_buffers(include_beauty)
+    load_pass_buffers(outline_buffer_names)
+
+    # Without a transparent film the background is where no object was indexed
+    index = pass_buffers["index"][..., 0]
+    size = get_render_size()
+    write_mask_image(index, get_index_coverage(index), pass_buffers.get("image"), size)
+
+    write_outline_image(size)
+
+
+# The viewer holds the beauty image, which the texture of a mask is
+# preserved from, or the object index when there is no beauty pass
+def load_mask_buffers(include_beauty: bool):
+    if include_beauty:
+        load_pass_buffers(["index"])
+
+        if is_preserving_texture():
+            load_viewer_buffer("image")
+    else:
+        load_viewer_buffer("index")
+
+        if is_preserving_texture():
+            load_pass_buffers(["image"])
@@ -1,5 +1,5 @@
 import bpy
-from ..utilities.utilities import get_parent_filepath
+from .pass_images import create_viewer_node, store_viewer_pass, data_view_settings
 
 
 class NormalPass:
@@ -58,6 +58,20 @@ class NormalPass:
         nodes.clear()
 
         render_layers_node = nodes.new(type="CompositorNodeRLayers")
+        output_node = nodes.new(type="CompositorNodeComposite")
+
+        normal_socket = self.create_normal_nodes(
+            nodes,
+            links,
+            render_layers_node.outputs["Image"],
+            render_layers_node.outputs["Alpha"],
+        )
+        links.new(normal_socket, output_node.inputs["Image"])
+        create_viewer_node(nodes, links, normal_socket)
+
+    # Composite the normal image over the gradient background and return the
+    # socket holding the final image
+    def create_normal_nodes(self, nodes, links, image_socket, alpha_socket):
         mix_node = nodes.new(type="CompositorNodeMixRGB")
 
         mix_add_node = nodes.new(type="CompositorNodeMixRGB")
@@ -76,25 +90,20 @@ class NormalPass:
         blur_node.size_x = 1000
         blur_node.size_y = 1000
 
-        output_node = nodes.new(type="CompositorNodeComposite")
-
-        links.new(render_layers_node.outputs["Image"], mix_node.inputs[2])
-        links.new(render_layers_node.outputs["Alpha"], mix_node.inputs["Fac"])
+        links.new(image_socket, mix_node.inputs[2])
+        links.new(alpha_socket, mix_node.inputs["Fac"])
         links.new(box_mask_node.outputs["Mask"], blur_node.inputs["Image"])
         links.new(blur_node.outputs["Image"], mix_add_node.inputs["Fac"])
         links.new(mix_add_node.outputs["Image"], mix_node.inputs[1])
-        links.new(mix_node.outputs["Image"], output_node.inputs["Image"])
+
+        return mix_node.outputs["Image"]
 
     #
     def render_normal_to_file(self):
-        render = bpy.context.scene.render
-
-        output_path = get_parent_filepath("normal.png", "renders")
-        render.filepath = output_path
-
         self.create_normal_compositing()
 
-        bpy.ops.render.render(write_still=True)
+        bpy.ops.render.render(write_still=False)
+        store_viewer_pass("normal", data_view_settings)
 
     #
     def render_normal_pass(self):
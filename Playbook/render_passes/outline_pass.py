@@ -1,9 +1,25 @@
 import bpy
-import os
-from ..utilities.utilities import get_parent_filepath
+import numpy as np
+from .pass_buffers import pass_buffers, create_buffer_output_node, load_pass_buffers
+from .pass_images import store_pass_pixels
+from .render_resolution import (
+    get_render_size,
+    get_structure_downscale,
+    get_structure_step,
+)
+from ..utilities.image_utilities import downsample_nearest, upsample_nearest
 
 original_settings = {}
 
+# Buffers the outline is built from
+outline_buffer_names = ["depth", "normal", "position"]
+
+# Depth values at or above this distance belong to the background
+BACKGROUND_DEPTH = 10000
+
+# Weights used to convert a color to a single value
+luminance_weights = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
 
 # Save the current color management settings
 def save_outline_settings():
@@ -21,43 +37,46 @@ def save_outline_settings():
             "z_pass": view_layers.use_pass_z,
             "normal_pass": view_layers.use_pass_normal,
             "position_pass": view_layers.use_pass_position,
+            "resolution_percentage": scene.render.resolution_percentage,
         }
     )
 
 
 #
 def set_outline_settings():
+    scene = bpy.context.scene
     view_layer = bpy.context.view_layer
 
     view_layer.use_pass_z = True
     view_layer.use_pass_normal = True
     view_layer.use_pass_position = True
+    scene.render.resolution_percentage = max(
+        1, scene.render.resolution_percentage // get_structure_downscale()
+    )
 
 
 #
 def reset_outline_settings():
     global original_settings
 
+    scene = bpy.context.scene
     view_layer = bpy.context.view_layer
     view_layer.use_pass_z = original_settings["z_pass"]
     view_layer.use_pass_normal = original_settings["normal_pass"]
     view_layer.use_pass_position = original_settings["position_pass"]
+    scene.render.resolution_percentage = original_settings["resolution_percentage"]
 
 
-#
-def render_outline_to_file():
-    scene = bpy.context.scene
-    render = scene.render
-
-    output_path = get_parent_filepath("outline.png", "renders")
-    render.filepath = output_path
-
+# Only used when no earlier render produced the outline buffers
+def render_outline_buffers():
     create_outline_compositing()
 
-    bpy.ops.render.render(write_still=True)
+    bpy.ops.render.render(write_still=False)
 
+    load_pass_buffers(outline_buffer_names)
 
-#
+
+# Write the depth, normal and position buffers of the render
 def create_outline_compositing():
     scene = bpy.context.scene
 
@@ -70,49 +89,133 @@ def create_outline_compositing():
 
     nodes.clear()
 
-    # Create necessary nodes
     render_layers_node = nodes.new(type="CompositorNodeRLayers")
-    normalize_node = nodes.new(type="CompositorNodeNormalize")
+    output_node = nodes.new(type="CompositorNodeComposite")
 
-    sobel_node1 = nodes.new(type="CompositorNodeFilter")
-    sobel_node1.filter_type = "SOBEL"
-    sobel_node2 = nodes.new(type="CompositorNodeFilter")
-    sobel_node2.filter_type = "SOBEL"
-    sobel_node3 = nodes.new(type="CompositorNodeFilter")
-    sobel_node3.filter_type = "SOBEL"
+    links.new(render_layers_node.outputs["Image"], output_node.inputs["Image"])
+    create_outline_buffer_nodes(nodes, links, render_layers_node)
 
-    add_node1 = nodes.new(type="CompositorNodeMixRGB")
-    add_node1.blend_type = "ADD"
-    add_node2 = nodes.new(type="CompositorNodeMixRGB")
-    add_node2.blend_type = "ADD"
 
-    color_ramp_node = nodes.new(type="CompositorNodeValToRGB")
-    color_ramp_node.color_ramp.elements[0].position = 0.999
+#
+def create_outline_buffer_nodes(nodes, links, render_layers_node):
+    create_buffer_output_node(
+        nodes, links, render_layers_node.outputs["Depth"], "depth"
+    )
+    create_buffer_output_node(
+        nodes, links, render_layers_node.outputs["Normal"], "normal"
+    )
+    create_buffer_output_node(
+        nodes, links, render_layers_node.outputs["Position"], "position"
+    )
 
-    output_node = nodes.new(type="CompositorNodeComposite")
 
-    # Connect nodes
-    # Depth pass
-    links.new(render_layers_node.outputs["Depth"], normalize_node.inputs["Value"])
-    links.new(normalize_node.outputs["Value"], sobel_node1.inputs["Image"])
-    links.new(sobel_node1.outputs["Image"], add_node1.inputs[1])
+# Gradient magnitude of every channel of a (height, width, channels) array,
+# computed with two separable 3x3 Sobel kernels
+def sobel_magnitude(image: np.ndarray) -> np.ndarray:
+    padded = np.pad(image, ((1, 1), (1, 1), (0, 0)), mode="edge")
 
-    # Normal pass
-    links.new(render_layers_node.outputs["Normal"], sobel_node2.inputs["Image"])
-    links.new(sobel_node2.outputs["Image"], add_node1.inputs[2])
+    # Smooth [1, 2, 1] and differentiate [-1, 0, 1] along each axis
+    smooth_rows = padded[:-2] + 2 * padded[1:-1] + padded[2:]
+    smooth_columns = padded[:, :-2] + 2 * padded[:, 1:-1] + padded[:, 2:]
 
-    # Position pass
-    links.new(render_layers_node.outputs["Position"], sobel_node3.inputs["Image"])
-    links.new(sobel_node3.outputs["Image"], add_node2.inputs[2])
+    gradient_x = smooth_rows[:, 2:] - smooth_rows[:, :-2]
+    gradient_y = smooth_columns[2:] - smooth_columns[:-2]
 
-    links.new(add_node1.outputs["Image"], add_node2.inputs[1])
-    links.new(add_node2.outputs["Image"], color_ramp_node.inputs["Fac"])
-    links.new(color_ramp_node.outputs["Image"], output_node.inputs["Image"])
+    return np.sqrt(gradient_x * gradient_x + gradient_y * gradient_y)
 
 
-#
+# Scale the depth to [0, 1] the same way the compositor normalize node does
+def normalize_depth(depth: np.ndarray) -> np.ndarray:
+    foreground = depth[depth < BACKGROUND_DEPTH]
+
+    if foreground.size == 0:
+        return np.zeros_like(depth)
+
+    minimum = foreground.min()
+    depth_range = foreground.max() - minimum
+
+    if depth_range == 0:
+        return np.clip(depth - minimum, 0, 1)
+
+    return np.clip((depth - minimum) / depth_range, 0, 1)
+
+
+# Returns a boolean (height, width) edge image. Edges are where the weighted
+# sum of the depth, normal and position gradients reaches the threshold.
+# Missing buffers are skipped
+def generate_outline(
+    depth: np.ndarray = None,
+    normal: np.ndarray = None,
+    position: np.ndarray = None,
+    threshold: float = 0.999,
+    depth_weight: float = 1,
+    normal_weight: float = 1,
+    position_weight: float = 1,
+) -> np.ndarray:
+    edges = None
+
+    weighted_buffers = [
+        (normalize_depth(depth[..., :1]) if depth is not None else None, depth_weight),
+        (normal[..., :3] if normal is not None else None, normal_weight),
+        (position[..., :3] if position is not None else None, position_weight),
+    ]
+
+    for buffer, weight in weighted_buffers:
+        if buffer is None or weight == 0:
+            continue
+
+        magnitude = sobel_magnitude(buffer.astype(np.float32))
+
+        # Convert color gradients to a single value
+        if magnitude.shape[2] == 3:
+            magnitude = magnitude @ luminance_weights
+        else:
+            magnitude = magnitude[..., 0]
+
+        edges = weight * magnitude if edges is None else edges + weight * magnitude
+
+    if edges is None:
+        raise ValueError("No buffers to build the outline from")
+
+    return edges >= threshold
+
+
+# Build the outline at the structure resolution and scale it up to the
+# (height, width) of the other passes
+def write_outline_image(size: tuple[int, int]):
+    outline_props = bpy.context.scene.capture_properties
+
+    buffers = [pass_buffers.get(name) for name in outline_buffer_names]
+    buffer_height = next(buffer for buffer in buffers if buffer is not None).shape[0]
+    step = get_structure_step(buffer_height, size[0])
+
+    edges = generate_outline(
+        *[
+            downsample_nearest(buffer, step) if buffer is not None else None
+            for buffer in buffers
+        ],
+        outline_props.outline_threshold,
+        outline_props.outline_depth_weight,
+        outline_props.outline_normal_weight,
+        outline_props.outline_position_weight,
+    )
+
+    store_pass_pixels(
+        "outline",
+        upsample_nearest(edges.astype(np.float32), *size),
+        bit_depth=int(outline_props.outline_bit_depth),
+    )
+
+
+# Build the outline from the buffers of the depth render. Only renders when
+# those buffers are not available
 def render_outline_pass():
-    save_outline_settings()
-    set_outline_settings()
-    render_outline_to_file()
-    reset_outline_settings()
+    size = get_render_size()
+
+    if not any(name in pass_buffers for name in outline_buffer_names):
+        save_outline_settings()
+        set_outline_settings()
+        render_outline_buffers()
+        reset_outline_settings()
+
+    write_outline_image(size)
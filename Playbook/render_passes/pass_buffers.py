@@ -0,0 +1,75 @@
+import bpy
+import glob
+import os
+import numpy as np
+from ..utilities.utilities import get_parent_filepath
+from ..utilities.image_utilities import read_image_pixels, get_image_pixels
+
+# Raw float buffers of the last render, keyed by buffer name
+pass_buffers: dict[str, np.ndarray] = {}
+
+# Color mode and float bit depth each buffer is written with. Object indices,
+# colors and normals fit in half floats. Depth and position are distances in
+# scene units, which half floats round to a thousandth of their size, too
+# coarse for the outline gradients
+buffer_formats = {
+    "index": ("BW", "16"),
+    "image": ("RGBA", "16"),
+    "depth": ("BW", "32"),
+    "normal": ("RGB", "16"),
+    "position": ("RGB", "32"),
+}
+
+
+# A render did not produce a buffer a pass is built from
+class MissingBufferError(Exception):
+    pass
+
+
+#
+def get_buffer_folder() -> str:
+    return get_parent_filepath("buffers", "renders")
+
+
+# Write the given socket as a float EXR so the raw values can be read back
+# into NumPy without any color management applied. Only used for the buffers
+# a render can't pass through the viewer image
+def create_buffer_output_node(nodes, links, socket, buffer_name: str):
+    output_node = nodes.new(type="CompositorNodeOutputFile")
+    output_node.base_path = get_buffer_folder()
+    output_node.file_slots[0].path = f"{buffer_name}_"
+
+    image_format = output_node.format
+    color_mode, color_depth = buffer_formats[buffer_name]
+    image_format.file_format = "OPEN_EXR"
+    image_format.color_mode = color_mode
+    image_format.color_depth = color_depth
+
+    links.new(socket, output_node.inputs[0])
+
+    return output_node
+
+
+# Read the buffers written by the buffer output nodes of the last render
+def load_pass_buffers(buffer_names: list[str]):
+    for buffer_name in buffer_names:
+        buffer_paths = glob.glob(
+            os.path.join(get_buffer_folder(), f"{buffer_name}_[0-9]*.exr")
+        )
+
+        if not buffer_paths:
+            raise MissingBufferError(f"No {buffer_name} buffer was written")
+
+        pass_buffers[buffer_name] = read_image_pixels(buffer_paths[0])
+        os.remove(buffer_paths[0])
+
+
+# Read the viewer image of the last render as a buffer, without going through
+# a file. The viewer holds the raw values of the socket linked to it
+def load_viewer_buffer(buffer_name: str):
+    viewer_image = bpy.data.images.get("Viewer Node")
+
+    if not viewer_image or not viewer_image.has_data:
+        raise MissingBufferError(f"No {buffer_name} buffer in the viewer image")
+
+    pass_buffers[buffer_name] = get_image_pixels(viewer_image)
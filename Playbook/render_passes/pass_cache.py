@@ -0,0 +1,244 @@
+import bpy
+from bpy.app.handlers import persistent
+from ..objects.objects import visible_objects, mask_objects
+from .render_resolution import get_model_resolution
+from .pass_images import has_pass_image
+
+pass_names = ["beauty", "normal", "mask", "depth", "outline"]
+
+# Scene changes each pass depends on
+pass_dependencies = {
+    "beauty": {
+        "camera",
+        "resolution",
+        "objects",
+        "geometry",
+        "lighting",
+        "shading",
+        "color",
+        "engine",
+    },
+    "normal": {"camera", "resolution", "objects", "geometry", "capture"},
+    "mask": {"camera", "resolution", "objects", "geometry", "masks", "capture"},
+    "depth": {"camera", "resolution", "objects", "geometry", "capture"},
+    "outline": {"camera", "resolution", "objects", "geometry", "capture", "outline"},
+}
+
+
+#
+def get_camera_fingerprint(scene):
+    camera = scene.camera
+    if not camera:
+        return None
+
+    data = camera.data
+
+    return (
+        camera.name,
+        tuple(value for row in camera.matrix_world for value in row),
+        data.type,
+        data.lens,
+        data.ortho_scale,
+        data.sensor_fit,
+        data.sensor_width,
+        data.sensor_height,
+        data.shift_x,
+        data.shift_y,
+        data.clip_start,
+        data.clip_end,
+    )
+
+
+#
+def get_resolution_fingerprint(scene):
+    render = scene.render
+    capture_props = scene.capture_properties
+
+    return (
+        render.resolution_x,
+        render.resolution_y,
+        render.resolution_percentage,
+        render.pixel_aspect_x,
+        render.pixel_aspect_y,
+        scene.frame_current,
+        capture_props.structure_downscale,
+        (
+            tuple(get_model_resolution().values())
+            if capture_props.render_at_model_resolution
+            else None
+        ),
+    )
+
+
+#
+def get_objects_fingerprint(scene):
+    return tuple(obj.name for obj in visible_objects)
+
+
+#
+def get_masks_fingerprint(scene):
+    return (
+        tuple((mask, tuple(objs)) for mask, objs in mask_objects.items()),
+        scene.retexture_properties.preserve_texture_mask_index,
+        scene.capture_properties.mask_backend,
+    )
+
+
+# Only the beauty pass follows the color management of the scene
+def get_color_fingerprint(scene):
+    view_settings = scene.view_settings
+
+    return (
+        scene.display_settings.display_device,
+        view_settings.view_transform,
+        view_settings.look,
+        view_settings.exposure,
+        view_settings.gamma,
+        view_settings.use_curve_mapping,
+    )
+
+
+#
+def get_engine_fingerprint(scene):
+    return (
+        scene.render.engine,
+        scene.cycles.samples if hasattr(scene, "cycles") else None,
+        scene.render.film_transparent,
+    )
+
+
+#
+def get_capture_fingerprint(scene):
+    return scene.capture_properties.capture_mode
+
+
+#
+def get_outline_fingerprint(scene):
+    capture_props = scene.capture_properties
+
+    return (
+        capture_props.outline_threshold,
+        capture_props.outline_depth_weight,
+        capture_props.outline_normal_weight,
+        capture_props.outline_position_weight,
+        capture_props.outline_bit_depth,
+    )
+
+
+# Dependencies that can be compared directly. The others ('geometry',
+# 'lighting' and 'shading') are tracked through depsgraph updates
+dependency_fingerprints = {
+    "camera": get_camera_fingerprint,
+    "resolution": get_resolution_fingerprint,
+    "objects": get_objects_fingerprint,
+    "masks": get_masks_fingerprint,
+    "color": get_color_fingerprint,
+    "engine": get_engine_fingerprint,
+    "capture": get_capture_fingerprint,
+    "outline": get_outline_fingerprint,
+}
+
+
+# Keeps track of which rendered passes are still valid for the scene
+class PassCache:
+    stale_passes: set[str] = set(pass_names)
+    pass_fingerprints: dict[str, dict] = {}
+    is_capturing = False
+
+    # Mark every pass that depends on the given change as stale. Without a
+    # dependency every pass is stale
+    @classmethod
+    def invalidate(cls, dependency: str = ""):
+        if not dependency:
+            cls.stale_passes.update(pass_names)
+            cls.pass_fingerprints.clear()
+            return
+
+        for pass_name in pass_names:
+            if dependency in get_pass_dependencies(pass_name, bpy.context.scene):
+                cls.stale_passes.add(pass_name)
+
+    # Passes that have to be rendered again
+    @classmethod
+    def get_stale_passes(cls, scene) -> list[str]:
+        stale_passes = []
+
+        for pass_name in pass_names:
+            if (
+                pass_name in cls.stale_passes
+                or not has_pass_image(pass_name)
+                or cls.pass_fingerprints.get(pass_name)
+                != get_pass_fingerprint(pass_name, scene)
+            ):
+                stale_passes.append(pass_name)
+
+        return stale_passes
+
+    #
+    @classmethod
+    def mark_rendered(cls, rendered_passes: list[str], scene):
+        for pass_name in rendered_passes:
+            cls.stale_passes.discard(pass_name)
+            cls.pass_fingerprints[pass_name] = get_pass_fingerprint(pass_name, scene)
+
+
+#
+def get_pass_dependencies(pass_name: str, scene) -> set[str]:
+    dependencies = pass_dependencies[pass_name]
+
+    # The preserved mask shows the textures of the render
+    if pass_name == "mask" and scene.retexture_properties.preserve_texture_mask_index:
+        dependencies = dependencies | {"lighting", "shading"}
+
+    return dependencies
+
+
+#
+def get_pass_fingerprint(pass_name: str, scene) -> dict:
+    return {
+        dependency: dependency_fingerprints[dependency](scene)
+        for dependency in get_pass_dependencies(pass_name, scene)
+        if dependency in dependency_fingerprints
+    }
+
+
+# Mark the passes affected by the changes in the scene as stale
+@persistent
+def track_scene_changes_handler(scene, depsgraph):
+    if PassCache.is_capturing:
+        return
+
+    for update in depsgraph.updates:
+        id_data = update.id
+
+        if isinstance(id_data, bpy.types.Object):
+            # The camera is compared directly
+            if id_data.type == "CAMERA":
+                continue
+
+            if id_data.type == "LIGHT":
+                PassCache.invalidate("lighting")
+            elif update.is_updated_transform or update.is_updated_geometry:
+                PassCache.invalidate("geometry")
+
+        elif isinstance(id_data, (bpy.types.Light, bpy.types.World)):
+            PassCache.invalidate("lighting")
+
+        elif isinstance(id_data, bpy.types.Material):
+            PassCache.invalidate("shading")
+
+
+# A different file was opened
+@persistent
+def reset_pass_cache_handler(dummy):
+    PassCache.invalidate()
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(track_scene_changes_handler)
+    bpy.app.handlers.load_post.append(reset_pass_cache_handler)
+
+
+def unregister():
+    bpy.app.handlers.depsgraph_update_post.remove(track_scene_changes_handler)
+    bpy.app.handlers.load_post.remove(reset_pass_cache_handler)
@@ -0,0 +1,150 @@
+import bpy
+import os
+import numpy as np
+from concurrent.futures import Future
+from ..utilities.utilities import get_parent_filepath
+from ..utilities.worker_pool import WorkerPool, completed_future
+from ..utilities.image_utilities import (
+    encode_png,
+    get_image_pixels,
+    apply_standard_view_transform,
+    apply_scene_view_transform,
+)
+
+# Encoded PNG of each pass, keyed by pass name. Passes are encoded on worker
+# threads, so the result may not be ready yet
+pass_images: dict[str, Future] = {}
+
+# Called with the pass name and future whenever a pass image is stored
+pass_image_listeners: list = []
+
+# Reused between reads of the viewer image
+viewer_buffer = np.empty(0, dtype=np.float32)
+
+# Color management of the normal and depth passes. They show render data, so
+# the view transform and look of the scene don't apply to them
+data_view_settings = {
+    "view_transform": "Standard",
+    "look": "None",
+    "exposure": 0,
+    "gamma": 1,
+    "use_curve_mapping": False,
+}
+
+
+#
+def get_pass_filepath(pass_name: str) -> str:
+    return get_parent_filepath(f"{pass_name}.png", "renders")
+
+
+# Passes are only written to the renders folder for debugging
+def is_writing_pass_files() -> bool:
+    return bpy.context.scene.capture_properties.write_pass_files
+
+
+# Waits for the pass to finish encoding
+def get_pass_image(pass_name: str) -> bytes:
+    return pass_images[pass_name].result()
+
+
+# Passes still encoding count as stored. A pass whose encode failed has to be
+# rendered again
+def has_pass_image(pass_name: str) -> bool:
+    future = pass_images.get(pass_name)
+
+    if future is None:
+        return False
+
+    return not future.done() or future.exception() is None
+
+
+#
+def store_pass_future(pass_name: str, future: Future):
+    pass_images[pass_name] = future
+
+    for listener in pass_image_listeners:
+        listener(pass_name, future)
+
+
+# Encode pixels in [0, 1] as the PNG of the pass on a worker thread. The
+# pixels must not be changed afterwards
+def store_pass_pixels(pass_name: str, pixels: np.ndarray, bit_depth: int = 8):
+    filepath = get_pass_filepath(pass_name) if is_writing_pass_files() else ""
+
+    store_pass_future(
+        pass_name, WorkerPool.submit(encode_pass, pixels, bit_depth, filepath)
+    )
+
+
+# Runs on a worker thread
+def encode_pass(pixels: np.ndarray, bit_depth: int, filepath: str) -> bytes:
+    data = encode_png(pixels, bit_depth)
+
+    if filepath:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+        with open(filepath, "wb") as file:
+            file.write(data)
+
+    return data
+
+
+# Take over a PNG Blender wrote for the pass. It is kept as the pass file when
+# debugging and removed otherwise
+def store_pass_file(pass_name: str, filepath: str):
+    with open(filepath, "rb") as file:
+        data = file.read()
+
+    if is_writing_pass_files():
+        os.replace(filepath, get_pass_filepath(pass_name))
+    else:
+        os.remove(filepath)
+
+    store_pass_future(pass_name, completed_future(data))
+
+
+# The viewer image receives the same socket as the composite output, so the
+# pixels can be read without saving the Render Result
+def create_viewer_node(nodes, links, socket):
+    viewer_node = nodes.new(type="CompositorNodeViewer")
+    viewer_node.use_alpha = True
+    nodes.active = viewer_node
+
+    links.new(socket, viewer_node.inputs["Image"])
+
+    return viewer_node
+
+
+# Store the viewer image of the last render as the pass, color managed like
+# the scene would save it unless view settings are given. View transforms
+# NumPy can't apply fall back to saving the Render Result
+def store_viewer_pass(pass_name: str, view_settings: dict = None):
+    global viewer_buffer
+
+    viewer_image = bpy.data.images.get("Viewer Node")
+
+    if viewer_image and viewer_image.has_data:
+        width, height = viewer_image.size
+        if viewer_buffer.size != width * height * 4:
+            viewer_buffer = np.empty(width * height * 4, dtype=np.float32)
+
+        pixels = get_image_pixels(viewer_image, viewer_buffer)
+
+        if view_settings is None:
+            pixels = apply_scene_view_transform(pixels, bpy.context.scene)
+        else:
+            pixels = apply_standard_view_transform(pixels, view_settings, "sRGB")
+
+        if pixels is not None:
+            store_pass_pixels(pass_name, pixels)
+            return
+
+    render_result = bpy.data.images.get("Render Result")
+    if not render_result:
+        print(f"No {pass_name} render to store")
+        return
+
+    filepath = get_parent_filepath(f"{pass_name}_result.png", "renders")
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    render_result.save_render(filepath)
+    store_pass_file(pass_name, filepath)
@@ -1,14 +1,33 @@
 import bpy
 import os
 import shutil
+import time
 from .beauty_pass import render_beauty_pass
 from .mask_pass import render_mask_pass
 from .depth_pass import render_depth_pass
 from .outline_pass import render_outline_pass
 from .normal_pass import NormalPass
+from .workbench_mask_pass import render_workbench_mask_pass
+from .multi_pass import render_multi_pass
+from .pass_buffers import pass_buffers, MissingBufferError
+from .pass_cache import PassCache, pass_names
+from .pass_images import pass_images, get_pass_filepath
+from .render_session import (
+    save_session_settings,
+    set_session_settings,
+    reset_session_settings,
+)
+from .render_resolution import (
+    save_resolution_settings,
+    set_model_resolution,
+    reset_resolution_settings,
+)
 from ..objects.visible_objects import set_visible_objects
 from ..objects.objects import visible_objects
 
+# Seconds spent rendering each pass during the last capture
+pass_timings: dict[str, float] = {}
+
 
 # Returns a message if an error occurs while attempting to render the image.
 def check_for_errors() -> bool:
@@ -44,22 +63,66 @@ def error_exists_in_render_passes():
     return True
 
 
-#
-def render_passes():
+# Render the passes whose inputs changed since they were last rendered.
+# Returns True once every pass is ready. Passes that failed stay stale
+def render_passes() -> bool:
+    scene = bpy.context.scene
+
+    stale_passes = PassCache.get_stale_passes(scene)
+    pass_buffers.clear()
+    pass_timings.clear()
+
+    if not stale_passes:
+        print("Render passes are up to date")
+        return True
+
     # Prepare for renders
-    clear_render_folder()
+    if len(stale_passes) == len(pass_names):
+        pass_images.clear()
+        clear_render_folder()
+    else:
+        remove_pass_images(stale_passes)
+
+    PassCache.is_capturing = True
+
+    save_session_settings()
+    set_session_settings()
+
+    render_at_model_resolution = scene.capture_properties.render_at_model_resolution
+    if render_at_model_resolution:
+        save_resolution_settings()
+        set_model_resolution()
+
+    try:
+        # Render all required passes
+        if scene.capture_properties.capture_mode == "SINGLE":
+            render_single_capture(stale_passes)
+        else:
+            render_all_passes(stale_passes)
+    except MissingBufferError as e:
+        print(f"Failed to render the passes: {e}")
+        scene.error_message = "Failed to render the passes."
+        return False
+    finally:
+        if render_at_model_resolution:
+            reset_resolution_settings()
 
-    # Render all required passes
-    render_all_passes()
+        reset_session_settings()
+        PassCache.is_capturing = False
+
+    PassCache.mark_rendered(stale_passes, scene)
+    report_pass_timings()
 
     # Clean up renders
-    bpy.data.images.remove(bpy.data.images["Render Result"])
-    bpy.context.scene.node_tree.nodes.clear()
+    render_result = bpy.data.images.get("Render Result")
+    if render_result:
+        bpy.data.images.remove(render_result)
+    scene.node_tree.nodes.clear()
 
-    return None
+    return True
 
 
-def render_all_passes():
+def render_all_passes(stale_passes: list[str]):
     bpy.context.scene.use_nodes = True
 
     # Get the compositor node tree
@@ -79,17 +142,104 @@ def render_all_passes():
     # Set the scene for the Render Layers node to the current scene
     render_layer_node.scene = bpy.context.scene
 
-    # Render unmodified image
-    render_beauty_pass()
-    # Render normal image
-    normal_pass = NormalPass()
-    normal_pass.render_normal_pass()
-    # Render mask image
-    render_mask_pass()
-    # Render depth image
-    render_depth_pass()
-    # Render outline image
-    render_outline_pass()
+    pass_renderers = {
+        "beauty": render_beauty_pass,
+        "normal": NormalPass().render_normal_pass,
+        "mask": render_selected_mask_pass,
+        "depth": render_depth_pass,
+        # Built from the depth render buffers
+        "outline": render_outline_pass,
+    }
+
+    for pass_name in order_passes_by_engine(stale_passes):
+        time_pass(pass_name, pass_renderers[pass_name])
+
+
+# Passes in the scene engine come first, followed by the passes of each other
+# engine, so the engine only switches once per group. The order within a
+# group is kept, so the outline still follows the depth render
+def order_passes_by_engine(stale_passes: list[str]) -> list[str]:
+    scene_engine = bpy.context.scene.render.engine
+
+    return sorted(
+        stale_passes,
+        key=lambda pass_name: (
+            get_pass_engine(pass_name) != scene_engine,
+            get_pass_engine(pass_name),
+        ),
+    )
+
+
+# Render engine each pass is rendered with when the passes are rendered
+# separately
+def get_pass_engine(pass_name: str) -> str:
+    if pass_name == "normal":
+        return "BLENDER_WORKBENCH"
+
+    if pass_name == "mask":
+        return "BLENDER_WORKBENCH" if use_workbench_mask() else "CYCLES"
+
+    return bpy.context.scene.render.engine
+
+
+# The Workbench backend cannot show the textures of a preserved mask and
+# falls back to Cycles
+def use_workbench_mask() -> bool:
+    scene = bpy.context.scene
+
+    return (
+        scene.capture_properties.mask_backend == "WORKBENCH"
+        and not scene.retexture_properties.preserve_texture_mask_index
+    )
+
+
+#
+def render_selected_mask_pass():
+    if use_workbench_mask():
+        render_workbench_mask_pass()
+    else:
+        render_mask_pass()
+
+
+# Build every stale pass from a single Cycles render. Other engines still
+# render the beauty pass on their own so it matches what the user sees
+def render_single_capture(stale_passes: list[str]):
+    render_beauty = "beauty" in stale_passes
+    structure_is_stale = any(pass_name != "beauty" for pass_name in stale_passes)
+
+    if not structure_is_stale:
+        time_pass("beauty", render_beauty_pass)
+    elif render_beauty and bpy.context.scene.render.engine == "CYCLES":
+        time_pass("beauty+normal+mask+depth+outline", render_multi_pass, True)
+    else:
+        if render_beauty:
+            time_pass("beauty", render_beauty_pass)
+        time_pass("normal+mask+depth+outline", render_multi_pass, False)
+
+
+#
+def time_pass(name: str, render_function, *args):
+    start = time.perf_counter()
+    render_function(*args)
+    pass_timings[name] = time.perf_counter() - start
+
+
+#
+def report_pass_timings():
+    for name, seconds in pass_timings.items():
+        print(f"Rendered {name} in {seconds:.2f}s")
+
+    print(f"Total pass render time: {sum(pass_timings.values()):.2f}s")
+
+
+#
+def remove_pass_images(pass_names_to_remove: list[str]):
+    for pass_name in pass_names_to_remove:
+        pass_images.pop(pass_name, None)
+        filepath = get_pass_filepath(pass_name)
+
+        if os.path.exists(filepath):
+            os.remove(filepath)
 
 
 #
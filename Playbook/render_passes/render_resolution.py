@@ -0,0 +1,64 @@
+import bpy
+from ..properties import model_render_stats
+from ..utilities.utilities import get_scale_resolution_width, get_final_resolutions
+
+original_settings = {}
+
+
+# Resolution the base model generates at, keeping the aspect ratio of the scene
+def get_model_resolution() -> dict:
+    base_model = bpy.context.scene.global_properties.global_model
+    height = model_render_stats[base_model]["Height"]
+
+    return {"x": get_scale_resolution_width(height), "y": height}
+
+
+# Final (height, width) of the passes
+def get_render_size() -> tuple[int, int]:
+    final_resolutions = get_final_resolutions()
+
+    return (int(final_resolutions["y"]), int(final_resolutions["x"]))
+
+
+# How much smaller than the other passes the mask and outline are rendered
+def get_structure_downscale() -> int:
+    return int(bpy.context.scene.capture_properties.structure_downscale)
+
+
+# Step between the buffer pixels the mask and outline are built from. Buffers
+# that were already rendered at the lower resolution use every pixel
+def get_structure_step(buffer_height: int, height: int) -> int:
+    return max(1, buffer_height * get_structure_downscale() // height)
+
+
+#
+def save_resolution_settings():
+    render = bpy.context.scene.render
+
+    original_settings.clear()
+    original_settings.update(
+        {
+            "resolution_x": render.resolution_x,
+            "resolution_y": render.resolution_y,
+            "resolution_percentage": render.resolution_percentage,
+        }
+    )
+
+
+# Render at the resolution the model uses instead of the scene resolution
+def set_model_resolution():
+    render = bpy.context.scene.render
+    model_resolution = get_model_resolution()
+
+    render.resolution_x = model_resolution["x"]
+    render.resolution_y = model_resolution["y"]
+    render.resolution_percentage = 100
+
+
+#
+def reset_resolution_settings():
+    render = bpy.context.scene.render
+
+    render.resolution_x = original_settings["resolution_x"]
+    render.resolution_y = original_settings["resolution_y"]
+    render.resolution_percentage = original_settings["resolution_percentage"]
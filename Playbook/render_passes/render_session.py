@@ -0,0 +1,23 @@
+import bpy
+
+original_settings = {}
+
+
+# Save the render flags the session changes
+def save_session_settings():
+    render = bpy.context.scene.render
+
+    original_settings.clear()
+    original_settings.update({"persistent_data": render.use_persistent_data})
+
+
+# Keep the synced scene and BVH of Cycles between the renders of a capture
+def set_session_settings():
+    render = bpy.context.scene.render
+    render.use_persistent_data = True
+
+
+#
+def reset_session_settings():
+    render = bpy.context.scene.render
+    render.use_persistent_data = original_settings["persistent_data"]
@@ -0,0 +1,146 @@
+import bpy
+from .pass_buffers import pass_buffers, load_viewer_buffer
+from .mask_pass import (
+    save_object_properties,
+    set_object_indeces,
+    reset_object_properties,
+    write_mask_image,
+)
+from .pass_images import create_viewer_node
+from .render_resolution import get_render_size, get_structure_downscale
+from ..objects.objects import visible_objects
+
+original_settings = {}
+
+# Object indices are stored in the red channel of the object colors
+INDEX_COLOR_SCALE = 255
+
+
+# Save the current render settings
+def save_workbench_mask_settings():
+    scene = bpy.context.scene
+    shading = scene.display.shading
+
+    original_settings.clear()
+    original_settings.update(
+        {
+            "render_engine": scene.render.engine,
+            "light": shading.light,
+            "color_type": shading.color_type,
+            "shadows": shading.show_shadows,
+            "cavity": shading.show_cavity,
+            "outline": shading.show_object_outline,
+            "specular": shading.show_specular_highlight,
+            "xray": shading.show_xray,
+            "render_aa": scene.display.render_aa,
+            "dither": scene.render.dither_intensity,
+            "film_transparent": scene.render.film_transparent,
+            "resolution_percentage": scene.render.resolution_percentage,
+        }
+    )
+
+
+# Flat, unlit object colors without anti-aliasing or dithering so every
+# pixel holds the exact color of its object
+def set_workbench_mask_settings():
+    scene = bpy.context.scene
+    shading = scene.display.shading
+
+    scene.render.engine = "BLENDER_WORKBENCH"
+    shading.light = "FLAT"
+    shading.color_type = "OBJECT"
+    shading.show_shadows = False
+    shading.show_cavity = False
+    shading.show_object_outline = False
+    shading.show_specular_highlight = False
+    shading.show_xray = False
+    scene.display.render_aa = "OFF"
+    scene.render.dither_intensity = 0
+    scene.render.film_transparent = True
+    scene.render.resolution_percentage = max(
+        1, scene.render.resolution_percentage // get_structure_downscale()
+    )
+
+
+# Reset the render settings to their previous values
+def reset_workbench_mask_settings():
+    scene = bpy.context.scene
+    shading = scene.display.shading
+
+    scene.render.engine = original_settings["render_engine"]
+    shading.light = original_settings["light"]
+    shading.color_type = original_settings["color_type"]
+    shading.show_shadows = original_settings["shadows"]
+    shading.show_cavity = original_settings["cavity"]
+    shading.show_object_outline = original_settings["outline"]
+    shading.show_specular_highlight = original_settings["specular"]
+    shading.show_xray = original_settings["xray"]
+    scene.display.render_aa = original_settings["render_aa"]
+    scene.render.dither_intensity = original_settings["dither"]
+    scene.render.film_transparent = original_settings["film_transparent"]
+    scene.render.resolution_percentage = original_settings["resolution_percentage"]
+
+
+# Workbench has no object index pass. Write the index into the object color
+def set_object_index_colors():
+    for obj in visible_objects:
+        obj.color = (obj.pass_index / INDEX_COLOR_SCALE, 0, 0, 1)
+
+
+# The image buffer of the render is read from the viewer image
+def create_workbench_mask_compositing():
+    scene = bpy.context.scene
+
+    if not scene.use_nodes:
+        scene.use_nodes = True
+
+    node_tree = scene.node_tree
+    nodes = node_tree.nodes
+    links = node_tree.links
+
+    nodes.clear()
+
+    render_layers_node = nodes.new(type="CompositorNodeRLayers")
+    output_node = nodes.new(type="CompositorNodeComposite")
+
+    links.new(render_layers_node.outputs["Image"], output_node.inputs["Image"])
+    create_viewer_node(nodes, links, render_layers_node.outputs["Image"])
+
+
+#
+def render_workbench_mask_to_file(size: tuple[int, int]):
+    scene = bpy.context.scene
+
+    create_workbench_mask_compositing()
+
+    if scene.camera:
+        bpy.ops.render.render(write_still=False)
+
+        load_viewer_buffer("image")
+        image = pass_buffers["image"]
+        index = image[..., 0] * INDEX_COLOR_SCALE
+        write_mask_image(index, image[..., 3], image, size)
+    else:
+        print("No active camera found in the scene")
+
+
+# Render the mask with Workbench instead of Cycles. Workbench skips the Cycles
+# scene sync, BVH build and kernel setup. It cannot show the textures of a
+# preserved mask
+def render_workbench_mask_pass():
+    # The mask may be rendered smaller than the other passes
+    size = get_render_size()
+
+    save_workbench_mask_settings()
+    save_object_properties()
+
+    # The scene is restored even when the render fails
+    try:
+        set_workbench_mask_settings()
+        set_object_indeces()
+        set_object_index_colors()
+
+        render_workbench_mask_to_file(size)
+    finally:
+        reset_workbench_mask_settings()
+        reset_object_properties()
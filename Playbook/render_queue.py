@@ -0,0 +1,343 @@
+import bpy
+import itertools
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import Future
+from .capture_passes import TransferProgress, download_file
+from .comfy_deploy_api.network import ComfyDeployClient
+from .render_status import failed_run_statuses
+from .result_cache import ResultCache
+from .utilities.utilities import (
+    force_ui_redraw,
+    get_filepath,
+    create_render_filename,
+)
+from .utilities.worker_pool import WorkerPool
+from .workspace import show_render_file
+
+# Finished jobs kept in the queue for the panel
+FINISHED_JOB_LIMIT = 20
+
+# Statuses of jobs that wait for a free slot or are done
+WAITING_STATUS = "Waiting"
+finished_statuses = {"Done", "Failed"}
+
+# Run statuses reported by the server and how they are shown for a job
+run_statuses = {
+    "not-started": "Queued",
+    "queued": "Queued",
+    "started": "Running",
+    "running": "Running",
+    "success": "Downloading",
+}
+
+# Passes sent with every workflow
+workflow_pass_names = ["beauty", "normal", "mask", "depth", "outline"]
+
+
+# One submitted render. The client holds the snapshot of the settings the
+# workflow was prepared with and the job holds the pass images of its capture,
+# so later captures and setting changes don't affect it
+class RenderJob:
+    ids = itertools.count(1)
+
+    def __init__(
+        self,
+        client: ComfyDeployClient,
+        pass_images: dict[str, Future],
+        style_path: str,
+        label: str,
+        use_cached_result: bool = True,
+    ):
+        self.job_id = next(self.ids)
+        self.client = client
+        self.pass_images = pass_images
+        self.style_path = style_path
+        self.label = label
+        self.status = WAITING_STATUS
+        self.run_id = ""
+        self.result_url = ""
+        self.error_message = ""
+        self.created_at = time.time()
+
+        # Identical submissions return the cached result unless a new seed
+        # was asked for
+        self.use_cached_result = use_cached_result
+        self.cache_key = ""
+        self.result_image = b""
+
+        # Batch jobs leave the result to the batch instead of opening it
+        self.opens_render_window = True
+        self.on_finished = None
+
+        client.on_status_changed = self.on_status_changed
+        client.on_result = self.on_result
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in finished_statuses
+
+    #
+    def set_status(self, status: str):
+        self.status = status
+        force_ui_redraw()
+
+        if self.is_finished:
+            if self.on_finished:
+                self.on_finished(self)
+
+            RenderQueue.start_waiting_jobs()
+
+    #
+    def on_status_changed(self, status: str):
+        if status in failed_run_statuses:
+            self.fail(f"Run {status}")
+        else:
+            self.set_status(run_statuses.get(status, status.capitalize()))
+
+    # The result is downloaded and cached off the main thread
+    def on_result(self, result_url: str):
+        self.result_url = result_url
+
+        TransferProgress.show()
+        WorkerPool.submit(
+            download_result,
+            result_url,
+            self.cache_key,
+            f"render {self.job_id}",
+            callback=self.on_result_downloaded,
+        )
+
+    #
+    def on_result_downloaded(self, future):
+        try:
+            self.complete(future.result())
+        except Exception as e:
+            print(f"Failed to download the result of render {self.job_id}: {e}")
+            self.fail("Download failed")
+
+    #
+    def complete(self, result_image: bytes):
+        if self.opens_render_window:
+            WorkerPool.submit(
+                save_render_file,
+                result_image,
+                callback=lambda future: show_render_file(future.result()),
+            )
+        else:
+            self.result_image = result_image
+
+        self.set_status("Done")
+
+    #
+    def fail(self, error_message: str):
+        self.error_message = error_message
+        self.set_status("Failed")
+
+
+# Jobs are sent as soon as a slot is free. Runs on the main thread
+class RenderQueue:
+    jobs: list[RenderJob] = []
+
+    #
+    @classmethod
+    def add_job(cls, job: RenderJob):
+        cls.jobs.append(job)
+        cls.remove_old_jobs()
+        cls.start_waiting_jobs()
+
+    # Jobs that are uploading or running on the server
+    @classmethod
+    def get_active_jobs(cls) -> list[RenderJob]:
+        return [
+            job
+            for job in cls.jobs
+            if job.status != WAITING_STATUS and not job.is_finished
+        ]
+
+    #
+    @classmethod
+    def start_waiting_jobs(cls):
+        concurrency_limit = bpy.context.scene.queue_properties.max_concurrent_jobs
+        free_slots = concurrency_limit - len(cls.get_active_jobs())
+
+        for job in cls.jobs:
+            if free_slots <= 0:
+                break
+
+            if job.status == WAITING_STATUS:
+                start_job(job)
+                free_slots -= 1
+
+    #
+    @classmethod
+    def remove_old_jobs(cls):
+        finished_jobs = [job for job in cls.jobs if job.is_finished]
+
+        for job in finished_jobs[:-FINISHED_JOB_LIMIT]:
+            cls.jobs.remove(job)
+
+    #
+    @classmethod
+    def clear_finished_jobs(cls):
+        cls.jobs = [job for job in cls.jobs if not job.is_finished]
+        force_ui_redraw()
+
+
+# Encoding and uploading the passes happens off the main thread. The job is
+# prepared once its passes are encoded
+def start_job(job: RenderJob):
+    job.set_status("Uploading")
+
+    WorkerPool.submit_when_done(
+        [job.pass_images[pass_name] for pass_name in workflow_pass_names],
+        prepare_job,
+        job,
+        callback=lambda future: on_job_prepared(job, future),
+    )
+
+
+# Runs on a worker thread with the encoded passes in the order of the
+# workflow passes. Returns True when the result of the job was found in the
+# cache
+def prepare_job(job: RenderJob, *pass_data: bytes) -> bool:
+    client = job.client
+
+    for pass_name, data in zip(workflow_pass_names, pass_data):
+        client.save_image(data, pass_name)
+
+    # Ensure the image is saved in a file or it's packed into the blend file
+    if job.style_path:
+        with open(job.style_path, "rb") as style_file:
+            client.save_image(style_file.read(), "style_transfer")
+
+    job.cache_key = client.get_workflow_key()
+
+    if job.use_cached_result:
+        cached_result = ResultCache.get(job.cache_key)
+
+        if cached_result is not None:
+            job.result_image = cached_result
+            return True
+
+    return False
+
+
+# Runs on a worker thread. The result is streamed to a temporary file with
+# retries and its progress is shown in the render panel
+def download_result(url: str, cache_key: str, name: str) -> bytes:
+    file_descriptor, download_path = tempfile.mkstemp(suffix=".png")
+    os.close(file_descriptor)
+
+    try:
+        if not download_file(url, download_path, name):
+            raise RuntimeError(f"Failed to download {url}")
+
+        with open(download_path, "rb") as file:
+            result_image = file.read()
+    finally:
+        os.remove(download_path)
+
+    if cache_key:
+        ResultCache.store(cache_key, result_image)
+
+    return result_image
+
+
+# Runs on a worker thread. Returns the filename of the saved render
+def save_render_file(result_image: bytes) -> str:
+    render_filename = create_render_filename()
+
+    with open(get_filepath(render_filename), "wb") as file:
+        file.write(result_image)
+
+    return render_filename
+
+
+# Called on the main thread once the passes are saved. Credits are only
+# spent on jobs that are sent, not on cached results
+def on_job_prepared(job: RenderJob, future):
+    try:
+        is_cached = future.result()
+    except Exception as e:
+        print(f"Error occurred: {e}")
+        fail_job(job, "RENDER")
+        return
+
+    if is_cached:
+        print(f"Render {job.job_id} was found in the result cache")
+        job.complete(job.result_image)
+        return
+
+    if job.client.reserve_credits() == "CREDITS":
+        fail_job(job, "CREDITS")
+        return
+
+    WorkerPool.submit(
+        job.client.send_workflow,
+        callback=lambda future: on_job_sent(job, future),
+    )
+
+
+# Called on the main thread once the workflow was sent
+def on_job_sent(job: RenderJob, future):
+    try:
+        response = future.result()
+    except Exception as e:
+        print(f"Error occurred: {e}")
+        response = "RENDER"
+
+    if get_workflow_message(response):
+        fail_job(job, response)
+        return
+
+    print(f"Response: {response}")
+    job.run_id = response["run_id"]
+    job.set_status("Queued")
+    job.client.start_render_polling(response)
+
+
+#
+def fail_job(job: RenderJob, response: str):
+    workflow_message = get_workflow_message(response)
+
+    bpy.context.scene.error_message = workflow_message
+    job.fail(workflow_message)
+
+
+#
+def get_workflow_message(response) -> str:
+    if response == "CREDITS":
+        return "You don't have enough credits."
+    elif response == "RENDER":
+        return "Something went wrong."
+
+    return ""
+
+
+#
+def get_active_job_count() -> int:
+    return len(RenderQueue.get_active_jobs())
+
+
+# Status line of the render panel. Several jobs can run at once, so it comes
+# from the whole queue instead of the job that reported last
+def get_queue_status() -> str:
+    active_jobs = RenderQueue.get_active_jobs()
+
+    if len(active_jobs) == 1:
+        return active_jobs[0].status
+
+    if active_jobs:
+        status_counts = Counter(job.status for job in active_jobs)
+        return ", ".join(
+            f"{status} ({count})" for status, count in status_counts.items()
+        )
+
+    finished_jobs = [job for job in RenderQueue.jobs if job.is_finished]
+    if not finished_jobs:
+        return ""
+
+    return "Ready" if finished_jobs[-1].status == "Done" else "Failed"
@@ -1,19 +1,6 @@
-from .utilities.utilities import force_ui_redraw
+# Run statuses after which a run won't change anymore, without a result
+failed_run_statuses = {"failed", "timeout", "cancelled"}
 
 
 class RenderStatus:
     is_rendering = False
-    render_status = ""
-
-    @classmethod
-    def set_render_status(cls, status: str):
-        print(status)
-
-        if status == "not-started":
-            cls.render_status = "Not started"
-        elif status in {"queued", "running", "started"}:
-            cls.render_status = status.capitalize()
-        else:
-            cls.render_status = status
-
-        force_ui_redraw()
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import threading
+from .utilities.utilities import get_user_folder
+
+# Results stay on disk until the cache grows beyond this many bytes
+RESULT_CACHE_SIZE = 512 * 1024 * 1024
+
+
+# Outside the addon folder, which is replaced on updates
+def get_result_cache_folder() -> str:
+    return get_user_folder("DATAFILES", "result_cache")
+
+
+# Rendered images of previous submissions, keyed by everything that was sent.
+# Used from the worker threads. The least recently used results are removed
+# first
+class ResultCache:
+    hits = 0
+    misses = 0
+    lock = threading.Lock()
+
+    # Returns None when the submission wasn't rendered before
+    @classmethod
+    def get(cls, key: str) -> bytes:
+        filepath = get_result_filepath(key)
+
+        try:
+            with open(filepath, "rb") as file:
+                result = file.read()
+
+            # Mark as recently used
+            os.utime(filepath)
+        except OSError:
+            result = None
+
+        with cls.lock:
+            if result is None:
+                cls.misses += 1
+            else:
+                cls.hits += 1
+
+        return result
+
+    #
+    @classmethod
+    def store(cls, key: str, result: bytes):
+        os.makedirs(get_result_cache_folder(), exist_ok=True)
+
+        filepath = get_result_filepath(key)
+        temp_filepath = f"{filepath}.{threading.get_ident()}.tmp"
+
+        with open(temp_filepath, "wb") as file:
+            file.write(result)
+        os.replace(temp_filepath, filepath)
+
+        with cls.lock:
+            evict_results(RESULT_CACHE_SIZE)
+
+
+#
+def get_result_filepath(key: str) -> str:
+    return os.path.join(get_result_cache_folder(), f"{key}.png")
+
+
+# Hash of the account, the workflow endpoint, its inputs and the images sent
+# with it
+def get_result_key(
+    account: str, endpoint: str, render_input: dict, files: dict[str, bytes]
+) -> str:
+    key = hashlib.sha256()
+    key.update(account.encode())
+    key.update(endpoint.encode())
+    key.update(json.dumps(render_input, sort_keys=True).encode())
+
+    for field in sorted(files):
+        key.update(field.encode())
+        key.update(hashlib.sha256(files[field]).digest())
+
+    return key.hexdigest()
+
+
+# Remove the least recently used results until the cache fits in max_size
+def evict_results(max_size: int):
+    entries = []
+    for entry in os.scandir(get_result_cache_folder()):
+        if entry.name.endswith(".png"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total_size = sum(size for _, size, _ in entries)
+
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+
+        try:
+            os.remove(path)
+            total_size -= size
+        except OSError as e:
+            print(f"Failed to remove cached result {path}: {e}")
@@ -0,0 +1,147 @@
+import time
+from concurrent.futures import Future, CancelledError, TimeoutError
+from .properties import set_user_info
+from .version_control import PlaybookVersionControl
+from .utilities.network_utilities import get_user_info
+from .utilities.secret_manager import BlenderSecretsManager
+from .utilities.utilities import force_ui_redraw
+from .utilities.worker_pool import WorkerPool
+
+API_KEY_LENGTH = 36
+
+# Seconds a render waits for the configuration before it gives up
+CONFIGURATION_WAIT_TIMEOUT = 2
+
+# Seconds spent in each phase of the last startup
+startup_timings: dict[str, float] = {}
+
+# Last load of the secrets into the config. Holds True once they are loaded
+configuration_loading: Future = None
+
+
+#
+def time_phase(name: str, function, *args):
+    start = time.perf_counter()
+
+    try:
+        return function(*args)
+    finally:
+        startup_timings[name] = time.perf_counter() - start
+
+
+#
+def report_startup_timings():
+    for name, seconds in startup_timings.items():
+        print(f"Playbook startup {name}: {seconds * 1000:.1f} ms")
+
+    print(f"Playbook startup total: {sum(startup_timings.values()) * 1000:.1f} ms")
+
+
+#
+def is_valid_api_key(api_key: str) -> bool:
+    return len(api_key) == API_KEY_LENGTH
+
+
+# Network setup runs on a worker once registration finished. The UI is filled
+# in when it completes
+def start_network_initialization(api_key: str, current_version: tuple):
+    WorkerPool.submit_when_done(
+        [start_configuration_loading()],
+        initialize_network,
+        api_key,
+        current_version,
+        callback=on_network_initialized,
+    )
+
+
+# Runs on a worker thread once the secrets are loaded. Returns the user info of
+# the API key
+def initialize_network(
+    api_key: str, current_version: tuple, is_configuration_loaded: bool
+):
+    time_phase(
+        "version check",
+        PlaybookVersionControl.check_if_version_up_to_date,
+        current_version,
+    )
+
+    if is_configuration_loaded and is_valid_api_key(api_key):
+        return time_phase("user info", get_user_info, api_key)
+
+    return None
+
+
+# Load the secrets into the config on a worker thread
+def start_configuration_loading() -> Future:
+    global configuration_loading
+    configuration_loading = WorkerPool.submit(load_configuration)
+
+    return configuration_loading
+
+
+# Runs on a worker thread. Returns True when the secrets were loaded
+def load_configuration() -> bool:
+    try:
+        time_phase("secrets", BlenderSecretsManager.load_to_config)
+        return True
+    except Exception as e:
+        print(e)
+        return False
+
+
+# Called on the main thread before a render. Waits a moment for the secrets
+# to load. They are loaded again in the background afterwards, so secrets
+# refreshed after their TTL reach the config and a failed load is retried
+def error_exists_in_configuration(scene) -> bool:
+    if configuration_loading is None:
+        start_configuration_loading()
+
+    try:
+        is_loaded = configuration_loading.result(timeout=CONFIGURATION_WAIT_TIMEOUT)
+    except TimeoutError:
+        scene.error_message = "Still loading the configuration."
+        return True
+    except CancelledError:
+        is_loaded = False
+
+    start_configuration_loading()
+
+    if not is_loaded:
+        scene.error_message = "Failed to load the configuration."
+        return True
+
+    scene.error_message = ""
+    return False
+
+
+#
+def on_network_initialized(future):
+    try:
+        set_user_info(future.result())
+    except Exception as e:
+        print(f"Playbook network setup failed: {e}")
+
+    force_ui_redraw()
+    report_startup_timings()
+
+
+# Fetch the email and credits of the API key without blocking the UI
+def request_user_info(api_key: str):
+    if not is_valid_api_key(api_key):
+        return
+
+    if configuration_loading is None:
+        start_configuration_loading()
+
+    WorkerPool.submit_when_done(
+        [configuration_loading],
+        get_user_info_after_startup,
+        api_key,
+        callback=lambda future: set_user_info(future.result()),
+    )
+
+
+# Runs on a worker thread once the secrets are loaded, since the user info
+# needs them
+def get_user_info_after_startup(api_key: str, is_configuration_loaded: bool):
+    return get_user_info(api_key) if is_configuration_loaded else None
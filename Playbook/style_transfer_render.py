@@ -1,5 +1,11 @@
 import bpy
 import base64
+from .render_passes.pass_images import is_writing_pass_files
+from .utilities.image_utilities import (
+    encode_png,
+    get_image_pixels,
+    apply_scene_view_transform,
+)
 
 original_settings = {}
 
@@ -37,16 +43,24 @@ def reset_style_settings():
     scene.render.image_settings.color_depth = original_settings["color_depth"]
 
 
-#
+# Encode the image as a 16-bit PNG in memory. The file is only written when
+# debugging or when the look can only be applied by Blender
 def render_style_to_file(image, filepath: str):
-    # Save the image as PNG
-    image.filepath_raw = filepath
-    image.file_format = "PNG"
-    image.save_render(filepath)
-
-    # Read the file and encode to Base64
-    with open(filepath, "rb") as image_file:
-        byte_data = image_file.read()
+    pixels = apply_scene_view_transform(get_image_pixels(image), bpy.context.scene)
+
+    if pixels is None:
+        image.filepath_raw = filepath
+        image.file_format = "PNG"
+        image.save_render(filepath)
+
+        with open(filepath, "rb") as image_file:
+            byte_data = image_file.read()
+    else:
+        byte_data = encode_png(pixels, bit_depth=16)
+
+        if is_writing_pass_files():
+            with open(filepath, "wb") as image_file:
+                image_file.write(byte_data)
 
     return base64.b64encode(byte_data)
 
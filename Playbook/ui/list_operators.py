@@ -1,10 +1,11 @@
 import bpy
 from bpy.utils import register_class, unregister_class
 from bpy.types import Operator
-from ..objects.visible_objects import visible_objects, allowed_obj_types
+from ..objects.visible_objects import VisibleObjectIndex, allowed_obj_types
 from ..objects.objects import mask_objects
 
 MAX_MASKS = 7
+MAX_BATCH_VARIANTS = 16
 
 
 #
@@ -110,7 +111,7 @@ class MaskObjectListAddItem(Operator):
             return {"CANCELLED"}
 
         elif mask.object_dropdown == "ADDALL":
-            self.add_all_objects(mask, mask_index)
+            self.add_all_objects(context.scene, mask, mask_index)
             mask.object_dropdown = "NONE"
             return {"FINISHED"}
 
@@ -150,11 +151,13 @@ class MaskObjectListAddItem(Operator):
         return True
 
     # Add all available objects in the scene
-    def add_all_objects(self, mask, mask_index):
-        for obj in visible_objects:
-            if not is_object_part_of_a_mask(obj.name):
+    def add_all_objects(self, scene, mask, mask_index):
+        masked_names = {name for obj_list in mask_objects.values() for name in obj_list}
+
+        for name in list(VisibleObjectIndex.get_names(scene)):
+            if name not in masked_names:
                 added = mask.mask_objects.add()
-                added.name = obj.name
+                added.name = name
                 mask_objects[f"MASK{mask_index + 1}"].append(added.name)
 
 
@@ -218,12 +221,61 @@ class MaskObjectListClearItems(Operator):
         return {"FINISHED"}
 
 
+# Add a batch variant with the current render settings
+class BatchVariantListAddItem(Operator):
+    bl_idname = "list.add_batch_variant"
+    bl_label = ""
+    bl_description = "Add variant"
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.scene.queue_properties.batch_variants) < MAX_BATCH_VARIANTS
+
+    def execute(self, context):
+        scene = context.scene
+        queue_props = scene.queue_properties
+
+        item = queue_props.batch_variants.add()
+        item.prompt = scene.retexture_properties.retexture_prompt
+        item.style = scene.global_properties.global_style
+
+        if scene.global_properties.global_workflow == "RETEXTURE":
+            item.strength = scene.retexture_properties.retexture_structure_strength
+        else:
+            item.strength = scene.style_properties.style_strength
+
+        queue_props.batch_variant_index = len(queue_props.batch_variants) - 1
+
+        return {"FINISHED"}
+
+
+# Remove the selected batch variant
+class BatchVariantListRemoveItem(Operator):
+    bl_idname = "list.remove_batch_variant"
+    bl_label = ""
+    bl_description = "Remove variant"
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.scene.queue_properties.batch_variants) > 0
+
+    def execute(self, context):
+        queue_props = context.scene.queue_properties
+
+        queue_props.batch_variants.remove(queue_props.batch_variant_index)
+        queue_props.batch_variant_index = max(0, queue_props.batch_variant_index - 1)
+
+        return {"FINISHED"}
+
+
 classes = [
     MaskListAddItem,
     MaskListRemoveItem,
     MaskObjectListAddItem,
     MaskObjectListRemoveItem,
     MaskObjectListClearItems,
+    BatchVariantListAddItem,
+    BatchVariantListRemoveItem,
 ]
 
 
@@ -26,6 +26,22 @@ class PB_UL_CustomList(UIList):
             layout.alignment = "CENTER"
 
 
+# Each batch variant is edited in place
+class PB_UL_BatchVariantList(UIList):
+    def draw_item(
+        self, context, layout, data, item, icon, active_data, active_propname, index
+    ):
+        if self.layout_type in {"DEFAULT", "COMPACT"}:
+            row = layout.row(align=True)
+            split = row.split(factor=0.5, align=True)
+            split.prop(item, "prompt", emboss=False)
+            split = split.split(factor=0.5, align=True)
+            split.prop(item, "style")
+            split.prop(item, "strength", slider=True)
+        elif self.layout_type in {"GRID"}:
+            layout.alignment = "CENTER"
+
+
 #
 def reset_list_properties():
     scene = bpy.context.scene
@@ -34,7 +50,12 @@ def reset_list_properties():
     scene.mask_list_index = 0
 
 
-classes = [MaskListItem, MaskObjectListItem, PB_UL_CustomList]
+classes = [
+    MaskListItem,
+    MaskObjectListItem,
+    PB_UL_CustomList,
+    PB_UL_BatchVariantList,
+]
 
 
 def register():
@@ -4,6 +4,7 @@ from bpy.types import Scene
 from .main_panels import *
 from .settings_panels import *
 from .render_panels import *
+from .queue_panels import *
 from .misc_panels import *
 
 classes = [
@@ -19,6 +20,8 @@ classes = [
     AdvancedSettingsPanelRender,
     RenderPanel3D,
     RenderPanelRender,
+    QueuePanel3D,
+    QueuePanelRender,
     LinksPanel3D,
     LinksPanelRender,
 ]
@@ -0,0 +1,146 @@
+import bpy
+from .main_panels import MainPanel3D, MainPanelRender
+from ...render_queue import RenderQueue
+from ...result_cache import ResultCache
+from .panel_utils import (
+    PlaybookPanel3D,
+    PlaybookPanelRender,
+    create_label_row,
+    BOX_PADDING,
+)
+
+
+########## QUEUE PANEL ##########
+def draw_queue_panel(context, layout):
+    box = layout.box()
+    box.separator(factor=BOX_PADDING)
+
+    draw_queue_layout(context.scene, box)
+
+    box.separator(factor=BOX_PADDING)
+
+    draw_batch_layout(context.scene, box)
+
+    box.separator(factor=BOX_PADDING)
+
+    draw_sweep_layout(context.scene, box)
+
+    box.separator(factor=BOX_PADDING)
+
+
+#
+def draw_queue_layout(scene, box):
+    limit_row = box.row()
+    limit_row.separator(factor=BOX_PADDING)
+    limit_row.prop(scene.queue_properties, "max_concurrent_jobs")
+    limit_row.separator(factor=BOX_PADDING)
+
+    cache_row = box.row()
+    cache_row.separator(factor=BOX_PADDING)
+    cache_row.prop(scene.queue_properties, "new_seed")
+    cache_row.label(text=f"Cache: {ResultCache.hits} hits, {ResultCache.misses} misses")
+    cache_row.separator(factor=BOX_PADDING)
+
+    box.separator(factor=BOX_PADDING)
+
+    if not RenderQueue.jobs:
+        create_label_row(box, "No renders queued")
+        return
+
+    # Newest jobs first
+    for job in reversed(RenderQueue.jobs):
+        job_row = box.row()
+        job_row.alert = job.status == "Failed"
+        job_row.separator(factor=BOX_PADDING)
+        split = job_row.split(factor=0.65)
+        split.label(text=f"{job.job_id}. {job.label}")
+        split.label(text=job.error_message or job.status)
+        job_row.separator(factor=BOX_PADDING)
+
+    box.separator(factor=BOX_PADDING)
+
+    clear_row = box.row()
+    clear_row.separator(factor=BOX_PADDING)
+    clear_row.operator("op.clear_finished_renders")
+    clear_row.separator(factor=BOX_PADDING)
+
+
+# Variants rendered together from one capture
+def draw_batch_layout(scene, box):
+    queue_props = scene.queue_properties
+
+    create_label_row(box, "Batch Variants")
+
+    list_row = box.row()
+    list_row.separator(factor=BOX_PADDING)
+    list_row.template_list(
+        "PB_UL_BatchVariantList",
+        "Batch Variant List",
+        queue_props,
+        "batch_variants",
+        queue_props,
+        "batch_variant_index",
+        sort_lock=True,
+    )
+    list_row.separator(factor=BOX_PADDING)
+
+    op_row = box.row()
+    op_row.scale_y = 1.25
+    op_row.separator(factor=BOX_PADDING)
+    op_row.operator("list.add_batch_variant", text="Add")
+    op_row.operator("list.remove_batch_variant", text="Remove")
+    op_row.separator(factor=BOX_PADDING)
+
+    batch_row = box.row()
+    batch_row.scale_y = 1.75
+    batch_row.separator(factor=BOX_PADDING)
+    batch_row.operator("op.render_batch")
+    batch_row.separator(factor=BOX_PADDING)
+
+
+# Strength, style and model combinations rendered as a grid
+def draw_sweep_layout(scene, box):
+    queue_props = scene.queue_properties
+
+    create_label_row(box, "Sweep")
+
+    strength_row = box.row(align=True)
+    strength_row.separator(factor=BOX_PADDING)
+    strength_row.prop(queue_props, "sweep_strength_min")
+    strength_row.prop(queue_props, "sweep_strength_max")
+    strength_row.prop(queue_props, "sweep_strength_steps")
+    strength_row.separator(factor=BOX_PADDING)
+
+    for prop in ["sweep_styles", "sweep_models"]:
+        flag_row = box.row()
+        flag_row.separator(factor=BOX_PADDING)
+        flag_row.prop(queue_props, prop)
+        flag_row.separator(factor=BOX_PADDING)
+
+    sweep_row = box.row()
+    sweep_row.scale_y = 1.75
+    sweep_row.separator(factor=BOX_PADDING)
+    sweep_row.operator("op.render_sweep")
+    sweep_row.separator(factor=BOX_PADDING)
+
+
+#
+class QueuePanel3D(PlaybookPanel3D, bpy.types.Panel):
+    bl_idname = "VIEW_3D_PT_queue"
+    bl_label = "Queue"
+    bl_parent_id = MainPanel3D.bl_idname
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        draw_queue_panel(context, self.layout)
+
+
+#
+class QueuePanelRender(PlaybookPanelRender, bpy.types.Panel):
+    bl_idname = "IMAGE_RENDER_PT_queue"
+    bl_label = "Queue"
+    bl_parent_id = MainPanelRender.bl_idname
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        draw_queue_panel(context, self.layout)
@@ -1,6 +1,7 @@
 import bpy
 from .main_panels import MainPanel3D, MainPanelRender
-from ...render_status import RenderStatus
+from ...render_queue import get_active_job_count, get_queue_status
+from ...capture_passes import TransferProgress
 from ...properties import model_render_stats
 from ...utilities.utilities import get_scale_resolution_width
 from .panel_utils import PlaybookPanel3D, BOX_PADDING, PlaybookPanelRender
@@ -46,10 +47,22 @@ def draw_render_panel(context, layout):
     row1.operator("op.render_image")
     row1.separator(factor=BOX_PADDING)
 
-    if RenderStatus.render_status:
+    queue_status = get_queue_status()
+    if queue_status:
         row_label = box.row()
         row_label.alignment = "CENTER"
-        row_label.label(text=f"Status: {RenderStatus.render_status}")
+        row_label.label(text=f"Status: {queue_status}")
+
+    for progress_label in TransferProgress.get_progress_labels():
+        progress_row = box.row()
+        progress_row.alignment = "CENTER"
+        progress_row.label(text=progress_label)
+
+    active_job_count = get_active_job_count()
+    if active_job_count:
+        queue_row = box.row()
+        queue_row.alignment = "CENTER"
+        queue_row.operator("op.queue", text=f"{active_job_count} in progress")
 
     if scene.error_message:
         error_row = box.row()
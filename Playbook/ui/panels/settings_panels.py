@@ -142,6 +142,46 @@ def draw_advanced_settings_panel(context, layout):
 
         box.separator(factor=BOX_PADDING)
 
+    draw_capture_layout(scene, box)
+
+
+#
+def draw_capture_layout(scene, box):
+    create_label_row(box, "Pass Capture")
+    capture_row = box.row()
+    capture_row.scale_y = 1.25
+    capture_row.separator(factor=BOX_PADDING)
+    capture_row.prop(scene.capture_properties, "capture_mode")
+    capture_row.separator(factor=BOX_PADDING)
+
+    for prop in [
+        "render_at_model_resolution",
+        "structure_downscale",
+        "mask_backend",
+        "write_pass_files",
+    ]:
+        resolution_row = box.row()
+        resolution_row.separator(factor=BOX_PADDING)
+        resolution_row.prop(scene.capture_properties, prop)
+        resolution_row.separator(factor=BOX_PADDING)
+
+    box.separator(factor=BOX_PADDING)
+
+    create_label_row(box, "Outline")
+    for prop in [
+        "outline_threshold",
+        "outline_depth_weight",
+        "outline_normal_weight",
+        "outline_position_weight",
+        "outline_bit_depth",
+    ]:
+        outline_row = box.row()
+        outline_row.separator(factor=BOX_PADDING)
+        outline_row.prop(scene.capture_properties, prop)
+        outline_row.separator(factor=BOX_PADDING)
+
+    box.separator(factor=BOX_PADDING)
+
 
 #
 def draw_mask_layout(scene, box):
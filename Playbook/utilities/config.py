@@ -0,0 +1,68 @@
+import os
+import threading
+
+env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
+
+
+# Settings of the addon, looked up by key. Preferences come first, then the
+# secrets, the environment and the .env file. The .env file is parsed
+# once and again only when it changes. Used from worker threads as well as
+# the main thread
+class Config:
+    env_values: dict[str, str] = {}
+    env_mtime: float = None
+    secrets: dict[str, str] = {}
+    preferences: dict[str, str] = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key: str, default: str = None) -> str:
+        with cls.lock:
+            cls.reload_if_changed()
+
+            for values in (cls.preferences, cls.secrets, os.environ, cls.env_values):
+                if key in values:
+                    return values[key]
+
+        return default
+
+    # Called with the lock held
+    @classmethod
+    def reload_if_changed(cls):
+        try:
+            mtime = os.stat(env_path).st_mtime
+        except OSError:
+            mtime = None
+
+        if mtime == cls.env_mtime:
+            return
+
+        cls.env_mtime = mtime
+        cls.env_values = load_env_file() if mtime is not None else {}
+
+    # Values of the secret, replacing the last ones
+    @classmethod
+    def set_secrets(cls, secret: dict):
+        with cls.lock:
+            cls.secrets = {key: str(value) for key, value in secret.items()}
+
+    # Called on the main thread whenever the preferences change
+    @classmethod
+    def set_preferences(cls, addon_preferences):
+        with cls.lock:
+            cls.preferences = {"API_KEY": addon_preferences.api_key}
+
+    @classmethod
+    def has_preferences(cls) -> bool:
+        return bool(cls.preferences)
+
+
+#
+def load_env_file() -> dict[str, str]:
+    from dotenv import dotenv_values
+
+    return {
+        key: value
+        for key, value in dotenv_values(dotenv_path=env_path).items()
+        if value is not None
+    }
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+# requests is imported with the first session, so enabling the addon stays fast
+if TYPE_CHECKING:
+    import requests
+
+# Seconds to wait for a connection and for each read of the response
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+
+# Uploads and downloads of whole images or the addon may take longer
+TRANSFER_READ_TIMEOUT = 300
+
+# Attempts of each upload or download. Failed attempts wait twice as long as
+# the last one before retrying
+TRANSFER_ATTEMPTS = 3
+TRANSFER_RETRY_DELAY = 1
+
+# Downloads are written to disk and uploads are sent in chunks of this many
+# bytes
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Hosts that keep a pool of open connections
+POOLED_HOST_COUNT = 8
+
+# Open connections per host. Further requests wait for a free connection
+CONNECTIONS_PER_HOST = 4
+
+
+# One keep-alive session shared by every Playbook network call, so requests
+# to the same host reuse their TCP and TLS connection
+class HttpClient:
+    session: "requests.Session" = None
+    lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls) -> "requests.Session":
+        with cls.lock:
+            if cls.session is None:
+                cls.session = create_session()
+
+            return cls.session
+
+    # Same arguments as requests.request. Requests without a timeout use the
+    # default connect and read timeouts
+    @classmethod
+    def request(cls, method: str, url: str, **kwargs) -> "requests.Response":
+        kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+
+        return cls.get_session().request(method, url, **kwargs)
+
+    @classmethod
+    def get(cls, url: str, **kwargs) -> "requests.Response":
+        return cls.request("GET", url, **kwargs)
+
+    @classmethod
+    def post(cls, url: str, **kwargs) -> "requests.Response":
+        return cls.request("POST", url, **kwargs)
+
+    @classmethod
+    def put(cls, url: str, **kwargs) -> "requests.Response":
+        return cls.request("PUT", url, **kwargs)
+
+    # Stream the response to the file in chunks. The file only appears once
+    # it is complete. The progress callback gets the bytes written and the
+    # expected size, which is 0 when unknown
+    @classmethod
+    def download(cls, url: str, save_path: str, on_progress=None, **kwargs):
+        kwargs.setdefault("timeout", (CONNECT_TIMEOUT, TRANSFER_READ_TIMEOUT))
+        partial_path = f"{save_path}.part"
+
+        try:
+            with cls.get(url, stream=True, **kwargs) as response:
+                response.raise_for_status()
+                size = int(response.headers.get("Content-Length", 0))
+                written = 0
+
+                with open(partial_path, "wb") as file:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        file.write(chunk)
+                        written += len(chunk)
+
+                        if on_progress:
+                            on_progress(written, size)
+
+            os.replace(partial_path, save_path)
+
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+    # Close the pooled connections
+    @classmethod
+    def close(cls):
+        with cls.lock:
+            if cls.session is not None:
+                cls.session.close()
+                cls.session = None
+
+
+# Request body that reports the bytes sent to the progress callback, with the
+# sent bytes and the size of the data
+class ProgressBody:
+    def __init__(self, data: bytes, on_progress):
+        self.data = memoryview(data)
+        self.on_progress = on_progress
+
+    # A known length lets requests send a Content-Length instead of chunks
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self):
+        for start in range(0, len(self.data), UPLOAD_CHUNK_SIZE):
+            chunk = self.data[start : start + UPLOAD_CHUNK_SIZE]
+            yield chunk
+
+            self.on_progress(start + len(chunk), len(self.data))
+
+
+#
+def create_session() -> "requests.Session":
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+
+    # Responses are decompressed by requests
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+
+    adapter = HTTPAdapter(
+        pool_connections=POOLED_HOST_COUNT,
+        pool_maxsize=CONNECTIONS_PER_HOST,
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+# Run the transfer again when it fails with a connection problem or a server
+# error. Client errors, like an expired signed URL, are raised at once
+def retry_transfer(transfer, *args, **kwargs):
+    import requests
+
+    for attempt in range(1, TRANSFER_ATTEMPTS + 1):
+        try:
+            return transfer(*args, **kwargs)
+
+        except requests.exceptions.RequestException as e:
+            response = getattr(e, "response", None)
+            is_client_error = response is not None and response.status_code < 500
+
+            if is_client_error or attempt == TRANSFER_ATTEMPTS:
+                raise
+
+            print(f"Transfer failed ({attempt}/{TRANSFER_ATTEMPTS}), retrying: {e}")
+            time.sleep(TRANSFER_RETRY_DELAY * 2 ** (attempt - 1))
+
+
+def unregister():
+    HttpClient.close()
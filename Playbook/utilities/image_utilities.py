@@ -0,0 +1,208 @@
+import bpy
+import math
+import struct
+import zlib
+import numpy as np
+from .bitmap_font import draw_text, get_text_height
+
+# PNG color type for each number of channels
+png_color_types = {1: 0, 2: 4, 3: 2, 4: 6}
+
+
+# Read the pixels of an image file into a (height, width, 4) float array.
+# Rows are flipped so the first row is the top of the image
+def read_image_pixels(filepath: str) -> np.ndarray:
+    image = bpy.data.images.load(filepath, check_existing=False)
+    image.colorspace_settings.is_data = True
+
+    try:
+        return get_image_pixels(image)
+    finally:
+        bpy.data.images.remove(image)
+
+
+# Copy the pixels of a loaded image into a (height, width, 4) float array.
+# Rows are flipped so the first row is the top of the image. The given buffer
+# is reused when it has the right size
+def get_image_pixels(image, buffer: np.ndarray = None) -> np.ndarray:
+    width, height = image.size
+
+    if buffer is None or buffer.size != width * height * 4:
+        buffer = np.empty(width * height * 4, dtype=np.float32)
+
+    image.pixels.foreach_get(buffer)
+
+    return np.flipud(buffer.reshape(height, width, 4))
+
+
+# Convert linear values to the sRGB transfer the 'Standard' view transform uses
+def linear_to_srgb(values: np.ndarray) -> np.ndarray:
+    values = np.clip(values, 0, 1)
+
+    return np.where(
+        values <= 0.0031308,
+        values * 12.92,
+        1.055 * np.power(values, 1 / 2.4) - 0.055,
+    )
+
+
+# Convert premultiplied alpha to the straight alpha PNGs store
+def unpremultiply(pixels: np.ndarray) -> np.ndarray:
+    alpha = pixels[..., 3:]
+    color = np.divide(
+        pixels[..., :3], alpha, out=np.zeros_like(pixels[..., :3]), where=alpha > 0
+    )
+
+    return np.concatenate([color, alpha], axis=-1)
+
+
+# Apply the 'Standard' view transform with the exposure and gamma of the
+# given view settings to linear pixels. Returns None for view transforms,
+# looks and displays that can only be applied by Blender
+def apply_standard_view_transform(
+    pixels: np.ndarray, view_settings: dict, display_device: str
+) -> np.ndarray:
+    if (
+        view_settings["view_transform"] != "Standard"
+        or view_settings["look"] != "None"
+        or view_settings.get("use_curve_mapping")
+        or display_device != "sRGB"
+    ):
+        return None
+
+    pixels = unpremultiply(pixels)
+    color = pixels[..., :3] * 2 ** view_settings["exposure"]
+    color = linear_to_srgb(color) ** (1 / view_settings["gamma"])
+
+    return np.concatenate([color, pixels[..., 3:]], axis=-1)
+
+
+# Apply the color management of the scene to linear pixels. Returns None
+# when only Blender can apply it
+def apply_scene_view_transform(pixels: np.ndarray, scene) -> np.ndarray:
+    view_settings = scene.view_settings
+
+    return apply_standard_view_transform(
+        pixels,
+        {
+            "view_transform": view_settings.view_transform,
+            "look": view_settings.look,
+            "exposure": view_settings.exposure,
+            "gamma": view_settings.gamma,
+            "use_curve_mapping": view_settings.use_curve_mapping,
+        },
+        scene.display_settings.display_device,
+    )
+
+
+# Encode a (height, width) or (height, width, channels) array of values in
+# [0, 1] as a PNG. The first row is the top of the image. A bit depth of 1
+# writes a black and white image and requires a single channel
+def encode_png(
+    pixels: np.ndarray, bit_depth: int = 8, compression_level: int = 6
+) -> bytes:
+    if pixels.ndim == 2:
+        pixels = pixels[..., np.newaxis]
+
+    height, width, channels = pixels.shape
+
+    if bit_depth == 1:
+        if channels != 1:
+            raise ValueError("1-bit PNGs require a single channel")
+
+        rows = np.packbits(pixels[..., 0] >= 0.5, axis=1)
+    else:
+        max_value = (1 << bit_depth) - 1
+        dtype = ">u2" if bit_depth == 16 else np.uint8
+        values = np.rint(np.clip(pixels, 0, 1) * max_value).astype(dtype)
+        rows = values.reshape(height, -1).view(np.uint8)
+
+    # Every row starts with filter type 0 (None)
+    scanlines = np.zeros((height, rows.shape[1] + 1), dtype=np.uint8)
+    scanlines[:, 1:] = rows
+
+    header = struct.pack(
+        ">IIBBBBB", width, height, bit_depth, png_color_types[channels], 0, 0, 0
+    )
+    data = zlib.compress(scanlines.tobytes(), compression_level)
+
+    return b"".join(
+        [
+            b"\x89PNG\r\n\x1a\n",
+            create_png_chunk(b"IHDR", header),
+            create_png_chunk(b"IDAT", data),
+            create_png_chunk(b"IEND", b""),
+        ]
+    )
+
+
+#
+def create_png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(chunk_type + data) & 0xFFFFFFFF
+
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+
+#
+def write_png(filepath: str, pixels: np.ndarray, bit_depth: int = 8):
+    with open(filepath, "wb") as file:
+        file.write(encode_png(pixels, bit_depth))
+
+
+# Keep every step-th pixel in both directions
+def downsample_nearest(pixels: np.ndarray, step: int) -> np.ndarray:
+    return pixels[::step, ::step]
+
+
+# Scale an image up to (height, width) by repeating the nearest pixel
+def upsample_nearest(pixels: np.ndarray, height: int, width: int) -> np.ndarray:
+    if pixels.shape[:2] == (height, width):
+        return pixels
+
+    rows = np.arange(height) * pixels.shape[0] // height
+    columns = np.arange(width) * pixels.shape[1] // width
+
+    return pixels[rows[:, np.newaxis], columns]
+
+
+# Place (height, width, 4) images in a grid, row by row. Images smaller than
+# the largest one are placed in the top left of their cell and missing images
+# leave their cell empty. Each label is written above its image
+def create_contact_sheet(
+    images: list, columns: int = 0, spacing: int = 8, labels: list[str] = None
+) -> np.ndarray:
+    columns = columns or math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / columns)
+    cell_height = max(image.shape[0] for image in images if image is not None)
+    cell_width = max(image.shape[1] for image in images if image is not None)
+
+    # Labels stay readable at the size the sheet is viewed at
+    label_scale = max(1, cell_width // 256)
+    label_height = get_text_height(label_scale) + spacing if labels else 0
+
+    row_height = label_height + cell_height + spacing
+    column_width = cell_width + spacing
+
+    sheet = np.zeros(
+        (rows * row_height + spacing, columns * column_width + spacing, 4),
+        dtype=np.float32,
+    )
+    sheet[..., 3] = 1
+
+    for index, image in enumerate(images):
+        row, column = divmod(index, columns)
+        top = spacing + row * row_height
+        left = spacing + column * column_width
+
+        if labels:
+            draw_text(
+                sheet[:, : left + cell_width], labels[index], top, left, label_scale
+            )
+
+        if image is not None:
+            height, width = image.shape[:2]
+            sheet[
+                top + label_height : top + label_height + height, left : left + width
+            ] = image
+
+    return sheet
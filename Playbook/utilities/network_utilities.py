@@ -1,30 +1,128 @@
-import os
 import json
 import base64
-import requests
-from dotenv import load_dotenv
+import threading
+import time
+from typing import TYPE_CHECKING
+from .worker_pool import WorkerPool
+from .http_client import HttpClient
+from .config import Config
 
+if TYPE_CHECKING:
+    import requests
 
-def get_user_info(api_key: str):
-    # Determine the path to the .env file
-    env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
+# Tokens are refreshed this many seconds before they expire
+TOKEN_EXPIRY_MARGIN = 60
+
+# Tokens close to expiring are refreshed in the background while still used
+TOKEN_REFRESH_WINDOW = 300
+
+
+# Access token of the API key, shared by every network call. Used from
+# worker threads as well as the main thread
+class AccessToken:
+    api_key = ""
+    token = ""
+    expires_at = 0.0
+    is_refreshing = False
+    fetch_count = 0
+    lock = threading.Lock()
+
+    # Held while a token is fetched, so only one fetch runs at a time
+    fetch_lock = threading.Lock()
+
+    # Returns the cached token while it is valid and fetches a new one
+    # otherwise
+    @classmethod
+    def get(cls, api_key: str) -> str:
+        with cls.lock:
+            remaining = cls.expires_at - time.time()
+            is_cached = api_key == cls.api_key and remaining > TOKEN_EXPIRY_MARGIN
+
+            if is_cached and remaining < TOKEN_REFRESH_WINDOW and not cls.is_refreshing:
+                cls.is_refreshing = True
+                WorkerPool.submit(cls.refresh, api_key)
+
+            if is_cached:
+                return cls.token
+
+        return cls.refresh(api_key)
+
+    # Fetch a new token for the API key. Callers that arrive while a token is
+    # fetched wait for it and use it instead of fetching their own
+    @classmethod
+    def refresh(cls, api_key: str) -> str:
+        with cls.lock:
+            fetch_count = cls.fetch_count
+
+        with cls.fetch_lock:
+            with cls.lock:
+                if (
+                    cls.fetch_count != fetch_count
+                    and cls.api_key == api_key
+                    and cls.expires_at - time.time() > TOKEN_EXPIRY_MARGIN
+                ):
+                    cls.is_refreshing = False
+                    return cls.token
 
-    # Load the .env file
-    load_dotenv(dotenv_path=env_path)
+            try:
+                jwt_request = HttpClient.get(Config.get("ALIAS_URL") + api_key)
+                token = jwt_request.json()["access_token"]
+            finally:
+                with cls.lock:
+                    cls.is_refreshing = False
 
+            with cls.lock:
+                cls.api_key = api_key
+                cls.token = token
+                cls.expires_at = get_token_expiry(token)
+                cls.fetch_count += 1
+
+        return token
+
+    # The server rejected the token
+    @classmethod
+    def invalidate(cls):
+        with cls.lock:
+            cls.expires_at = 0.0
+
+
+# Send a request with the access token. A rejected token is refreshed and
+# the request is sent once more
+def send_with_access_token(api_key: str, send_request) -> "requests.Response":
+    response = send_request(AccessToken.get(api_key))
+
+    if response.status_code == 401:
+        AccessToken.invalidate()
+        response = send_request(AccessToken.get(api_key))
+
+    return response
+
+
+# Seconds since the epoch at which the token expires. Tokens without an
+# expiry are not cached
+def get_token_expiry(token: str) -> float:
     try:
-        alias_url = os.getenv("ALIAS_URL")
-        jwt_request = requests.get(alias_url + api_key)
+        return float(json.loads(decode_jwt(token)).get("exp", 0))
+    except (ValueError, IndexError):
+        return 0.0
+
 
-        access_token = jwt_request.json()["access_token"]
+def get_user_info(api_key: str):
+    try:
+        access_token = AccessToken.get(api_key)
         decoded_jwt = decode_jwt(access_token)
 
         decoded_json = json.loads(decoded_jwt)
         username = decoded_json["username"]
 
-        url = os.getenv("USER_URL").replace("*", username)
-        headers = {"authorization": access_token, "x-api-key": os.getenv("X_API_KEY")}
-        jwt_request = requests.get(url=url, headers=headers)
+        url = Config.get("USER_URL").replace("*", username)
+        jwt_request = send_with_access_token(
+            api_key,
+            lambda token: HttpClient.get(
+                url=url,
+                headers={"authorization": token, "x-api-key": Config.get("X_API_KEY")},
+            ),
+        )
         request_data = jwt_request.json()
 
         return {
@@ -1,42 +1,80 @@
-import boto3
-from botocore.exceptions import ClientError
 import json
 import os
+import threading
+import time
 from typing import Dict, Any
 from pathlib import Path
-from dotenv import load_dotenv
+from .worker_pool import WorkerPool
+from .config import Config
+from .utilities import get_user_folder
 
-## load .env file
-env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
-load_dotenv(dotenv_path=env_path)
+## secrets are kept here between sessions, readable by the user only
+def get_cache_path() -> str:
+    return os.path.join(get_user_folder('CONFIG'), "secrets_cache.json")
 
 class BlenderSecretsManager:
     """
-    AWS Secrets Manager client
+    AWS Secrets Manager client. Fetched secrets are cached in memory and in
+    a local file, and refreshed in the background once they are older than
+    SECRETS_TTL seconds
     """
     DEFAULT_REGION = "us-east-2"
-    
+    SECRETS_TTL = 60 * 60
+
+    _clients: Dict[str, Any] = {}
+    _secrets: Dict[str, Dict[str, Any]] = {}
+    _fetched_at: Dict[str, float] = {}
+    _refreshing = set()
+    _lock = threading.Lock()
+
+    ## advanced by invalidate, so fetches started before are dropped
+    _generation = 0
+
+    @staticmethod
+    def _get_secret_name(secret_name: str = None) -> str:
+        secret_name = secret_name or Config.get('SECRET_NAME')
+        if not secret_name:
+            raise Exception("SECRET_NAME is not configured")
+
+        return secret_name
+
     @staticmethod
-    def _get_client(region_name: str = DEFAULT_REGION) -> boto3.client:
+    def _get_client(region_name: str = DEFAULT_REGION):
+        with BlenderSecretsManager._lock:
+            client = BlenderSecretsManager._clients.get(region_name)
+            if client is not None:
+                return client
+
+        ## created without the lock, so reading the cached secrets doesn't wait on
+        ## the slow boto3 import. boto3 is only loaded for the first fetch
         try:
+            import boto3
+
             session = boto3.session.Session(
-                aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-                aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
+                aws_access_key_id=Config.get('AWS_ACCESS_KEY_ID'),
+                aws_secret_access_key=Config.get('AWS_SECRET_ACCESS_KEY'),
                 region_name=region_name
             )
-            return session.client('secretsmanager')
-            
+            client = session.client('secretsmanager')
+
         except Exception as e:
             raise Exception(f"Failed to initialize AWS client: {str(e)}")
 
+        ## a client created by another thread meanwhile is kept
+        with BlenderSecretsManager._lock:
+            return BlenderSecretsManager._clients.setdefault(region_name, client)
+
     @staticmethod
-    def get_secret(secret_name: str = os.environ['SECRET_NAME'], region_name: str = DEFAULT_REGION) -> Dict[str, Any]:
+    def _fetch_secret(secret_name: str, region_name: str = DEFAULT_REGION) -> Dict[str, Any]:
+        from botocore.exceptions import ClientError
+
+        generation = BlenderSecretsManager._generation
         client = BlenderSecretsManager._get_client(region_name)
         try:
             response = client.get_secret_value(SecretId=secret_name)
-            
+
             if 'SecretString' in response:
-                return json.loads(response['SecretString'])
+                secret = json.loads(response['SecretString'])
             else:
                 raise ValueError(f"Secret {secret_name} has no SecretString")
         except ClientError as e:
@@ -48,19 +86,126 @@ class BlenderSecretsManager:
         except Exception as e:
             raise Exception(f"Unexpected error accessing secret: {str(e)}")
 
+        BlenderSecretsManager._store_secret(secret_name, secret, time.time(), generation)
+        return secret
+
+    @staticmethod
+    def get_secret(secret_name: str = None, region_name: str = DEFAULT_REGION) -> Dict[str, Any]:
+        """
+        Returns the cached secret. A secret older than the TTL is still
+        returned while a new one is fetched in the background. The secret is
+        only fetched right away when it was never cached
+        """
+        secret_name = BlenderSecretsManager._get_secret_name(secret_name)
+
+        with BlenderSecretsManager._lock:
+            if secret_name not in BlenderSecretsManager._secrets:
+                BlenderSecretsManager._load_cache_file()
+
+            secret = BlenderSecretsManager._secrets.get(secret_name)
+            fetched_at = BlenderSecretsManager._fetched_at.get(secret_name, 0)
+
+        if secret is None:
+            return BlenderSecretsManager._fetch_secret(secret_name, region_name)
+
+        if time.time() - fetched_at > BlenderSecretsManager.SECRETS_TTL:
+            BlenderSecretsManager.refresh(secret_name, region_name)
+
+        return secret
+
+    @staticmethod
+    def refresh(secret_name: str = None, region_name: str = DEFAULT_REGION) -> None:
+        """
+        Fetch the secret again on a worker thread
+        """
+        secret_name = BlenderSecretsManager._get_secret_name(secret_name)
+
+        with BlenderSecretsManager._lock:
+            if secret_name in BlenderSecretsManager._refreshing:
+                return
+            BlenderSecretsManager._refreshing.add(secret_name)
+
+        def refresh_secret():
+            try:
+                BlenderSecretsManager._fetch_secret(secret_name, region_name)
+            except Exception as e:
+                print(f"Failed to refresh secret {secret_name}: {str(e)}")
+            finally:
+                with BlenderSecretsManager._lock:
+                    BlenderSecretsManager._refreshing.discard(secret_name)
+
+        WorkerPool.submit(refresh_secret)
+
+    @staticmethod
+    def invalidate() -> None:
+        """
+        Forget the cached secrets, so they are fetched on next use
+        """
+        with BlenderSecretsManager._lock:
+            BlenderSecretsManager._generation += 1
+            BlenderSecretsManager._secrets.clear()
+            BlenderSecretsManager._fetched_at.clear()
+
+            try:
+                os.remove(get_cache_path())
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Failed to remove the secrets cache: {str(e)}")
+
+    @staticmethod
+    def _store_secret(secret_name: str, secret: Dict[str, Any], fetched_at: float, generation: int) -> None:
+        with BlenderSecretsManager._lock:
+            ## fetched before the cache was invalidated
+            if generation != BlenderSecretsManager._generation:
+                return
+
+            BlenderSecretsManager._secrets[secret_name] = secret
+            BlenderSecretsManager._fetched_at[secret_name] = fetched_at
+
+            cache = {
+                name: {"secret": value, "fetched_at": BlenderSecretsManager._fetched_at[name]}
+                for name, value in BlenderSecretsManager._secrets.items()
+            }
+
+            ## only the user can read or write the cache
+            cache_path = get_cache_path()
+            temp_path = f"{cache_path}.tmp"
+            try:
+                file_descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(file_descriptor, "w") as cache_file:
+                    json.dump(cache, cache_file)
+                os.replace(temp_path, cache_path)
+            except OSError as e:
+                print(f"Failed to save the secrets cache: {str(e)}")
+
+    @staticmethod
+    def _load_cache_file() -> None:
+        """
+        Called with the lock held. Keeps secrets that are already in memory
+        """
+        try:
+            with open(get_cache_path(), "r") as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+
+        for name, entry in cache.items():
+            if name not in BlenderSecretsManager._secrets:
+                BlenderSecretsManager._secrets[name] = entry["secret"]
+                BlenderSecretsManager._fetched_at[name] = entry["fetched_at"]
+
     @staticmethod
-    def load_to_env(secret_name: str = os.environ['SECRET_NAME']) -> None:
+    def load_to_config(secret_name: str = None) -> None:
         try:
-            response = BlenderSecretsManager.get_secret(secret_name)
-            for key, value in response.items():
-                os.environ[key] = str(value)
+            Config.set_secrets(BlenderSecretsManager.get_secret(secret_name))
         except Exception as e:
-            raise Exception(f"Failed to load environment variables from {env_path}: {str(e)}")
+            raise Exception(f"Failed to load the configuration from secrets: {str(e)}")
 
     @staticmethod
     def get_secret_value(
         key: str,
-        secret_name: str = os.environ['SECRET_NAME'],
+        secret_name: str = None,
         region_name: str = DEFAULT_REGION,
         default: Any = None
     ) -> Any:
@@ -1,36 +1,25 @@
 import bpy
 import os
 import math
-import requests
 import uuid
-from dotenv import load_dotenv
+from .http_client import HttpClient, retry_transfer
+from .config import Config
 from .. import __package__ as base_package
 
 
-preferences = None
-
-
 def get_env(key):
-    # Determine the path to the .env file
-    env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
-
-    # Load the .env file
-    load_dotenv(dotenv_path=env_path)
-
-    return os.getenv(key)
+    return Config.get(key)
 
 
 def get_api_key() -> str:
-    global preferences
-
-    if not preferences:
+    if not Config.has_preferences():
         addon = bpy.context.preferences.addons.get(base_package)
         if addon:
-            preferences = addon.preferences
+            Config.set_preferences(addon.preferences)
         else:
             print(f"Could not get user preferences!")
 
-    return preferences.api_key
+    return Config.get("API_KEY", "")
 
 
 #
@@ -58,6 +47,15 @@ def get_parent_filepath(filename, folder=""):
     return os.path.join(dir, folder, filename)
 
 
+# Folder of Blender's user resources for files kept between sessions. It is
+# outside the addon folder, so updates and packaging don't touch it. It
+# doesn't use Blender data, so it can be called from worker threads
+def get_user_folder(resource_type: str, folder: str = "") -> str:
+    return bpy.utils.user_resource(
+        resource_type, path=os.path.join("playbook", folder), create=True
+    )
+
+
 #
 def get_filepath(filename, folder=""):
     dir = os.path.dirname(__file__)
@@ -131,17 +129,17 @@ def color_to_hex(color) -> str:
     return hex_color
 
 
-# Function to download the image from a URL and save it locally
-def download_image(url, save_path):
+# Function to download the image from a URL and save it locally.
+# Returns True if the image was saved
+def download_image(url, save_path) -> bool:
     try:
         print(f"URL: {url}")
-        response = requests.get(url)
-        response.raise_for_status()  # Check if the request was successful
-        with open(save_path, "wb") as file:
-            file.write(response.content)
+        retry_transfer(HttpClient.download, url, save_path)
         print(f"Image downloaded successfully and saved to {save_path}")
+        return True
     except Exception as e:
         print(f"Failed to download the image: {e}")
+        return False
 
 
 # Function to load the image into Blender
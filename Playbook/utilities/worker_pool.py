@@ -0,0 +1,134 @@
+import bpy
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+WORKER_COUNT = 4
+COMPLETION_CHECK_INTERVAL = 0.1
+
+
+# Runs encoding and network work off the main thread. Blender data can only
+# be used from the main thread, so work functions must not touch bpy and
+# callbacks are handed back through a timer instead
+class WorkerPool:
+    executor: ThreadPoolExecutor = None
+    completed: queue.SimpleQueue = queue.SimpleQueue()
+    pending_callbacks = 0
+
+    # Run the function on a worker thread. The callback is called on the main
+    # thread with the finished future. Callbacks can only be added from the
+    # main thread
+    @classmethod
+    def submit(cls, function, *args, callback=None) -> Future:
+        future = cls.get_executor().submit(function, *args)
+
+        if callback:
+            cls.add_callback(future, callback)
+
+        return future
+
+    # Run the function on a worker thread once every future is done, with
+    # their results after the arguments. Workers don't wait on each other
+    # this way. The returned future fails if one of the futures failed
+    @classmethod
+    def submit_when_done(
+        cls, futures: list[Future], function, *args, callback=None
+    ) -> Future:
+        executor = cls.get_executor()
+        chained = Future()
+        remaining = len(futures)
+        lock = threading.Lock()
+
+        # Called on the thread that finished the future
+        def on_future_done(_):
+            nonlocal remaining
+
+            with lock:
+                remaining -= 1
+                if remaining > 0:
+                    return
+
+            try:
+                results = [future.result() for future in futures]
+                executor.submit(function, *args, *results).add_done_callback(
+                    lambda done: copy_future_outcome(done, chained)
+                )
+            except Exception as e:
+                chained.set_exception(e)
+
+        if callback:
+            cls.add_callback(chained, callback)
+
+        for future in futures:
+            future.add_done_callback(on_future_done)
+
+        return chained
+
+    #
+    @classmethod
+    def get_executor(cls) -> ThreadPoolExecutor:
+        if cls.executor is None:
+            cls.executor = ThreadPoolExecutor(
+                max_workers=WORKER_COUNT, thread_name_prefix="Playbook"
+            )
+
+        return cls.executor
+
+    # Called on the main thread
+    @classmethod
+    def add_callback(cls, future: Future, callback):
+        cls.pending_callbacks += 1
+        future.add_done_callback(lambda done: cls.completed.put((callback, done)))
+
+        if not bpy.app.timers.is_registered(process_completed_work):
+            bpy.app.timers.register(process_completed_work, first_interval=0)
+
+    # Cancel the work that has not started yet
+    @classmethod
+    def shutdown(cls):
+        if cls.executor is not None:
+            cls.executor.shutdown(wait=False, cancel_futures=True)
+            cls.executor = None
+
+
+# A future that already holds its result
+def completed_future(result) -> Future:
+    future = Future()
+    future.set_result(result)
+
+    return future
+
+
+# Give the target the result or exception of the finished future
+def copy_future_outcome(finished: Future, target: Future):
+    if finished.cancelled():
+        target.cancel()
+    elif finished.exception() is not None:
+        target.set_exception(finished.exception())
+    else:
+        target.set_result(finished.result())
+
+
+# Call the callbacks of finished work on the main thread
+def process_completed_work():
+    while True:
+        try:
+            callback, future = WorkerPool.completed.get_nowait()
+        except queue.Empty:
+            break
+
+        WorkerPool.pending_callbacks -= 1
+
+        try:
+            callback(future)
+        except Exception as e:
+            print(f"Error occurred in worker callback: {e}")
+
+    return COMPLETION_CHECK_INTERVAL if WorkerPool.pending_callbacks > 0 else None
+
+
+def unregister():
+    if bpy.app.timers.is_registered(process_completed_work):
+        bpy.app.timers.unregister(process_completed_work)
+
+    WorkerPool.shutdown()
@@ -1,9 +1,8 @@
 import os
-import requests
 import shutil
 import zipfile
-from packaging import version
 from .utilities.utilities import get_env, show_message_box
+from .utilities.http_client import HttpClient, CONNECT_TIMEOUT, TRANSFER_READ_TIMEOUT
 
 
 class PlaybookVersionControl:
@@ -13,8 +12,16 @@ class PlaybookVersionControl:
 
     @classmethod
     def check_if_version_up_to_date(cls, current_version):
+        import requests
+        from packaging import version
+
         url = get_env("LATEST_VERSION_URL")
-        response = requests.get(url)
+
+        try:
+            response = HttpClient.get(url)
+        except requests.exceptions.RequestException as e:
+            print(f"Version check failed: {e}")
+            return
 
         if response.status_code == 200:
             latest_version = version.parse(response.text)
@@ -43,14 +50,23 @@ class PlaybookVersionControl:
 
 
 def download_latest_zip():
+    import requests
+
     url = get_env("LATEST_VERSION_ZIP_URL")
-    download_response = requests.get(url)
 
-    if download_response.status_code != 200:
-        return None
+    try:
+        download_response = HttpClient.get(url)
+
+        if download_response.status_code != 200:
+            return None
 
-    download_url = download_response.text
-    latest_zip = requests.get(download_url)
+        download_url = download_response.text
+        latest_zip = HttpClient.get(
+            download_url, timeout=(CONNECT_TIMEOUT, TRANSFER_READ_TIMEOUT)
+        )
+    except requests.exceptions.RequestException as e:
+        print(f"Update download failed: {e}")
+        return None
 
     if latest_zip.status_code != 200:
         return None
@@ -1,5 +1,6 @@
 import bpy
 from .render_status import RenderStatus
+from .utilities.worker_pool import WorkerPool
 from .utilities.utilities import (
     get_filepath,
     download_image,
@@ -11,11 +12,24 @@ filename = ""
 
 
 #
+# The image is downloaded on a worker thread and shown once it is saved
 def open_render_window(image_url: str):
-    global filename
-    filename = create_render_filename()
+    render_filename = create_render_filename()
+
+    WorkerPool.submit(
+        download_image,
+        image_url,
+        get_filepath(render_filename),
+        callback=lambda future: (
+            show_render_file(render_filename) if future.result() else None
+        ),
+    )
 
-    download_image(image_url, get_filepath(filename))
+
+# Show a render saved next to the utilities in the Playbook workspace
+def show_render_file(render_filename: str):
+    global filename
+    filename = render_filename
 
     # Playbook render workspace exists. Set workspace as active
     playbook = bpy.data.workspaces.get("Playbook")
@@ -0,0 +1,109 @@
+# Time the import of the add-on with python -X importtime and fail when a
+# heavy dependency is imported while the add-on is enabled, or when the
+# import takes longer than the budget.
+#
+# Run with the add-on installed, from a regular Python:
+#   python scripts/benchmark_import_time.py [blender] [addon_module] [budget_ms]
+
+import os
+import re
+import subprocess
+import sys
+
+args = sys.argv[1:]
+blender = args[0] if args else "blender"
+addon_module = args[1] if len(args) > 1 else "bl_ext.user_default.Playbook"
+budget_ms = float(args[2]) if len(args) > 2 else 500
+
+# Loaded on first use, never while the add-on is enabled
+heavy_modules = ["boto3", "botocore", "comfydeploy", "requests", "dotenv", "socketio"]
+
+enable_addon = (
+    "import addon_utils; "
+    f"addon_utils.enable({addon_module!r}, default_set=True, handle_error=None)"
+)
+
+importtime_line = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+#
+def run_blender() -> str:
+    env = dict(os.environ, PYTHONPROFILEIMPORTTIME="1")
+    result = subprocess.run(
+        [
+            blender,
+            "-b",
+            "--factory-startup",
+            "--python-use-system-env",
+            "--python-expr",
+            enable_addon,
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    return result.stderr
+
+
+# Imports made while importing the add-on package, as (name, self us,
+# cumulative us) with the package itself last. Nested imports are printed
+# before the module importing them, one level deeper. Network setup starts
+# on a worker once the package is imported, so its imports are not included
+def get_addon_imports(stderr: str) -> list[tuple[str, int, int]]:
+    imports = []
+    for line in stderr.splitlines():
+        match = importtime_line.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, len(indent), int(self_us), int(cumulative_us)))
+
+    for index, (name, level, _, _) in enumerate(imports):
+        if name == addon_module:
+            start = index
+            while start > 0 and imports[start - 1][1] > level:
+                start -= 1
+
+            return [
+                (name, self_us, cumulative_us)
+                for name, _, self_us, cumulative_us in imports[start : index + 1]
+            ]
+
+    return []
+
+
+#
+def is_heavy_module(name: str) -> bool:
+    return name.split(".")[0] in heavy_modules
+
+
+def main() -> int:
+    imports = get_addon_imports(run_blender())
+
+    if not imports:
+        print(f"{addon_module} was not imported, is the add-on installed?")
+        return 1
+
+    total_ms = imports[-1][2] / 1000
+    print(f"{addon_module} imported in {total_ms:.1f} ms ({len(imports)} modules)")
+
+    print("Slowest imports:")
+    for name, self_us, _ in sorted(imports, key=lambda entry: -entry[1])[:10]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    failed = False
+
+    heavy_imports = sorted({name for name, _, _ in imports if is_heavy_module(name)})
+    if heavy_imports:
+        print(f"Heavy modules imported on enable: {', '.join(heavy_imports)}")
+        failed = True
+
+    if total_ms > budget_ms:
+        print(f"Import took longer than the {budget_ms:.0f} ms budget")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
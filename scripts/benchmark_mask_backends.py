@@ -0,0 +1,90 @@
+# Time the Cycles and Workbench mask backends on a scene with many objects.
+#
+# Run with the add-on installed:
+#   blender -b --factory-startup --python scripts/benchmark_mask_backends.py -- \
+#       bl_ext.user_default.Playbook [object_count] [repeats]
+
+import bpy
+import importlib
+import sys
+import time
+
+args = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+addon_module = args[0] if args else "bl_ext.user_default.Playbook"
+object_count = int(args[1]) if len(args) > 1 else 10000
+repeats = int(args[2]) if len(args) > 2 else 3
+
+
+#
+def create_scene(count: int):
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    scene = bpy.context.scene
+
+    bpy.ops.mesh.primitive_cube_add(size=0.4)
+    mesh = bpy.context.active_object.data
+    bpy.data.objects.remove(bpy.context.active_object)
+
+    columns = int(count**0.5) + 1
+    for i in range(count):
+        obj = bpy.data.objects.new(f"cube_{i}", mesh)
+        obj.location = (i % columns - columns / 2, i // columns - columns / 2, 0)
+        scene.collection.objects.link(obj)
+
+    camera = bpy.data.objects.new("camera", bpy.data.cameras.new("camera"))
+    camera.location = (0, 0, columns * 1.2)
+    scene.collection.objects.link(camera)
+    scene.camera = camera
+
+    scene.world = bpy.data.worlds.new("World")
+    scene.render.resolution_x = 1024
+    scene.render.resolution_y = 1024
+
+
+#
+def assign_masks(objects_module, count: int):
+    masks = list(objects_module.mask_objects.keys())
+    for i, name in enumerate(f"cube_{i}" for i in range(0, count, 2)):
+        objects_module.mask_objects[masks[i % len(masks)]].append(name)
+
+
+#
+def time_backend(render_mask, count: int) -> list[float]:
+    timings = []
+
+    for _ in range(count):
+        start = time.perf_counter()
+        render_mask()
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def main():
+    create_scene(object_count)
+    bpy.ops.preferences.addon_enable(module=addon_module)
+
+    objects = importlib.import_module(f"{addon_module}.objects.objects")
+    visible = importlib.import_module(f"{addon_module}.objects.visible_objects")
+    mask_pass = importlib.import_module(f"{addon_module}.render_passes.mask_pass")
+    workbench_mask_pass = importlib.import_module(
+        f"{addon_module}.render_passes.workbench_mask_pass"
+    )
+
+    visible.set_visible_objects(bpy.context)
+    assign_masks(objects, object_count)
+
+    backends = {
+        "CYCLES": mask_pass.render_mask_pass,
+        "WORKBENCH": workbench_mask_pass.render_workbench_mask_pass,
+    }
+
+    print(f"Mask capture, {object_count} objects, {repeats} repeats")
+    for name, render_mask in backends.items():
+        timings = time_backend(render_mask, repeats)
+        print(
+            f"{name:>10}: first {timings[0]:.2f}s, "
+            f"best {min(timings):.2f}s, mean {sum(timings) / len(timings):.2f}s"
+        )
+
+
+main()
@@ -0,0 +1,97 @@
+# Local stand-in for the render event server, used to measure the latency
+# and reconnect behaviour of the push channel without a real render.
+#
+#   pip install python-socketio
+#   python scripts/render_events_server.py --port 5005
+#
+# Point the add-on at it with RENDER_EVENTS_URL=http://localhost:5005. Every
+# subscribed run goes through queued, running and success, then receives a
+# result URL. Each emit prints its send time so the client side latency can
+# be compared against it. Stop and restart the server while a run is in
+# flight to test reconnects: clients that subscribe again get the last event
+# of the run.
+
+import argparse
+import socketserver
+import time
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+import socketio
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--port", type=int, default=5005)
+parser.add_argument("--step", type=float, default=1, help="Seconds per status")
+parser.add_argument("--result-url", default="https://example.com/result.png")
+args = parser.parse_args()
+
+# The WSGI reference server can't upgrade to WebSockets, so the stand-in only
+# uses long-polling
+server = socketio.Server(
+    async_mode="threading", cors_allowed_origins="*", transports=["polling"]
+)
+
+# Last event sent for each run
+last_events: dict[str, tuple | None] = {}
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+#
+def emit(event: str, data: dict):
+    last_events[data["run_id"]] = (event, data)
+    server.emit(event, data, room=data["run_id"])
+    print(f"{time.time():.3f} sent {event} {data}")
+
+
+# Walk the run through every status and send the result
+def run_render(run_id: str):
+    for status in ["queued", "running", "success"]:
+        server.sleep(args.step)
+        emit("render-status", {"run_id": run_id, "status": status})
+
+    emit("render-result", {"run_id": run_id, "url": args.result_url})
+
+
+@server.on("connect")
+def on_connect(sid, environ):
+    print(f"{time.time():.3f} connected {sid}")
+
+
+@server.on("disconnect")
+def on_disconnect(sid, *args):
+    print(f"{time.time():.3f} disconnected {sid}")
+
+
+@server.on("subscribe")
+def on_subscribe(sid, data):
+    run_id = data["run_id"]
+    print(f"{time.time():.3f} {sid} subscribed to {run_id}")
+
+    server.enter_room(sid, run_id)
+
+    if run_id not in last_events:
+        last_events[run_id] = None
+        server.start_background_task(run_render, run_id)
+    elif last_events[run_id]:
+        event, event_data = last_events[run_id]
+        server.emit(event, event_data, to=sid)
+
+
+@server.on("unsubscribe")
+def on_unsubscribe(sid, data):
+    server.leave_room(sid, data["run_id"])
+
+
+make_server(
+    "localhost",
+    args.port,
+    socketio.WSGIApp(server),
+    ThreadingWSGIServer,
+    QuietRequestHandler,
+).serve_forever()
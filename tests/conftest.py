@@ -0,0 +1,49 @@
+import os
+import sys
+import types
+
+# The add-on imports bpy, which only exists inside Blender. Every bpy name the
+# modules use at import time resolves to an empty class, so the functions that
+# don't touch Blender data can be tested with a regular Python
+
+
+# Module whose missing attributes are created as empty classes
+class FakeModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        value = type(name, (), {"__init__": lambda self, *args, **kwargs: None})
+        setattr(self, name, value)
+
+        return value
+
+
+#
+def add_fake_module(name: str) -> FakeModule:
+    module = FakeModule(name)
+    sys.modules[name] = module
+
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)
+
+    return module
+
+
+for module_name in [
+    "bpy",
+    "bpy.types",
+    "bpy.props",
+    "bpy.utils",
+    "bpy.utils.previews",
+    "bpy.app",
+    "bpy.app.handlers",
+    "bpy.app.timers",
+]:
+    add_fake_module(module_name)
+
+sys.modules["bpy.app"].version = (4, 2, 0)
+sys.modules["bpy.app.handlers"].persistent = lambda function: function
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
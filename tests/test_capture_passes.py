@@ -0,0 +1,74 @@
+import calendar
+import json
+import time
+import pytest
+from Playbook import capture_passes
+from Playbook.capture_passes import (
+    UploadManifest,
+    get_url_destination,
+    get_url_expiry,
+)
+
+# 2024-01-01 00:00:00 UTC
+SIGNED_AT = calendar.timegm((2024, 1, 1, 0, 0, 0))
+
+
+#
+def test_get_url_destination():
+    url = "https://bucket.s3.amazonaws.com/user/depth.png?X-Amz-Signature=abc"
+
+    assert get_url_destination(url) == "https://bucket.s3.amazonaws.com/user/depth.png"
+
+
+#
+@pytest.mark.parametrize(
+    "query, expiry",
+    [
+        ("X-Amz-Date=20240101T000000Z&X-Amz-Expires=3600", SIGNED_AT + 3600),
+        ("x-goog-date=20240101T000000Z&x-goog-expires=600", SIGNED_AT + 600),
+        (f"Expires={SIGNED_AT}&Signature=abc", SIGNED_AT),
+        ("X-Amz-Date=20240101T000000Z", 0),
+        ("X-Amz-Date=yesterday&X-Amz-Expires=3600", 0),
+        ("", 0),
+    ],
+)
+def test_get_url_expiry(query, expiry):
+    assert get_url_expiry(f"https://storage.example.com/depth.png?{query}") == expiry
+
+
+#
+@pytest.fixture
+def manifest_path(tmp_path, monkeypatch):
+    path = tmp_path / "upload_manifest.json"
+    monkeypatch.setattr(capture_passes, "get_upload_manifest_path", lambda: str(path))
+    monkeypatch.setattr(UploadManifest, "uploads", None)
+
+    return path
+
+
+# An upload is trusted until its URL expires, also after a restart
+def test_upload_manifest_expiry(manifest_path):
+    now = time.time()
+    UploadManifest.mark_uploaded("https://storage/depth.png", "a", now + 60)
+    UploadManifest.mark_uploaded("https://storage/mask.png", "b", now + 1)
+
+    assert UploadManifest.is_uploaded("https://storage/depth.png", "a")
+    assert not UploadManifest.is_uploaded("https://storage/depth.png", "c")
+    assert not UploadManifest.is_uploaded("https://storage/normal.png", "a")
+
+    UploadManifest.uploads = None
+    assert UploadManifest.is_uploaded("https://storage/depth.png", "a")
+    assert UploadManifest.is_uploaded("https://storage/mask.png", "b")
+
+    UploadManifest.uploads["https://storage/mask.png"][1] = now - 1
+    assert not UploadManifest.is_uploaded("https://storage/mask.png", "b")
+
+
+# Expired uploads are dropped from the file when the next one is recorded
+def test_upload_manifest_drops_expired(manifest_path):
+    now = time.time()
+    UploadManifest.mark_uploaded("https://storage/depth.png", "a", now - 1)
+    UploadManifest.mark_uploaded("https://storage/mask.png", "b", now + 60)
+
+    with open(manifest_path) as file:
+        assert list(json.load(file)) == ["https://storage/mask.png"]
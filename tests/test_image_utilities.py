@@ -0,0 +1,93 @@
+import struct
+import zlib
+import numpy as np
+import pytest
+from Playbook.utilities.image_utilities import encode_png
+
+# Number of channels of each PNG color type
+png_channels = {0: 1, 2: 3, 4: 2, 6: 4}
+
+
+# Decode a PNG whose rows all use filter type 0, as encode_png writes them.
+# Returns the bit depth and the (height, width, channels) stored values
+def decode_png(data: bytes) -> tuple[int, np.ndarray]:
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+
+    chunks = {}
+    offset = 8
+    while offset < len(data):
+        (length,) = struct.unpack(">I", data[offset : offset + 4])
+        chunk_type = data[offset + 4 : offset + 8]
+        chunk_data = data[offset + 8 : offset + 8 + length]
+        (crc,) = struct.unpack(">I", data[offset + 8 + length : offset + 12 + length])
+
+        assert crc == zlib.crc32(chunk_type + chunk_data)
+        chunks[chunk_type] = chunk_data
+        offset += 12 + length
+
+    assert b"IEND" in chunks
+
+    width, height, bit_depth, color_type, _, _, _ = struct.unpack(
+        ">IIBBBBB", chunks[b"IHDR"]
+    )
+    channels = png_channels[color_type]
+
+    scanlines = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8)
+    scanlines = scanlines.reshape(height, -1)
+    assert not scanlines[:, 0].any()
+    rows = np.ascontiguousarray(scanlines[:, 1:])
+
+    if bit_depth == 1:
+        values = np.unpackbits(rows, axis=1)[:, :width]
+    elif bit_depth == 16:
+        values = rows.view(">u2")
+    else:
+        values = rows
+
+    return bit_depth, values.reshape(height, width, channels)
+
+
+#
+def test_encode_png_8_bit_rgba():
+    rng = np.random.default_rng(0)
+    pixels = rng.random((5, 7, 4), dtype=np.float32)
+
+    bit_depth, values = decode_png(encode_png(pixels))
+
+    assert bit_depth == 8
+    np.testing.assert_array_equal(values, np.rint(pixels * 255))
+
+
+#
+def test_encode_png_16_bit_grayscale():
+    pixels = np.linspace(0, 1, 12, dtype=np.float32).reshape(3, 4)
+
+    bit_depth, values = decode_png(encode_png(pixels, bit_depth=16))
+
+    assert bit_depth == 16
+    np.testing.assert_array_equal(values[..., 0], np.rint(pixels * 65535))
+
+
+# Values outside [0, 1] are clipped
+def test_encode_png_clips_values():
+    pixels = np.array([[[-1, 0.5, 2]]], dtype=np.float32)
+
+    _, values = decode_png(encode_png(pixels))
+
+    np.testing.assert_array_equal(values, [[[0, 128, 255]]])
+
+
+# Rows that don't fill a whole byte are padded
+def test_encode_png_1_bit():
+    pixels = np.array([[0, 1, 0.6, 0.4, 1, 1, 0, 1, 1, 0]], dtype=np.float32)
+
+    bit_depth, values = decode_png(encode_png(pixels, bit_depth=1))
+
+    assert bit_depth == 1
+    np.testing.assert_array_equal(values[..., 0], pixels >= 0.5)
+
+
+#
+def test_encode_png_1_bit_requires_single_channel():
+    with pytest.raises(ValueError):
+        encode_png(np.zeros((2, 2, 3)), bit_depth=1)
@@ -0,0 +1,54 @@
+import numpy as np
+from Playbook.objects.object_utilities import mask_rgb_colors
+from Playbook.render_passes.mask_pass import CATCHALL_INDEX, colorize_mask
+
+
+#
+def create_buffers(index: list, alpha: list) -> tuple:
+    index = np.array([index], dtype=np.float32)
+    alpha = np.array([alpha], dtype=np.float32)
+    image = np.zeros(index.shape + (4,), dtype=np.float32)
+
+    return index, alpha, image
+
+
+# Every mask index gets its mask color and other objects the catch-all color
+def test_colorize_mask_palette():
+    index, alpha, image = create_buffers(list(range(1, 8)) + [CATCHALL_INDEX], [1] * 8)
+
+    mask = colorize_mask(index, alpha, image, 0)
+
+    expected = [mask_rgb_colors[f"MASK{i}"] for i in range(1, 8)]
+    expected.append(mask_rgb_colors["CATCHALL"])
+    np.testing.assert_allclose(mask[0], expected, atol=1e-6)
+
+
+# Uncovered pixels show the background color and partly covered pixels are
+# blended with it
+def test_colorize_mask_coverage():
+    index, alpha, image = create_buffers([0, 1], [0, 0.5])
+
+    mask = colorize_mask(index, alpha, image, 0)
+
+    background = np.array(mask_rgb_colors["CATCHALL"])
+    mask1 = np.array(mask_rgb_colors["MASK1"])
+    np.testing.assert_allclose(mask[0, 0], background, atol=1e-6)
+    np.testing.assert_allclose(
+        mask[0, 1, :3], ((background + mask1) / 2)[:3], atol=1e-6
+    )
+    assert (mask[..., 3] == 1).all()
+
+
+# The preserved mask keeps the image, weighted by its alpha
+def test_colorize_mask_preserves_texture():
+    index, alpha, image = create_buffers([2, 2, 3], [1, 1, 1])
+    image[0, :, :3] = 0.25
+    image[0, :, 3] = [1, 0.5, 1]
+
+    mask = colorize_mask(index, alpha, image, 2)
+
+    mask2 = np.array(mask_rgb_colors["MASK2"][:3])
+    np.testing.assert_allclose(mask[0, 0, :3], 0.25, atol=1e-6)
+    np.testing.assert_allclose(mask[0, 1, :3], (mask2 + 0.25) / 2, atol=1e-6)
+    np.testing.assert_allclose(mask[0, 2], mask_rgb_colors["MASK3"], atol=1e-6)
+    assert (mask[..., 3] == 1).all()
@@ -0,0 +1,40 @@
+from email.parser import BytesParser
+from email.policy import HTTP
+from Playbook.comfy_deploy_api.network import MultipartBody
+
+fields = {"prompt": "A house", "seed": 7}
+files = {"depth": b"\x89PNG depth", "mask": bytes(range(256)) * 4}
+
+
+#
+def get_body_bytes(body: MultipartBody) -> bytes:
+    return b"".join(bytes(part) for part in body)
+
+
+# requests sends the length as Content-Length, so it has to match the bytes
+# streamed
+def test_multipart_body_length():
+    body = MultipartBody(fields, files)
+
+    assert len(body) == len(get_body_bytes(body))
+
+
+#
+def test_multipart_body_parts():
+    body = MultipartBody(fields, files)
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {body.content_type}\r\n\r\n".encode() + get_body_bytes(body)
+    )
+
+    parts = {
+        part.get_param("name", header="content-disposition"): part
+        for part in message.iter_parts()
+    }
+
+    assert parts["prompt"].get_content() == "A house"
+    assert parts["seed"].get_content() == "7"
+
+    for name, data in files.items():
+        assert parts[name].get_filename() == f"{name}.png"
+        assert parts[name].get_content_type() == "image/png"
+        assert parts[name].get_payload(decode=True) == data
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from Playbook.render_passes.outline_pass import generate_outline, sobel_magnitude
+
+sobel_x = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=np.float32)
+
+
+# Sobel magnitude of a single channel image, one pixel at a time
+def sobel_reference(image: np.ndarray) -> np.ndarray:
+    padded = np.pad(image, 1, mode="edge")
+    height, width = image.shape
+    magnitude = np.zeros_like(image)
+
+    for y in range(height):
+        for x in range(width):
+            window = padded[y : y + 3, x : x + 3]
+            gradient_x = (window * sobel_x).sum()
+            gradient_y = (window * sobel_x.T).sum()
+            magnitude[y, x] = np.hypot(gradient_x, gradient_y)
+
+    return magnitude
+
+
+#
+def test_sobel_magnitude_matches_reference():
+    rng = np.random.default_rng(0)
+    image = rng.random((6, 9), dtype=np.float32)
+
+    magnitude = sobel_magnitude(image[..., np.newaxis])
+
+    np.testing.assert_allclose(magnitude[..., 0], sobel_reference(image), atol=1e-5)
+
+
+# A step in depth gives an edge on the two columns next to it
+def test_generate_outline_depth_step():
+    depth = np.ones((6, 8, 1), dtype=np.float32)
+    depth[:, 4:] = 2
+
+    edges = generate_outline(depth=depth)
+
+    expected = np.zeros((6, 8), dtype=bool)
+    expected[:, 3:5] = True
+    np.testing.assert_array_equal(edges, expected)
+
+
+# Gradients of each buffer are weighted and summed before the threshold
+def test_generate_outline_weights():
+    normal = np.zeros((4, 6, 3), dtype=np.float32)
+    normal[:, 3:] = 0.1
+
+    assert not generate_outline(normal=normal).any()
+    assert generate_outline(normal=normal, normal_weight=10)[:, 2:4].all()
+
+    depth = np.ones((4, 6, 1), dtype=np.float32)
+    depth[:, :1] = 2
+    edges = generate_outline(depth=depth, normal=normal * 10, normal_weight=0)
+
+    expected = np.zeros((4, 6), dtype=bool)
+    expected[:, :2] = True
+    np.testing.assert_array_equal(edges, expected)
+
+
+#
+def test_generate_outline_without_buffers():
+    with pytest.raises(ValueError):
+        generate_outline()
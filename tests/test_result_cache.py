@@ -0,0 +1,35 @@
+from Playbook.result_cache import get_result_key
+
+render_input = {"prompt": "A house", "seed": 1}
+files = {"depth": b"depth", "mask": b"mask"}
+
+
+# The key doesn't depend on the order of the inputs or the files
+def test_get_result_key_is_stable():
+    key = get_result_key("alias", "/retexture", render_input, files)
+
+    assert key == get_result_key(
+        "alias",
+        "/retexture",
+        dict(reversed(render_input.items())),
+        dict(reversed(files.items())),
+    )
+    assert len(key) == 64
+
+
+# Everything that changes the result changes the key
+def test_get_result_key_changes():
+    key = get_result_key("alias", "/retexture", render_input, files)
+
+    changed_keys = [
+        get_result_key("other", "/retexture", render_input, files),
+        get_result_key("alias", "/style-transfer", render_input, files),
+        get_result_key("alias", "/retexture", {**render_input, "seed": 2}, files),
+        get_result_key("alias", "/retexture", render_input, {**files, "mask": b"x"}),
+        get_result_key(
+            "alias", "/retexture", render_input, {"depth": b"mask", "mask": b"depth"}
+        ),
+    ]
+
+    assert key not in changed_keys
+    assert len(set(changed_keys)) == len(changed_keys)